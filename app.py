@@ -4,11 +4,16 @@ Serviço que recebe resumos de pedidos, extrai dados via LLM e valida contra ban
 """
 
 import logging
+from zoneinfo import ZoneInfo
+from dateutil import parser as date_parser
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from config import Config, config
 from llm_extractor import LLMExtractor
 from database import SupabaseClient, OrderValidator
+from usage_tracker import get_usage_tracker
+from responses import json_response, requested_fields, select_fields
+from incremental_extraction import ConversationCache, IncrementalExtractor
 
 # Configuração de logging
 logging.basicConfig(
@@ -29,6 +34,16 @@ CORS(app, resources={r"/api/*": {"origins": "*"}})
 llm_extractor = LLMExtractor()
 db_client = SupabaseClient()
 order_validator = OrderValidator(db_client)
+incremental_extractor = IncrementalExtractor(
+    llm_extractor.extract_order_data_with_usage,
+    lambda unidade: db_client.snapshot(unidade=unidade),
+    ConversationCache(Config.CONVERSATION_TTL_SECONDS, Config.CONVERSATION_CACHE_SIZE)
+)
+
+# Os SDKs e o cardápio são carregados em segundo plano, já no worker (após o fork
+# do gunicorn), para o import da aplicação não esperar por eles; /ready informa quando terminou
+llm_extractor.warm_start()
+db_client.warm_start()
 
 
 @app.route('/health', methods=['GET'])
@@ -46,6 +61,31 @@ def health_check():
     }), 200
 
 
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """
+    Endpoint de prontidão: só responde 200 quando os clientes estão conectados
+    e o cardápio está em memória. O /health continua indicando apenas que o processo está no ar.
+    
+    Apenas lê o estado deixado pelo aquecimento em segundo plano; o que ainda
+    não estiver pronto é disparado de novo em segundo plano, sem bloquear a requisição.
+    
+    Returns:
+        JSON com o resultado de cada verificação (503 enquanto não estiver pronto)
+    """
+    checks = {
+        'openai': llm_extractor.client_ready(),
+        'supabase': db_client.client_ready(),
+        'cardapio': db_client.catalog_ready()
+    }
+    ready = all(checks.values())
+    
+    return jsonify({
+        'status': 'pronto' if ready else 'aguardando',
+        'verificacoes': checks
+    }), 200 if ready else 503
+
+
 @app.route('/api/validate-order', methods=['POST'])
 def validate_order():
     """
@@ -56,7 +96,10 @@ def validate_order():
     
     Request JSON:
         {
-            "resumo": "Texto do resumo do pedido..."
+            "resumo": "Texto do resumo do pedido...",
+            "conversa_id": "Identificador da conversa (opcional)",
+            "campos": ["pedido_valido", "validacao.erros"] (opcional),
+            "resposta": "compacta" (opcional)
         }
     
     Returns:
@@ -80,11 +123,29 @@ def validate_order():
                 'status': 'erro'
             }), 400
         
+        catalog_version, quoted_at, error = _parse_catalog_pin(data)
+        if error:
+            return jsonify({
+                'erro': error,
+                'status': 'erro'
+            }), 400
+        
+        fields, error = requested_fields(data)
+        if error:
+            return jsonify({
+                'erro': error,
+                'status': 'erro'
+            }), 400
+        
         logger.info(f"Iniciando validação de pedido")
         
         # Extrai dados do resumo usando LLM
         logger.info("Etapa 1: Extração de dados com LLM")
-        order_data = llm_extractor.extract_order_data(resumo)
+        if Config.INCREMENTAL_EXTRACTION:
+            order_data, usage, extraction = incremental_extractor.extract(resumo, data.get('conversa_id'))
+        else:
+            order_data, usage = llm_extractor.extract_order_data_with_usage(resumo)
+            extraction = {'modo': 'completo', 'linhas_alteradas': None}
         
         if order_data is None:
             return jsonify({
@@ -92,9 +153,22 @@ def validate_order():
                 'status': 'erro'
             }), 400
         
+        snapshot = None
+        if catalog_version is not None or quoted_at is not None:
+            snapshot = db_client.snapshot(
+                version=catalog_version,
+                at=quoted_at,
+                unidade=order_data.get('unidade')
+            )
+            if snapshot is None:
+                return jsonify({
+                    'erro': 'Versão do cardápio não disponível no histórico',
+                    'status': 'erro'
+                }), 400
+        
         # Valida dados contra banco de dados
         logger.info("Etapa 2: Validação contra banco de dados")
-        validation_result = order_validator.validate_order(order_data)
+        validation_result = order_validator.validate_order(order_data, snapshot)
         
         # Prepara resposta
         response = {
@@ -110,13 +184,20 @@ def validate_order():
                 ),
                 'erros': validation_result['erros'],
                 'correcoes': validation_result['correcoes'],
-                'resumo': validation_result['resumo']
-            }
+                'resumo': validation_result['resumo'],
+                'versao_catalogo': validation_result['versao_catalogo'],
+                'catalogo_desatualizado': db_client.catalog_status(order_data.get('unidade'))['desatualizado']
+            },
+            'uso_llm': usage,
+            'extracao': extraction
         }
         
         logger.info(f"Validação concluída: pedido_valido={validation_result['valido']}")
         
-        return jsonify(response), 200
+        if fields:
+            response = select_fields(response, fields)
+        
+        return json_response(response, 200)
     
     except Exception as e:
         logger.error(f"Erro ao validar pedido: {e}", exc_info=True)
@@ -126,6 +207,63 @@ def validate_order():
         }), 500
 
 
+def _parse_catalog_pin(data):
+    """
+    Lê os campos opcionais que fixam a versão do cardápio.
+    
+    Args:
+        data: JSON da requisição com 'versao_catalogo' ou 'cotado_em'
+        
+    'versao_catalogo' é o checksum devolvido em uma validação anterior; um
+    'cotado_em' sem fuso é lido no fuso de Config.TIMEZONE.
+    
+    Returns:
+        Tupla (versão, instante epoch da cotação, mensagem de erro)
+    """
+    try:
+        version = data.get('versao_catalogo')
+        if version is not None:
+            if not isinstance(version, str) or not version.strip():
+                raise ValueError(version)
+            return version.strip(), None, None
+        
+        cotado_em = data.get('cotado_em')
+        if cotado_em is None:
+            return None, None, None
+        if isinstance(cotado_em, (int, float)):
+            return None, float(cotado_em), None
+        quoted_at = date_parser.isoparse(str(cotado_em))
+        if quoted_at.tzinfo is None:
+            quoted_at = quoted_at.replace(tzinfo=ZoneInfo(Config.TIMEZONE))
+        return None, quoted_at.timestamp(), None
+    except (TypeError, ValueError):
+        return None, None, 'Campos "versao_catalogo" ou "cotado_em" inválidos'
+
+
+@app.route('/api/catalog/versions', methods=['GET'])
+def catalog_versions():
+    """
+    Endpoint que lista as versões do cardápio mantidas em memória.
+    
+    Query params:
+        unidade: Unidade cujo cardápio deve ser listado (opcional)
+    
+    Returns:
+        JSON com a versão vigente, o histórico, o uso de memória por unidade,
+        o estado da última atualização e as estatísticas do cache de validações
+    """
+    unidade = request.args.get('unidade')
+    current = db_client.snapshot(unidade=unidade)
+    return jsonify({
+        'status': 'sucesso',
+        'versao_vigente': current.version if current else None,
+        'versoes': db_client.catalog_versions(unidade),
+        'memoria': db_client.catalog_registry.describe(),
+        'estado': db_client.catalog_status(unidade),
+        'cache_validacao': order_validator.cache_stats()
+    }), 200
+
+
 @app.route('/api/extract-order', methods=['POST'])
 def extract_order():
     """
@@ -158,7 +296,7 @@ def extract_order():
             }), 400
         
         logger.info("Extração de dados (sem validação)")
-        order_data = llm_extractor.extract_order_data(resumo)
+        order_data, usage = llm_extractor.extract_order_data_with_usage(resumo)
         
         if order_data is None:
             return jsonify({
@@ -166,10 +304,11 @@ def extract_order():
                 'status': 'erro'
             }), 400
         
-        return jsonify({
+        return json_response({
             'status': 'sucesso',
-            'dados': order_data
-        }), 200
+            'dados': order_data,
+            'uso_llm': usage
+        }, 200)
     
     except Exception as e:
         logger.error(f"Erro ao extrair pedido: {e}", exc_info=True)
@@ -179,6 +318,24 @@ def extract_order():
         }), 500
 
 
+@app.route('/api/usage', methods=['GET'])
+def usage_report():
+    """
+    Endpoint com o consumo de tokens e custo estimado do LLM.
+    
+    Os agregados são por processo (cada worker do gunicorn mantém os seus).
+    
+    Returns:
+        JSON com totais, agregados por unidade e por modelo, alertas recentes
+        e métricas dos micro-lotes de extração (se ativados)
+    """
+    return jsonify({
+        'status': 'sucesso',
+        'uso': get_usage_tracker().snapshot(),
+        'lotes_extracao': llm_extractor.batcher.stats() if llm_extractor.batcher else None
+    }), 200
+
+
 @app.errorhandler(404)
 def not_found(error):
     """Handler para rotas não encontradas."""
@@ -0,0 +1,351 @@
+"""
+Validação em lote de resumos de pedidos a partir de arquivos JSONL ou CSV.
+
+Lê os resumos em streaming, extrai os dados com o LLM em paralelo (threads)
+e valida em um pool de processos contra um único cardápio carregado,
+gravando os resultados incrementalmente com memória constante.
+
+Uso:
+    python bulk_validate.py pedidos.jsonl --saida resultados.jsonl
+    python bulk_validate.py historico.csv --catalogo database_schema.sql --campo-dados dados
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import random
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_worker_validator = None
+
+# Amostra máxima de latências guardada para os percentis (reservatório)
+LATENCY_SAMPLE_SIZE = 10000
+
+
+def iter_orders(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Lê os pedidos de um arquivo JSONL ou CSV, uma linha por vez.
+
+    Args:
+        path: Caminho do arquivo ('-' para JSONL na entrada padrão)
+
+    Returns:
+        Iterador de dicionários com ao menos 'id' e a linha original
+    """
+    is_csv = path.lower().endswith('.csv')
+    source = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8', newline='' if is_csv else None)
+
+    try:
+        if is_csv:
+            for number, row in enumerate(csv.DictReader(source), 1):
+                yield {'id': row.get('id') or row.get('request_id') or str(number), 'linha': row}
+        else:
+            for number, line in enumerate(source, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield {'id': str(number), 'linha': None, 'erro': f'JSON inválido: {e}'}
+                    continue
+                if not isinstance(row, dict):
+                    yield {'id': str(number), 'linha': None,
+                           'erro': f'Linha JSON deve ser um objeto, recebido {type(row).__name__}'}
+                    continue
+                yield {'id': str(row.get('id') or row.get('request_id') or number), 'linha': row}
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+
+def _get_path(row: Dict[str, Any], dotted: str) -> Any:
+    """Busca um campo aninhado (ex: 'esperado.dados_extraidos')."""
+    value: Any = row
+    for part in dotted.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    if isinstance(value, str):
+        value = json.loads(value)
+    return value
+
+
+def _init_worker(catalog: Dict[str, List[Dict]]):
+    """Inicializa o validador de cada processo com o cardápio já carregado."""
+    global _worker_validator
+    from database import OrderValidator, StaticCatalogClient
+
+    logging.getLogger('database').setLevel(logging.WARNING)
+    _worker_validator = OrderValidator(StaticCatalogClient(catalog))
+
+
+def _validate_in_worker(order_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Valida um pedido no processo de trabalho."""
+    return _worker_validator.validate_order(order_data)
+
+
+class BulkValidator:
+    """Orquestra extração concorrente e validação em pool de processos."""
+
+    def __init__(
+        self,
+        catalog: Dict[str, List[Dict]],
+        extraction_workers: int = 8,
+        validation_workers: Optional[int] = None,
+        data_field: Optional[str] = None,
+        include_data: bool = False
+    ):
+        """
+        Inicializa o validador em lote.
+
+        Args:
+            catalog: Dicionário {tabela: linhas} usado por todos os processos
+            extraction_workers: Chamadas simultâneas ao LLM
+            validation_workers: Processos de validação (padrão: número de CPUs)
+            data_field: Campo com dados já extraídos (dispensa o LLM)
+            include_data: Inclui os dados extraídos em cada resultado
+        """
+        self.catalog = catalog
+        self.extraction_workers = extraction_workers
+        self.validation_workers = validation_workers or os.cpu_count() or 1
+        self.data_field = data_field
+        self.include_data = include_data
+        self._extractor = None
+        self.stats = {
+            'total': 0,
+            'validos': 0,
+            'invalidos': 0,
+            'falhas': 0,
+            'extracoes': 0,
+            'latencias_extracao': []
+        }
+        self._random = random.Random(0)
+
+    def run(self, orders: Iterator[Dict[str, Any]], output) -> Dict[str, Any]:
+        """
+        Processa todos os pedidos e grava um resultado JSON por linha.
+
+        Args:
+            orders: Iterador de pedidos (ver iter_orders)
+            output: Arquivo de saída aberto para escrita
+
+        Returns:
+            Relatório final com contagens, vazão e latências
+        """
+        start = time.perf_counter()
+        # Janelas limitadas mantêm a memória constante independentemente do tamanho do arquivo
+        window = max(self.extraction_workers, self.validation_workers) * 4
+
+        with ThreadPoolExecutor(max_workers=self.extraction_workers) as threads, \
+                ProcessPoolExecutor(max_workers=self.validation_workers,
+                                    initializer=_init_worker,
+                                    initargs=(self.catalog,)) as processes:
+            extracting: deque = deque()
+            validating: deque = deque()
+
+            for order in orders:
+                extracting.append((order, threads.submit(self._extract, order)))
+
+                while len(extracting) >= window:
+                    self._advance(extracting.popleft(), processes, validating, output)
+                while len(validating) >= window:
+                    self._write(validating.popleft(), output)
+
+            while extracting:
+                self._advance(extracting.popleft(), processes, validating, output)
+            while validating:
+                self._write(validating.popleft(), output)
+
+        return self.report(time.perf_counter() - start)
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        """
+        Monta o relatório de vazão e erros.
+
+        Args:
+            elapsed: Tempo total em segundos
+
+        Returns:
+            Dicionário com o relatório
+        """
+        # Percentis estimados sobre a amostra (exatos até LATENCY_SAMPLE_SIZE extrações)
+        latencies = sorted(self.stats['latencias_extracao'])
+
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 3)
+
+        total = self.stats['total']
+        return {
+            'total': total,
+            'validos': self.stats['validos'],
+            'invalidos': self.stats['invalidos'],
+            'falhas': self.stats['falhas'],
+            'taxa_falhas': round(self.stats['falhas'] / total, 4) if total else 0.0,
+            'tempo_total_s': round(elapsed, 3),
+            'pedidos_por_segundo': round(total / elapsed, 2) if elapsed > 0 else None,
+            'extracao_p50_s': percentile(0.50),
+            'extracao_p95_s': percentile(0.95)
+        }
+
+    def _extract(self, order: Dict[str, Any]) -> Dict[str, Any]:
+        """Obtém os dados estruturados de um pedido (campo pronto ou LLM)."""
+        if order.get('erro'):
+            return {'erro': order['erro']}
+
+        row = order['linha']
+        if not isinstance(row, dict):
+            return {'erro': 'Linha do pedido deve ser um objeto'}
+        if self.data_field:
+            try:
+                data = _get_path(row, self.data_field)
+            except (TypeError, ValueError) as e:
+                return {'erro': f"Campo '{self.data_field}' inválido: {e}"}
+            if data is not None:
+                return {'dados': data}
+
+        resumo = row.get('resumo') or ''
+        resumo = resumo.strip() if isinstance(resumo, str) else ''
+        if not resumo:
+            return {'erro': 'Resumo não pode estar vazio'}
+
+        start = time.perf_counter()
+        data = self._get_extractor().extract_order_data(resumo)
+        latency = time.perf_counter() - start
+
+        if data is None:
+            return {'erro': 'Falha ao extrair dados do resumo', 'latencia': latency}
+        return {'dados': data, 'latencia': latency}
+
+    def _get_extractor(self):
+        """Cria o extrator do LLM apenas quando há resumos a extrair."""
+        if self._extractor is None:
+            from llm_extractor import LLMExtractor
+            self._extractor = LLMExtractor()
+        return self._extractor
+
+    def _advance(self, item, processes: ProcessPoolExecutor, validating: deque, output):
+        """Envia um pedido já extraído para validação."""
+        order, future = item
+        extraction = future.result()
+        if 'latencia' in extraction:
+            self._record_latency(extraction['latencia'])
+
+        if 'erro' in extraction:
+            validating.append((order, extraction, None))
+        else:
+            validating.append((order, extraction, processes.submit(_validate_in_worker, extraction['dados'])))
+
+    def _record_latency(self, latency: float):
+        """Guarda a latência em uma amostra de tamanho fixo (reservoir sampling)."""
+        self.stats['extracoes'] += 1
+        sample = self.stats['latencias_extracao']
+        if len(sample) < LATENCY_SAMPLE_SIZE:
+            sample.append(latency)
+            return
+        index = self._random.randrange(self.stats['extracoes'])
+        if index < LATENCY_SAMPLE_SIZE:
+            sample[index] = latency
+
+    def _write(self, item, output):
+        """Grava o resultado de um pedido e atualiza as estatísticas."""
+        order, extraction, future = item
+        self.stats['total'] += 1
+        result: Dict[str, Any] = {'id': order['id']}
+
+        if future is None:
+            self.stats['falhas'] += 1
+            result.update({'status': 'erro', 'erro': extraction['erro']})
+        else:
+            try:
+                validation = future.result()
+            except Exception as e:
+                self.stats['falhas'] += 1
+                result.update({'status': 'erro', 'erro': f'Erro ao validar pedido: {e}'})
+            else:
+                self.stats['validos' if validation['valido'] else 'invalidos'] += 1
+                result.update({
+                    'status': 'sucesso',
+                    'pedido_valido': validation['valido'],
+                    'validacao': {
+                        'valor_total_informado': validation['valor_total_informado'],
+                        'valor_total_calculado': validation['valor_total_calculado'],
+                        'erros': validation['erros'],
+                        'correcoes': validation['correcoes']
+                    }
+                })
+                if self.include_data:
+                    result['dados_extraidos'] = extraction['dados']
+
+        output.write(json.dumps(result, ensure_ascii=False) + '\n')
+
+
+def load_catalog(source: str) -> Dict[str, List[Dict]]:
+    """
+    Carrega o cardápio uma única vez para todo o lote.
+
+    Args:
+        source: 'supabase' ou caminho de um script SQL com dados de exemplo
+
+    Returns:
+        Dicionário {tabela: linhas}
+    """
+    if source == 'supabase':
+        from database import SupabaseClient
+        return SupabaseClient().fetch_catalog()
+
+    from synthetic_orders import load_seed_catalog
+    return load_seed_catalog(source)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Ponto de entrada da linha de comando."""
+    parser = argparse.ArgumentParser(description='Valida resumos de pedidos em lote (JSONL ou CSV).')
+    parser.add_argument('entrada', help="Arquivo .jsonl ou .csv com o campo 'resumo' ('-' para stdin)")
+    parser.add_argument('--saida', default='-', help="Arquivo JSONL de resultados ('-' para stdout)")
+    parser.add_argument('--catalogo', default='supabase',
+                        help="'supabase' ou caminho de um script SQL com dados de exemplo")
+    parser.add_argument('--extracao-workers', type=int, default=8, help='Chamadas simultâneas ao LLM')
+    parser.add_argument('--validacao-workers', type=int, default=None, help='Processos de validação')
+    parser.add_argument('--campo-dados', default=None,
+                        help="Campo com dados já extraídos, ex: 'esperado.dados_extraidos'")
+    parser.add_argument('--incluir-dados', action='store_true', help='Inclui os dados extraídos na saída')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    catalog = load_catalog(args.catalogo)
+    bulk = BulkValidator(
+        catalog,
+        extraction_workers=args.extracao_workers,
+        validation_workers=args.validacao_workers,
+        data_field=args.campo_dados,
+        include_data=args.incluir_dados
+    )
+
+    output = sys.stdout if args.saida == '-' else open(args.saida, 'w', encoding='utf-8')
+    try:
+        report = bulk.run(iter_orders(args.entrada), output)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print(json.dumps(report, ensure_ascii=False, indent=2), file=sys.stderr)
+    return 0 if report['falhas'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
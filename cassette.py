@@ -0,0 +1,226 @@
+"""
+Módulo de gravação e reprodução (record/replay) das chamadas externas.
+
+Grava em disco os pares requisição/resposta feitos ao OpenAI e ao Supabase
+e permite reproduzi-los depois, sem rede e sem chaves, de forma determinística.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+MODE_OFF = 'off'
+MODE_RECORD = 'record'
+MODE_REPLAY = 'replay'
+
+LATENCY_ORIGINAL = 'original'
+LATENCY_ZERO = 'zero'
+
+
+class CassetteMissError(Exception):
+    """Requisição não encontrada no cassete durante a reprodução."""
+
+
+class CassetteReplayError(Exception):
+    """Erro gravado originalmente e reproduzido a partir do cassete."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        # Mesmo atributo dos erros HTTP do SDK do OpenAI (ex: 429 = limite de taxa)
+        self.status_code = status_code
+
+
+def replay_error(error: Dict[str, Any]) -> Exception:
+    """
+    Reconstrói um erro gravado como CassetteReplayError.
+
+    Args:
+        error: Dicionário com 'erro' (mensagem), 'erro_tipo' e 'erro_status'
+
+    Returns:
+        Exceção a ser lançada na reprodução
+    """
+    return CassetteReplayError(error['erro'], status_code=error.get('erro_status'))
+
+
+class Cassette:
+    """Grava ou reproduz chamadas externas em um arquivo JSONL."""
+
+    def __init__(self, mode: str = MODE_OFF, path: Optional[str] = None,
+                 replay_latency: str = LATENCY_ORIGINAL):
+        """
+        Inicializa o cassete.
+
+        Args:
+            mode: 'off', 'record' ou 'replay'
+            path: Caminho do arquivo JSONL do cassete
+            replay_latency: 'original' (reproduz a latência gravada) ou 'zero'
+        """
+        if mode not in (MODE_OFF, MODE_RECORD, MODE_REPLAY):
+            raise ValueError(f"Modo de cassete inválido: {mode}")
+        if mode != MODE_OFF and not path:
+            raise ValueError("Caminho do cassete é obrigatório nos modos record/replay")
+
+        self.mode = mode
+        self.path = path
+        self.replay_latency = replay_latency
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[Dict]] = {}
+        self._cursors: Dict[str, int] = {}
+
+        if mode == MODE_RECORD:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            logger.info(f"Cassete em modo gravação: {path}")
+        elif mode == MODE_REPLAY:
+            self._load()
+            logger.info(f"Cassete em modo reprodução: {path} ({self.size()} interações)")
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == MODE_RECORD
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == MODE_REPLAY
+
+    def size(self) -> int:
+        """Retorna o número de interações carregadas para reprodução."""
+        return sum(len(entries) for entries in self._entries.values())
+
+    def call(
+        self,
+        kind: str,
+        request: Dict[str, Any],
+        perform: Callable[[], Any],
+        serialize: Callable[[Any], Any] = lambda value: value,
+        deserialize: Callable[[Any], Any] = lambda value: value,
+        deserialize_error: Callable[[Dict[str, Any]], Exception] = replay_error
+    ) -> Any:
+        """
+        Executa (ou reproduz) uma chamada externa.
+
+        Args:
+            kind: Origem da chamada (ex: 'openai', 'supabase')
+            request: Parâmetros da chamada, usados como chave no cassete
+            perform: Função que executa a chamada real
+            serialize: Converte a resposta real para JSON
+            deserialize: Reconstrói a resposta a partir do JSON gravado
+            deserialize_error: Reconstrói o erro gravado (mensagem, tipo e
+                status HTTP), para que a reprodução siga o mesmo caminho da chamada real
+
+        Returns:
+            Resposta real ou reproduzida
+        """
+        if self.mode == MODE_OFF:
+            return perform()
+
+        key = self._request_key(kind, request)
+
+        if self.mode == MODE_REPLAY:
+            entry = self._replay(kind, key)
+            if 'erro' in entry:
+                raise deserialize_error(entry)
+            return deserialize(entry['resposta'])
+
+        start = time.perf_counter()
+        try:
+            response = perform()
+        except Exception as e:
+            self._record(kind, key, request, time.perf_counter() - start, error=e)
+            raise
+
+        self._record(kind, key, request, time.perf_counter() - start, response=serialize(response))
+        return response
+
+    def _replay(self, kind: str, key: str) -> Dict[str, Any]:
+        """
+        Busca a próxima interação gravada para a chave.
+
+        Requisições idênticas são servidas na ordem em que foram gravadas;
+        depois da última, a última resposta continua sendo repetida.
+        """
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                raise CassetteMissError(f"Requisição '{kind}' não encontrada no cassete {self.path}")
+            cursor = self._cursors.get(key, 0)
+            entry = entries[min(cursor, len(entries) - 1)]
+            self._cursors[key] = cursor + 1
+
+        if self.replay_latency == LATENCY_ORIGINAL:
+            time.sleep(entry.get('latencia', 0))
+
+        return entry
+
+    def _record(self, kind: str, key: str, request: Dict[str, Any], latency: float,
+                response: Any = None, error: Optional[Exception] = None):
+        """Acrescenta uma interação ao arquivo do cassete."""
+        entry = {
+            'tipo': kind,
+            'chave': key,
+            'requisicao': request,
+            'latencia': round(latency, 6),
+            'gravado_em': time.time()
+        }
+        if error is not None:
+            entry['erro'] = str(error)
+            entry['erro_tipo'] = type(error).__name__
+            status = getattr(error, 'status_code', None)
+            if isinstance(status, int):
+                entry['erro_status'] = status
+        else:
+            entry['resposta'] = response
+
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+
+    def _load(self):
+        """Carrega as interações gravadas do arquivo do cassete."""
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                entry = json.loads(line)
+                self._entries.setdefault(entry['chave'], []).append(entry)
+
+    @staticmethod
+    def _request_key(kind: str, request: Dict[str, Any]) -> str:
+        """Gera a chave determinística de uma requisição."""
+        payload = json.dumps({'tipo': kind, 'requisicao': request},
+                             sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+_default_cassette: Optional[Cassette] = None
+_default_lock = threading.Lock()
+
+
+def get_cassette() -> Cassette:
+    """
+    Retorna o cassete configurado via variáveis de ambiente.
+
+    Returns:
+        Instância compartilhada de Cassette
+    """
+    global _default_cassette
+
+    with _default_lock:
+        if _default_cassette is None:
+            _default_cassette = Cassette(
+                mode=Config.CASSETTE_MODE,
+                path=Config.CASSETTE_PATH,
+                replay_latency=Config.CASSETTE_REPLAY_LATENCY
+            )
+        return _default_cassette
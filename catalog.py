@@ -0,0 +1,464 @@
+"""
+Módulo de snapshots versionados e imutáveis do cardápio.
+
+Cada snapshot é uma cópia completa das tabelas do cardápio com índices de busca
+prontos. O snapshot vigente é trocado atomicamente a cada atualização, de modo que
+as leituras nunca bloqueiam, e um histórico limitado permite validar um pedido
+contra a tabela de preços vigente quando o bot fez a cotação.
+"""
+
+import hashlib
+import json
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+from catalog_persistence import SnapshotFile
+from text_normalization import normalize_text
+
+logger = logging.getLogger(__name__)
+
+CatalogTables = Dict[str, List[Dict]]
+
+GLOBAL_PARTITION = '*'
+
+
+class CatalogSnapshot:
+    """Cópia imutável do cardápio em uma versão, com índices de busca."""
+
+    def __init__(self, tables: CatalogTables, loaded_at: Optional[float] = None,
+                 checksum: Optional[str] = None):
+        """
+        Constrói o snapshot e seus índices.
+
+        As linhas são copiadas; quem recebe uma linha de um snapshot não deve modificá-la.
+
+        Args:
+            tables: Dicionário {tabela: linhas disponíveis}
+            loaded_at: Momento (epoch) em que o snapshot passou a vigorar
+            checksum: Hash do conteúdo, se já calculado
+        """
+        self.loaded_at = loaded_at if loaded_at is not None else time.time()
+        self.checksum = checksum or self.compute_checksum(tables)
+        self.tables: Dict[str, Tuple[Dict, ...]] = {
+            table: tuple(dict(row) for row in rows) for table, rows in tables.items()
+        }
+
+        # Em um cardápio de unidade, a linha da unidade prevalece sobre a compartilhada
+        self._products: Dict[Tuple[str, str, str], Dict] = {}
+        for row in self.tables.get('produtos', ()):
+            key = (normalize_text(row.get('nome')), normalize_text(row.get('tamanho')),
+                   normalize_text(row.get('tipo_produto')))
+            self._index_row(self._products, key, row)
+
+        self._neighborhoods: Dict[str, Dict] = {}
+        for row in self.tables.get('bairros', ()):
+            self._index_row(self._neighborhoods, normalize_text(row.get('nome')), row)
+
+        self._additionals: Dict[str, List[Dict]] = {}
+        for row in self.tables.get('adicionais', ()):
+            self._additionals.setdefault(normalize_text(row.get('nome')), []).append(row)
+        for rows in self._additionals.values():
+            rows.sort(key=lambda row: row.get('unidade') is None)
+
+        self.size_bytes = self._estimate_size()
+
+    @staticmethod
+    def _index_row(index: Dict, key, row: Dict):
+        """Indexa a linha, trocando uma compartilhada (unidade nula) pela de uma unidade."""
+        current = index.get(key)
+        if current is None or (current.get('unidade') is None and row.get('unidade') is not None):
+            index[key] = row
+
+    @property
+    def version(self) -> str:
+        """
+        Versão do cardápio: o checksum do conteúdo.
+
+        É a mesma em todos os workers e após reinícios, então pode ser
+        devolvida ao cliente e usada depois para fixar a tabela de preços.
+        """
+        return self.checksum
+
+    def _estimate_size(self) -> int:
+        """Estima a memória ocupada pelas linhas e índices (aproximação por sys.getsizeof)."""
+        size = 0
+        for rows in self.tables.values():
+            size += sys.getsizeof(rows)
+            for row in rows:
+                size += sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row.values())
+        for index in (self._products, self._neighborhoods, self._additionals):
+            size += sys.getsizeof(index) + sum(sys.getsizeof(key) for key in index)
+        return size
+
+    @staticmethod
+    def compute_checksum(tables: CatalogTables) -> str:
+        """Calcula um hash do conteúdo das tabelas, independente da ordem das chaves."""
+        payload = json.dumps(tables, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+    def find_product(self, nome: str, tamanho: str, tipo_produto: str) -> Optional[Dict]:
+        """Busca um produto pelo nome, tamanho e tipo."""
+        return self._products.get((normalize_text(nome), normalize_text(tamanho), normalize_text(tipo_produto)))
+
+    def find_neighborhood(self, bairro: str) -> Optional[Dict]:
+        """Busca um bairro pelo nome."""
+        return self._neighborhoods.get(normalize_text(bairro))
+
+    def find_additional(self, nome: str, tamanho: str = None) -> Optional[Dict]:
+        """Busca um adicional pelo nome e tamanho (opcional)."""
+        for row in self._additionals.get(normalize_text(nome), ()):
+            if tamanho is None or normalize_text(row.get('tamanho', '')) == normalize_text(tamanho):
+                return row
+        return None
+
+    def describe(self) -> Dict:
+        """Retorna os metadados do snapshot."""
+        return {
+            'versao': self.version,
+            'checksum': self.checksum,
+            'vigente_desde': self.loaded_at,
+            'bytes_estimados': self.size_bytes,
+            'linhas': {table: len(rows) for table, rows in self.tables.items()}
+        }
+
+
+class CatalogStore:
+    """
+    Mantém o snapshot vigente do cardápio e um histórico limitado de versões.
+
+    Leituras não usam lock: o histórico é uma tupla substituída por inteiro
+    a cada atualização, e o snapshot vigente é sempre o último elemento.
+
+    Com um arquivo local configurado, cada carga bem-sucedida é gravada nele;
+    a primeira leitura usa o arquivo (atualizando do Supabase em segundo plano)
+    e, se o Supabase estiver fora do ar, o arquivo segue como fallback somente
+    leitura com o indicador 'stale' ligado.
+    """
+
+    def __init__(self, loader: Callable[[], CatalogTables], history_size: int = 20,
+                 refresh_interval: float = 60.0,
+                 on_publish: Optional[Callable[[CatalogSnapshot], None]] = None,
+                 snapshot_file: Optional[SnapshotFile] = None, partition: str = GLOBAL_PARTITION):
+        """
+        Inicializa o repositório de snapshots.
+
+        Args:
+            loader: Função que carrega as tabelas do cardápio
+            history_size: Número máximo de versões mantidas
+            refresh_interval: Idade (segundos) a partir da qual o snapshot é atualizado
+                em segundo plano; 0 desativa a atualização automática
+            on_publish: Função chamada a cada nova versão publicada
+            snapshot_file: Arquivo local para persistir e recuperar o cardápio (opcional)
+            partition: Chave da partição no arquivo local
+        """
+        self.loader = loader
+        self.on_publish = on_publish
+        self.snapshot_file = snapshot_file
+        self.partition = partition
+        self.stale = False
+        self.last_success_at: Optional[float] = None
+        self._saved_checksum: Optional[str] = None
+        self.history_size = max(1, history_size)
+        self.refresh_interval = refresh_interval
+        self._history: Tuple[CatalogSnapshot, ...] = ()
+        self._refresh_lock = threading.Lock()
+        self._publish_lock = threading.Lock()
+        self._checked_at = 0.0
+
+    def current(self) -> Optional[CatalogSnapshot]:
+        """
+        Retorna o snapshot vigente.
+
+        Apenas a primeira carga é síncrona; depois disso, um snapshot vencido
+        continua sendo servido enquanto a atualização roda em segundo plano.
+
+        Returns:
+            Snapshot vigente ou None se o cardápio nunca pôde ser carregado
+        """
+        history = self._history
+        if not history:
+            return self._initial_load()
+
+        if self.refresh_interval and time.time() - self._checked_at > self.refresh_interval:
+            self.refresh_async()
+
+        return history[-1]
+
+    @property
+    def loaded(self) -> bool:
+        """Indica se alguma versão já foi carregada."""
+        return bool(self._history)
+
+    def get(self, version: str) -> Optional[CatalogSnapshot]:
+        """
+        Retorna uma versão específica do histórico.
+
+        Args:
+            version: Versão (checksum do conteúdo)
+
+        Returns:
+            Snapshot ou None se a versão não estiver mais no histórico
+        """
+        for snapshot in reversed(self._history):
+            if snapshot.version == version:
+                return snapshot
+        return None
+
+    def at(self, timestamp: float) -> Optional[CatalogSnapshot]:
+        """
+        Retorna o snapshot vigente em um instante do passado.
+
+        Args:
+            timestamp: Momento (epoch) da cotação
+
+        Returns:
+            Snapshot vigente naquele instante ou None se for anterior ao histórico
+        """
+        for snapshot in reversed(self._history):
+            if snapshot.loaded_at <= timestamp:
+                return snapshot
+        return None
+
+    def versions(self) -> List[Dict]:
+        """Lista os metadados das versões no histórico."""
+        return [snapshot.describe() for snapshot in self._history]
+
+    def memory_usage(self) -> int:
+        """Retorna a memória estimada (bytes) das versões mantidas."""
+        return sum(snapshot.size_bytes for snapshot in self._history)
+
+    def refresh(self) -> Optional[CatalogSnapshot]:
+        """
+        Carrega o cardápio e publica uma nova versão se o conteúdo mudou.
+
+        Returns:
+            Snapshot vigente após a atualização
+        """
+        with self._refresh_lock:
+            return self._load_and_publish()
+
+    def status(self) -> Dict:
+        """Retorna se o cardápio servido pode estar desatualizado e a última carga do Supabase."""
+        return {
+            'desatualizado': self.stale,
+            'ultima_atualizacao': self.last_success_at
+        }
+
+    def load_local(self) -> Optional[CatalogSnapshot]:
+        """
+        Publica o snapshot gravado no arquivo local, se ainda não houver nenhum carregado.
+
+        Returns:
+            Snapshot vigente ou None se não houver arquivo ou snapshot gravado
+        """
+        history = self._history
+        if history or self.snapshot_file is None:
+            return history[-1] if history else None
+
+        saved = self.snapshot_file.load(self.partition)
+        if saved is None:
+            return None
+
+        tables, loaded_at = saved
+        snapshot = self.publish(tables, loaded_at)
+        self._saved_checksum = snapshot.checksum
+        # Até a próxima carga do Supabase, o cardápio pode estar desatualizado
+        self.stale = True
+        logger.info(f"Cardápio '{self.partition}' carregado do arquivo local ({snapshot.checksum})")
+        return snapshot
+
+    def _initial_load(self) -> Optional[CatalogSnapshot]:
+        """
+        Primeira carga: requisições concorrentes esperam uma única leitura.
+
+        Havendo snapshot no arquivo local, ele é servido na hora e o Supabase
+        é consultado em segundo plano.
+        """
+        with self._refresh_lock:
+            history = self._history
+            if history:
+                return history[-1]
+            snapshot = self.load_local()
+            if snapshot is None:
+                return self._load_and_publish()
+
+        self.refresh_async()
+        return snapshot
+
+    def _load_and_publish(self) -> Optional[CatalogSnapshot]:
+        """Carrega e publica o cardápio (chamado com o lock de atualização)."""
+        try:
+            tables = self.loader()
+        except Exception as e:
+            logger.error(f"Erro ao atualizar cardápio: {e}")
+            self.stale = True
+            return self.load_local()
+
+        now = time.time()
+        self._checked_at = now
+        snapshot = self.publish(tables)
+        self.stale = False
+        self.last_success_at = now
+
+        if self.snapshot_file is not None and snapshot.checksum != self._saved_checksum:
+            self.snapshot_file.save(self.partition, tables, snapshot.checksum, snapshot.loaded_at)
+            self._saved_checksum = snapshot.checksum
+        return snapshot
+
+    def refresh_async(self) -> bool:
+        """
+        Dispara uma atualização em segundo plano, se nenhuma estiver em andamento.
+
+        Returns:
+            True se a atualização foi disparada
+        """
+        if self._refresh_lock.locked():
+            return False
+        # Evita disparar várias threads enquanto a primeira ainda não pegou o lock
+        self._checked_at = time.time()
+        threading.Thread(target=self.refresh, name='catalog-refresh', daemon=True).start()
+        return True
+
+    def publish(self, tables: CatalogTables, loaded_at: Optional[float] = None) -> CatalogSnapshot:
+        """
+        Publica um conjunto de tabelas como nova versão (troca atômica).
+
+        Args:
+            tables: Dicionário {tabela: linhas}
+            loaded_at: Momento de vigência (padrão: agora)
+
+        Returns:
+            Snapshot vigente
+        """
+        checksum = CatalogSnapshot.compute_checksum(tables)
+
+        with self._publish_lock:
+            history = self._history
+            if history and history[-1].checksum == checksum:
+                return history[-1]
+
+            snapshot = CatalogSnapshot(tables, loaded_at, checksum)
+            self._history = (history + (snapshot,))[-self.history_size:]
+
+        logger.info(f"Cardápio atualizado para a versão {snapshot.version}")
+        if self.on_publish:
+            self.on_publish(snapshot)
+        return snapshot
+
+
+class UnitCatalogRegistry:
+    """
+    Mantém um CatalogStore por unidade, carregado sob demanda.
+
+    As unidades ficam em uma LRU limitada pela memória estimada dos snapshots;
+    ao passar do limite, as unidades usadas há mais tempo são descartadas
+    (validações em andamento continuam com a referência ao snapshot que já pegaram).
+    """
+
+    def __init__(self, loader: Callable[[Optional[str]], CatalogTables], max_bytes: int = 64 * 1024 * 1024,
+                 history_size: int = 20, refresh_interval: float = 60.0,
+                 snapshot_file: Optional[SnapshotFile] = None):
+        """
+        Inicializa o registro de cardápios por unidade.
+
+        Args:
+            loader: Função que carrega as tabelas de uma unidade (None = cardápio completo)
+            max_bytes: Memória máxima estimada para todos os snapshots
+            history_size: Versões mantidas por unidade
+            refresh_interval: Intervalo de atualização de cada unidade (segundos)
+            snapshot_file: Arquivo local compartilhado pelas unidades (opcional)
+        """
+        self.loader = loader
+        self.max_bytes = max_bytes
+        self.history_size = history_size
+        self.refresh_interval = refresh_interval
+        self.snapshot_file = snapshot_file
+        self._stores: 'OrderedDict[str, CatalogStore]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def store(self, unidade: Optional[str] = None) -> CatalogStore:
+        """
+        Retorna o repositório de snapshots de uma unidade, criando-o se necessário.
+
+        Args:
+            unidade: Nome canônico da unidade (None = cardápio completo)
+
+        Returns:
+            CatalogStore da unidade
+        """
+        key = unidade or GLOBAL_PARTITION
+
+        with self._lock:
+            store = self._stores.get(key)
+            if store is not None:
+                self._stores.move_to_end(key)
+                return store
+
+            store = CatalogStore(
+                lambda: self.loader(unidade),
+                history_size=self.history_size,
+                refresh_interval=self.refresh_interval,
+                on_publish=lambda snapshot: self._enforce_limit(key),
+                snapshot_file=self.snapshot_file,
+                partition=key
+            )
+            self._stores[key] = store
+            return store
+
+    def prefetch(self, unidades: List[str]):
+        """
+        Carrega em segundo plano os cardápios das unidades ainda não carregadas.
+
+        Args:
+            unidades: Nomes canônicos das unidades
+        """
+        for unidade in unidades:
+            store = self.store(unidade)
+            if not store.loaded:
+                store.refresh_async()
+
+    def memory_usage(self) -> int:
+        """Retorna a memória estimada (bytes) de todos os snapshots mantidos."""
+        with self._lock:
+            stores = list(self._stores.values())
+        return sum(store.memory_usage() for store in stores)
+
+    def describe(self) -> Dict:
+        """Retorna o estado do registro (unidades carregadas e memória)."""
+        with self._lock:
+            stores = list(self._stores.items())
+        return {
+            'unidades': {
+                key: {'versoes': len(store.versions()), 'bytes_estimados': store.memory_usage(),
+                      'desatualizado': store.stale}
+                for key, store in stores
+            },
+            'bytes_estimados': sum(store.memory_usage() for _, store in stores),
+            'limite_bytes': self.max_bytes,
+            'descartes': self.evictions
+        }
+
+    def _enforce_limit(self, published: Optional[str] = None):
+        """
+        Descarta as unidades menos usadas até caber no limite de memória.
+
+        Args:
+            published: Unidade que acabou de publicar uma versão (nunca é descartada)
+        """
+        with self._lock:
+            sizes = {key: store.memory_usage() for key, store in self._stores.items()}
+            total = sum(sizes.values())
+            # A unidade usada mais recentemente e a recém-publicada (ex: pré-carga) nunca são descartadas
+            for key in list(self._stores.keys())[:-1]:
+                if total <= self.max_bytes:
+                    break
+                if key == published:
+                    continue
+                total -= sizes[key]
+                del self._stores[key]
+                self.evictions += 1
+                logger.info(f"Cardápio da unidade '{key}' descartado da memória (LRU)")
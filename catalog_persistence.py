@@ -0,0 +1,113 @@
+"""
+Módulo de persistência local dos snapshots do cardápio.
+
+Cada atualização bem-sucedida do cardápio é gravada em um arquivo SQLite.
+Na inicialização, os workers carregam o cardápio desse arquivo em
+milissegundos, e ele serve de fallback somente leitura quando o Supabase
+está fora do ar.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CatalogTables = Dict[str, List[Dict]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cardapio_snapshots (
+    particao TEXT PRIMARY KEY,
+    checksum TEXT NOT NULL,
+    carregado_em REAL NOT NULL,
+    salvo_em REAL NOT NULL,
+    tabelas TEXT NOT NULL
+)
+"""
+
+
+class SnapshotFile:
+    """Arquivo SQLite com o último snapshot de cada partição do cardápio."""
+
+    def __init__(self, path: str, timeout: float = 5.0):
+        """
+        Inicializa o arquivo, criando a tabela se necessário.
+
+        Args:
+            path: Caminho do arquivo SQLite
+            timeout: Espera máxima por lock de outro processo (segundos)
+        """
+        self.path = path
+        self.timeout = timeout
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            # WAL permite que os outros workers leiam enquanto um grava
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(_SCHEMA)
+
+    def save(self, partition: str, tables: CatalogTables, checksum: str, loaded_at: float):
+        """
+        Grava o snapshot de uma partição, substituindo o anterior.
+
+        Args:
+            partition: Chave da partição ('*' = cardápio completo, ou a unidade)
+            tables: Dicionário {tabela: linhas}
+            checksum: Hash do conteúdo
+            loaded_at: Momento em que o cardápio foi carregado do Supabase
+        """
+        payload = json.dumps(tables, ensure_ascii=False, default=str)
+        try:
+            with self._lock, closing(self._connect()) as conn, conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO cardapio_snapshots '
+                    '(particao, checksum, carregado_em, salvo_em, tabelas) VALUES (?, ?, ?, ?, ?)',
+                    (partition, checksum, loaded_at, time.time(), payload)
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Erro ao gravar snapshot local do cardápio ({partition}): {e}")
+
+    def load(self, partition: str) -> Optional[Tuple[CatalogTables, float]]:
+        """
+        Lê o último snapshot gravado de uma partição.
+
+        Args:
+            partition: Chave da partição
+
+        Returns:
+            Tupla (tabelas, momento da carga original) ou None se não houver
+        """
+        try:
+            with closing(self._connect()) as conn:
+                row = conn.execute(
+                    'SELECT tabelas, carregado_em FROM cardapio_snapshots WHERE particao = ?',
+                    (partition,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Erro ao ler snapshot local do cardápio ({partition}): {e}")
+            return None
+
+        if row is None:
+            return None
+        try:
+            return json.loads(row[0]), row[1]
+        except ValueError as e:
+            logger.error(f"Snapshot local do cardápio corrompido ({partition}): {e}")
+            return None
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Abre uma conexão com o arquivo.
+
+        Usar com contextlib.closing: o 'with' da própria conexão só faz commit
+        ou rollback, sem fechá-la.
+        """
+        return sqlite3.connect(self.path, timeout=self.timeout)
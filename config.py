@@ -15,10 +15,66 @@ class Config:
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
     OPENAI_MODEL = 'gpt-4.1-mini'
     
+    # Extração em partes paralelas para resumos com muitos produtos (0 desativa)
+    EXTRACTION_CHUNK_THRESHOLD = int(os.getenv('EXTRACTION_CHUNK_THRESHOLD', 12))
+    EXTRACTION_CHUNK_SIZE = int(os.getenv('EXTRACTION_CHUNK_SIZE', 8))
+    EXTRACTION_CHUNK_WORKERS = int(os.getenv('EXTRACTION_CHUNK_WORKERS', 4))
+    
+    # Agrupamento de extrações em micro-lotes (uma chamada por janela)
+    EXTRACTION_BATCH_ENABLED = os.getenv('EXTRACTION_BATCH_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    EXTRACTION_BATCH_WINDOW_MS = float(os.getenv('EXTRACTION_BATCH_WINDOW_MS', 100))
+    EXTRACTION_BATCH_MAX_SIZE = int(os.getenv('EXTRACTION_BATCH_MAX_SIZE', 8))
+    EXTRACTION_BATCH_CONCURRENCY = int(os.getenv('EXTRACTION_BATCH_CONCURRENCY', 4))
+    
+    # Preços por 1 milhão de tokens (USD), usados para estimar custo
+    OPENAI_PRICING = {
+        'gpt-4.1-mini': {'entrada': 0.40, 'entrada_cache': 0.10, 'saida': 1.60},
+        'gpt-4.1-nano': {'entrada': 0.10, 'entrada_cache': 0.025, 'saida': 0.40},
+        'gpt-4.1': {'entrada': 2.00, 'entrada_cache': 0.50, 'saida': 8.00},
+        'gpt-4o-mini': {'entrada': 0.15, 'entrada_cache': 0.075, 'saida': 0.60},
+    }
+    
+    # Contabilização de uso do LLM
+    USAGE_AUDIT_PATH = os.getenv('USAGE_AUDIT_PATH', '')
+    USAGE_OUTLIER_STDDEVS = float(os.getenv('USAGE_OUTLIER_STDDEVS', 3))
+    USAGE_OUTLIER_MIN_SAMPLES = int(os.getenv('USAGE_OUTLIER_MIN_SAMPLES', 30))
+    USAGE_MAX_TOKENS_ALERT = int(os.getenv('USAGE_MAX_TOKENS_ALERT', 0))
+    
     # Supabase
     SUPABASE_URL = os.getenv('SUPABASE_URL')
     SUPABASE_KEY = os.getenv('SUPABASE_KEY')
     
+    # Snapshots do cardápio
+    CATALOG_REFRESH_SECONDS = float(os.getenv('CATALOG_REFRESH_SECONDS', 60))
+    CATALOG_HISTORY_SIZE = int(os.getenv('CATALOG_HISTORY_SIZE', 20))
+    CATALOG_PARTITION_BY_UNIT = os.getenv('CATALOG_PARTITION_BY_UNIT', 'false').lower() in ('1', 'true', 'yes')
+    CATALOG_MAX_MEMORY_MB = float(os.getenv('CATALOG_MAX_MEMORY_MB', 64))
+    CATALOG_PREFETCH_SECONDS = float(os.getenv('CATALOG_PREFETCH_SECONDS', 300))
+    # Arquivo SQLite local do cardápio (partida rápida e fallback; vazio desativa)
+    CATALOG_SNAPSHOT_PATH = os.getenv('CATALOG_SNAPSHOT_PATH', 'cache/cardapio.sqlite3')
+    TIMEZONE = os.getenv('TIMEZONE', 'America/Sao_Paulo')
+    
+    # Normalização de texto das buscas no cardápio
+    NORMALIZATION_SYNONYMS_PATH = os.getenv('NORMALIZATION_SYNONYMS_PATH', '')
+    NORMALIZATION_CACHE_SIZE = int(os.getenv('NORMALIZATION_CACHE_SIZE', 65536))
+    
+    # Cache de resultados de validação (pedido + versão do cardápio; 0 desativa)
+    VALIDATION_CACHE_SIZE = int(os.getenv('VALIDATION_CACHE_SIZE', 5000))
+    
+    # Re-extração incremental de resumos revisados na mesma conversa
+    INCREMENTAL_EXTRACTION = os.getenv('INCREMENTAL_EXTRACTION', 'false').lower() in ('1', 'true', 'yes')
+    CONVERSATION_TTL_SECONDS = float(os.getenv('CONVERSATION_TTL_SECONDS', 900))
+    CONVERSATION_CACHE_SIZE = int(os.getenv('CONVERSATION_CACHE_SIZE', 10000))
+    
+    # Gravação/reprodução de chamadas externas (off, record, replay)
+    CASSETTE_MODE = os.getenv('CASSETTE_MODE', 'off')
+    CASSETTE_PATH = os.getenv('CASSETTE_PATH', 'cassettes/default.jsonl')
+    CASSETTE_REPLAY_LATENCY = os.getenv('CASSETTE_REPLAY_LATENCY', 'original')
+    
+    # Compressão das respostas (gzip, ou br se o pacote brotli estiver instalado)
+    RESPONSE_COMPRESSION = os.getenv('RESPONSE_COMPRESSION', 'true').lower() in ('1', 'true', 'yes')
+    RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv('RESPONSE_COMPRESSION_MIN_BYTES', 1024))
+    
     # Server
     PORT = int(os.getenv('PORT', 5000))
     HOST = os.getenv('HOST', '0.0.0.0')
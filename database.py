@@ -3,99 +3,458 @@ Módulo para integração com Supabase e validação de dados contra o banco.
 """
 
 import logging
-from typing import Dict, List, Optional, Tuple
-from supabase import create_client, Client
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, time as dt_time
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
 from config import Config
+from cassette import Cassette, get_cassette
+from catalog import CatalogSnapshot, CatalogStore, UnitCatalogRegistry, normalize_text
+from catalog_persistence import SnapshotFile
+
+if TYPE_CHECKING:
+    # O SDK do Supabase é importado só na primeira conexão
+    from supabase import Client
 
 logger = logging.getLogger(__name__)
 
+CATALOG_TABLES = ('produtos', 'bairros', 'adicionais')
+
+# Partição do arquivo local que guarda a tabela de unidades
+UNITS_PARTITION = '#unidades'
+
+# Partição com só as linhas compartilhadas (unidade nula), usada com o cardápio
+# particionado para pedidos sem unidade ou de unidade não cadastrada
+SHARED_PARTITION = '#compartilhado'
+
+# Intervalo mínimo entre tentativas de conexão após uma falha (segundos)
+CONNECT_RETRY_SECONDS = 30.0
+
+# Códigos de erro do PostgREST para tabela inexistente (a tabela unidades é opcional)
+MISSING_TABLE_CODES = ('42P01', 'PGRST205')
+
 
 class SupabaseClient:
     """Cliente para integração com Supabase."""
     
-    def __init__(self):
-        """Inicializa o cliente Supabase."""
+    def __init__(self, cassette: Optional[Cassette] = None):
+        """
+        Inicializa o cliente Supabase.
+        
+        A conexão é feita no primeiro uso (ou por warm_start), fora do import da aplicação.
+        
+        Args:
+            cassette: Cassete de gravação/reprodução (padrão: configurado via ambiente)
+        """
+        self.cassette = cassette or get_cassette()
+        self._client: Optional['Client'] = None
+        self._client_lock = threading.Lock()
+        self._connect_attempted_at: Optional[float] = None
+        # Na reprodução não há conexão e o cardápio vem só do cassete
+        self._connect_enabled = not self.cassette.replaying
+        self._init_catalog(
+            Config.CATALOG_HISTORY_SIZE,
+            Config.CATALOG_REFRESH_SECONDS,
+            Config.CATALOG_SNAPSHOT_PATH if self._connect_enabled else None
+        )
+        
+        if not self._connect_enabled:
+            logger.info("Supabase em modo reprodução (sem conexão)")
+    
+    @property
+    def client(self) -> Optional['Client']:
+        """Cliente Supabase, criado no primeiro uso (None se a conexão falhou)."""
+        if self._client is None and self._connect_enabled:
+            self.connect()
+        return self._client
+    
+    def connect(self) -> bool:
+        """
+        Cria o cliente Supabase, se ainda não existir.
+        
+        Após uma falha, nova tentativa só depois de CONNECT_RETRY_SECONDS.
+        
+        Returns:
+            True se o cliente está conectado (ou se não precisa de conexão, como na reprodução)
+        """
+        if self._client is not None or not self._connect_enabled:
+            return True
+        
+        with self._client_lock:
+            if self._client is not None:
+                return True
+            now = time.time()
+            if self._connect_attempted_at is not None and now - self._connect_attempted_at < CONNECT_RETRY_SECONDS:
+                return False
+            self._connect_attempted_at = now
+            
+            try:
+                from supabase import create_client
+                self._client = create_client(
+                    Config.SUPABASE_URL,
+                    Config.SUPABASE_KEY
+                )
+                logger.info("Conectado ao Supabase com sucesso")
+            except Exception as e:
+                logger.error(f"Erro ao conectar ao Supabase: {e}")
+                return False
+        return True
+    
+    def client_ready(self) -> bool:
+        """
+        Indica se o cliente Supabase já foi criado, sem bloquear.
+        
+        Se ainda não foi, dispara a conexão em segundo plano (a menos que uma
+        tentativa já esteja em andamento).
+        
+        Returns:
+            True se o cliente está conectado (ou se não precisa de conexão)
+        """
+        if self._client is not None or not self._connect_enabled:
+            return True
+        if not self._client_lock.locked():
+            threading.Thread(target=self.connect, name='supabase-connect', daemon=True).start()
+        return False
+    
+    def _init_catalog(self, history_size: int, refresh_interval: float,
+                      snapshot_path: Optional[str] = None):
+        """
+        Prepara o cardápio em memória (particionado por unidade, se configurado).
+        
+        Args:
+            history_size: Versões mantidas por partição
+            refresh_interval: Intervalo de atualização em segundo plano (segundos)
+            snapshot_path: Arquivo SQLite local do cardápio (None ou vazio desativa)
+        """
+        self.snapshot_file = None
+        if snapshot_path:
+            try:
+                self.snapshot_file = SnapshotFile(snapshot_path)
+            except (OSError, sqlite3.Error) as e:
+                logger.error(f"Arquivo local do cardápio indisponível ({snapshot_path}): {e}")
+        
+        self.partition_by_unit = Config.CATALOG_PARTITION_BY_UNIT
+        self.catalog_registry = UnitCatalogRegistry(
+            self.fetch_catalog,
+            max_bytes=int(Config.CATALOG_MAX_MEMORY_MB * 1024 * 1024),
+            history_size=history_size,
+            refresh_interval=refresh_interval,
+            snapshot_file=self.snapshot_file
+        )
+        self.units_store = CatalogStore(
+            self._fetch_units,
+            history_size=1,
+            refresh_interval=refresh_interval,
+            snapshot_file=self.snapshot_file,
+            partition=UNITS_PARTITION
+        )
+        self._prefetched_at = 0.0
+    
+    def _startup_stores(self) -> List[CatalogStore]:
+        """
+        Repositórios necessários para atender o primeiro pedido.
+        
+        Com partição por unidade, basta a tabela de unidades (cada cardápio é
+        carregado no primeiro pedido da unidade); sem partição, o cardápio completo.
+        """
+        if self.partition_by_unit:
+            return [self.units_store]
+        return [self.catalog_store]
+    
+    def warm_start(self):
+        """
+        Prepara o worker sem bloquear: carrega do arquivo local os repositórios
+        de _startup_stores e dispara a conexão e a carga do Supabase em segundo plano.
+        """
+        if not self._connect_enabled:
+            return
+        
+        for store in self._startup_stores():
+            store.load_local()
+            store.refresh_async()
+    
+    def catalog_ready(self) -> bool:
+        """
+        Indica se o cardápio já está em memória (do Supabase ou do arquivo local).
+        
+        Não bloqueia: se algum repositório ainda não foi carregado, dispara a carga em segundo plano.
+        
+        Returns:
+            True se o primeiro pedido pode ser validado sem esperar o Supabase
+        """
+        ready = True
+        for store in self._startup_stores():
+            if not store.loaded:
+                store.refresh_async()
+                ready = False
+        return ready
+    
+    def catalog_status(self, unidade: Optional[str] = None) -> Dict:
+        """
+        Indica se o cardápio de uma unidade está sendo servido do arquivo local
+        sem confirmação recente do Supabase.
+        
+        Args:
+            unidade: Unidade (None = cardápio completo)
+            
+        Returns:
+            Dicionário com 'desatualizado' e 'ultima_atualizacao' (epoch ou None)
+        """
+        return self.catalog_registry.store(self.resolve_unit(unidade)).status()
+    
+    @property
+    def catalog_store(self) -> CatalogStore:
+        """
+        Repositório de snapshots usado sem unidade: o cardápio completo ou,
+        com partição por unidade, só as linhas compartilhadas.
+        """
+        return self.catalog_registry.store(self.resolve_unit(None))
+    
+    def snapshot(self, version: Optional[str] = None, at: Optional[float] = None,
+                 unidade: Optional[str] = None) -> Optional[CatalogSnapshot]:
+        """
+        Retorna um snapshot imutável do cardápio.
+        
+        Args:
+            version: Versão específica do histórico, o checksum do conteúdo (opcional)
+            at: Instante (epoch) cuja tabela de preços deve ser usada (opcional)
+            unidade: Unidade do pedido, usada quando o cardápio é particionado
+            
+        Returns:
+            Snapshot solicitado, o vigente, ou None se indisponível
+        """
+        store = self.catalog_registry.store(self.resolve_unit(unidade))
+        self._maybe_prefetch_open_units()
+        
+        if version is not None:
+            return store.get(version)
+        if at is not None:
+            return store.at(at)
+        return store.current()
+    
+    def catalog_versions(self, unidade: Optional[str] = None) -> List[Dict]:
+        """
+        Lista as versões do cardápio mantidas em memória para uma unidade.
+        
+        Args:
+            unidade: Unidade (None = cardápio completo)
+            
+        Returns:
+            Lista de metadados das versões
+        """
+        return self.catalog_registry.store(self.resolve_unit(unidade)).versions()
+    
+    def resolve_unit(self, unidade: Optional[str]) -> Optional[str]:
+        """
+        Converte o nome de unidade extraído do resumo no nome cadastrado.
+        
+        Com partição por unidade, pedidos sem unidade ou de unidade não
+        cadastrada usam só as linhas compartilhadas: as linhas de outra unidade
+        poderiam trazer o preço ou a taxa daquela loja.
+        
+        Args:
+            unidade: Nome da unidade como veio do pedido
+            
+        Returns:
+            Nome canônico da partição, SHARED_PARTITION, ou None (sem partição)
+            para usar o cardápio completo
+        """
+        if not self.partition_by_unit:
+            return None
+        if not unidade:
+            return SHARED_PARTITION
+        
+        row = self._units_by_name().get(normalize_text(unidade))
+        if row is None:
+            logger.warning(f"Unidade '{unidade}' não cadastrada; usando só o cardápio compartilhado")
+            return SHARED_PARTITION
+        return row['nome']
+    
+    def open_units(self, now: Optional[datetime] = None) -> List[str]:
+        """
+        Lista as unidades abertas no momento, segundo o horário cadastrado.
+        
+        Args:
+            now: Momento de referência (padrão: agora, no fuso configurado)
+            
+        Returns:
+            Nomes das unidades abertas
+        """
+        now = now or datetime.now(ZoneInfo(Config.TIMEZONE))
+        current = now.time()
+        result = []
+        
+        for row in self._units_by_name().values():
+            opens = self._parse_time(row.get('horario_abertura'))
+            closes = self._parse_time(row.get('horario_fechamento'))
+            if opens is None or closes is None:
+                continue
+            if opens <= closes:
+                is_open = opens <= current < closes
+            else:
+                # Expediente que passa da meia-noite
+                is_open = current >= opens or current < closes
+            if is_open:
+                result.append(row['nome'])
+        
+        return result
+    
+    def prefetch_open_units(self):
+        """Carrega em segundo plano os cardápios das unidades abertas agora."""
+        units = self.open_units()
+        if units:
+            logger.info(f"Pré-carregando cardápio de {len(units)} unidade(s) aberta(s)")
+            self.catalog_registry.prefetch(units)
+    
+    def _maybe_prefetch_open_units(self):
+        """Dispara o pré-carregamento periodicamente, sem bloquear a requisição."""
+        if not self.partition_by_unit:
+            return
+        now = time.time()
+        if now - self._prefetched_at < Config.CATALOG_PREFETCH_SECONDS:
+            return
+        self._prefetched_at = now
+        threading.Thread(target=self.prefetch_open_units, name='catalog-prefetch', daemon=True).start()
+    
+    def _units_by_name(self) -> Dict[str, Dict]:
+        """Índice das unidades cadastradas pelo nome normalizado."""
+        snapshot = self.units_store.current()
+        if snapshot is None:
+            return {}
+        return {normalize_text(row.get('nome')): row for row in snapshot.tables.get('unidades', ())}
+    
+    @staticmethod
+    def _parse_time(value) -> Optional[dt_time]:
+        """Converte 'HH:MM' ou 'HH:MM:SS' em time."""
+        if not value:
+            return None
         try:
-            self.client: Client = create_client(
-                Config.SUPABASE_URL,
-                Config.SUPABASE_KEY
-            )
-            logger.info("Conectado ao Supabase com sucesso")
-        except Exception as e:
-            logger.error(f"Erro ao conectar ao Supabase: {e}")
-            self.client = None
+            parts = [int(part) for part in str(value).split(':')[:3]]
+            return dt_time(*parts)
+        except (TypeError, ValueError):
+            return None
     
-    def get_product_by_name_and_size(self, nome: str, tamanho: str, tipo_produto: str) -> Optional[Dict]:
+    def get_product_by_name_and_size(self, nome: str, tamanho: str, tipo_produto: str,
+                                     snapshot: Optional[CatalogSnapshot] = None) -> Optional[Dict]:
         """
-	        Busca um produto pelo nome, tamanho e tipo.
+        Busca um produto pelo nome, tamanho e tipo.
         
         Args:
             nome: Nome do produto
-	            tamanho: Tamanho (grande, pequeno, médio)\n	            tipo_produto: Tipo do produto (ex: Pizza, Refrigerante)
+            tamanho: Tamanho (grande, pequeno, médio)
+            tipo_produto: Tipo do produto (ex: Pizza, Refrigerante)
+            snapshot: Versão do cardápio a consultar (padrão: vigente)
             
         Returns:
             Dicionário com dados do produto ou None
         """
         try:
-	            response = self.client.table('produtos').select('*').eq('status', 'Disponível').execute()
-            
-	            for produto in response.data:
-	                if self._normalize_text(produto['nome']) == self._normalize_text(nome) and \
-	                   self._normalize_text(produto['tamanho']) == self._normalize_text(tamanho) and \
-	                   self._normalize_text(produto['tipo_produto']) == self._normalize_text(tipo_produto):
-	                    return produto
-            
-            return None
+            snapshot = snapshot or self.catalog_store.current()
+            return snapshot.find_product(nome, tamanho, tipo_produto) if snapshot else None
         except Exception as e:
             logger.error(f"Erro ao buscar produto: {e}")
             return None
     
-    def get_neighborhood_tax(self, bairro: str) -> Optional[Dict]:
+    def get_neighborhood_tax(self, bairro: str, snapshot: Optional[CatalogSnapshot] = None) -> Optional[Dict]:
         """
         Busca a taxa de entrega para um bairro.
         
         Args:
             bairro: Nome do bairro
+            snapshot: Versão do cardápio a consultar (padrão: vigente)
             
         Returns:
             Dicionário com dados do bairro ou None
         """
         try:
-            response = self.client.table('bairros').select('*').eq('status', 'Disponível').execute()
-            
-            for neighborhood in response.data:
-                if self._normalize_text(neighborhood['nome']) == self._normalize_text(bairro):
-                    return neighborhood
-            
-            return None
+            snapshot = snapshot or self.catalog_store.current()
+            return snapshot.find_neighborhood(bairro) if snapshot else None
         except Exception as e:
             logger.error(f"Erro ao buscar bairro: {e}")
             return None
     
-    def get_additional_by_name_and_size(self, nome: str, tamanho: str = None) -> Optional[Dict]:
+    def get_additional_by_name_and_size(self, nome: str, tamanho: str = None,
+                                        snapshot: Optional[CatalogSnapshot] = None) -> Optional[Dict]:
         """
         Busca um adicional pelo nome e tamanho (opcional).
         
         Args:
             nome: Nome do adicional
             tamanho: Tamanho (opcional)
+            snapshot: Versão do cardápio a consultar (padrão: vigente)
             
         Returns:
             Dicionário com dados do adicional ou None
         """
         try:
-            response = self.client.table('adicionais').select('*').eq('status', 'Disponível').execute()
-            
-            for adicional in response.data:
-                if self._normalize_text(adicional['nome']) == self._normalize_text(nome):
-                    if tamanho is None or self._normalize_text(adicional.get('tamanho', '')) == self._normalize_text(tamanho):
-                        return adicional
-            
-            return None
+            snapshot = snapshot or self.catalog_store.current()
+            return snapshot.find_additional(nome, tamanho) if snapshot else None
         except Exception as e:
             logger.error(f"Erro ao buscar adicional: {e}")
             return None
     
+    def fetch_catalog(self, unidade: Optional[str] = None) -> Dict[str, List[Dict]]:
+        """
+        Carrega uma cópia de todas as tabelas do cardápio.
+        
+        Args:
+            unidade: Restringe aos itens da unidade e aos compartilhados, ou só
+                aos compartilhados com SHARED_PARTITION (opcional)
+        
+        Returns:
+            Dicionário {tabela: linhas disponíveis}
+        """
+        return {table: self._fetch_available(table, unidade) for table in CATALOG_TABLES}
+    
+    def _fetch_units(self) -> Dict[str, List[Dict]]:
+        """
+        Busca a tabela de unidades.
+        
+        A tabela é opcional: se ela não existir no banco, não há unidades
+        cadastradas e todos os pedidos usam o cardápio completo.
+        
+        Returns:
+            Dicionário {'unidades': linhas disponíveis}
+        """
+        try:
+            return {'unidades': self._fetch_available('unidades')}
+        except Exception as e:
+            if getattr(e, 'code', None) not in MISSING_TABLE_CODES \
+                    and not any(code in str(e) for code in MISSING_TABLE_CODES):
+                raise
+            logger.warning("Tabela 'unidades' não existe; usando o cardápio completo para todos os pedidos")
+            return {'unidades': []}
+    
+    def _fetch_available(self, table: str, unidade: Optional[str] = None) -> List[Dict]:
+        """
+        Busca todas as linhas disponíveis de uma tabela.
+        
+        Args:
+            table: Nome da tabela
+            unidade: Restringe às linhas da unidade e às sem unidade, ou só às
+                sem unidade com SHARED_PARTITION (opcional)
+            
+        Returns:
+            Lista de linhas com status 'Disponível'
+        """
+        request = {'tabela': table, 'status': 'Disponível'}
+        if unidade:
+            request['unidade'] = unidade
+        
+        def perform():
+            query = self.client.table(table).select('*').eq('status', 'Disponível')
+            if unidade == SHARED_PARTITION:
+                query = query.is_('unidade', 'null')
+            elif unidade:
+                escaped = unidade.replace('"', '\\"')
+                query = query.or_(f'unidade.eq."{escaped}",unidade.is.null')
+            return query.execute().data
+        
+        return self.cassette.call('supabase', request, perform)
+    
     @staticmethod
     def _normalize_text(text: str) -> str:
         """
@@ -107,37 +466,179 @@ class SupabaseClient:
         Returns:
             Texto normalizado
         """
-        import unicodedata
-        
-        if not text:
-            return ""
-        
-        # Remove acentos
-        text = unicodedata.normalize('NFKD', text)
-        text = ''.join([c for c in text if not unicodedata.combining(c)])
+        return normalize_text(text)
+
+
+class StaticCatalogClient(SupabaseClient):
+    """Cliente que responde às buscas a partir de um cardápio já carregado em memória."""
+    
+    def __init__(self, catalog: Dict[str, List[Dict]]):
+        """
+        Inicializa o cliente sem conectar ao Supabase.
         
-        # Converte para minúsculas
-        return text.lower().strip()
+        Args:
+            catalog: Dicionário {tabela: linhas disponíveis}
+        """
+        self.cassette = Cassette()
+        self._client = None
+        self._connect_enabled = False
+        self.catalog = catalog
+        self._init_catalog(history_size=1, refresh_interval=0)
+    
+    def _fetch_available(self, table: str, unidade: Optional[str] = None) -> List[Dict]:
+        rows = self.catalog.get(table, [])
+        if unidade == SHARED_PARTITION:
+            rows = [row for row in rows if row.get('unidade') is None]
+        elif unidade:
+            rows = [row for row in rows if row.get('unidade') in (None, unidade)]
+        return rows
 
 
 class OrderValidator:
     """Valida dados de pedidos contra o banco de dados."""
     
-    def __init__(self, db_client: SupabaseClient):
+    def __init__(self, db_client: SupabaseClient, cache_size: Optional[int] = None):
         """
         Inicializa o validador.
         
         Args:
             db_client: Cliente Supabase
+            cache_size: Resultados de validação mantidos em cache (padrão: VALIDATION_CACHE_SIZE, 0 desativa)
         """
         self.db = db_client
+        self.cache_size = Config.VALIDATION_CACHE_SIZE if cache_size is None else cache_size
+        self._cache: 'OrderedDict[Tuple, Dict]' = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._cache_hits = 0
+        self._cache_misses = 0
     
-    def validate_order(self, order_data: Dict) -> Dict:
+    def validate_order(self, order_data: Dict, snapshot: Optional[CatalogSnapshot] = None) -> Dict:
         """
         Valida um pedido completo.
         
+        Todas as buscas do pedido usam a mesma versão do cardápio, mesmo que
+        ele seja atualizado durante a validação. O resultado é guardado em cache
+        pela combinação pedido + versão do cardápio; uma nova versão do cardápio
+        gera chaves novas, então resultados antigos nunca são reaproveitados.
+        
+        Args:
+            order_data: Dados do pedido extraídos
+            snapshot: Versão do cardápio a usar (padrão: vigente no início da validação)
+            
+        Returns:
+            Dicionário com resultado da validação
+        """
+        snapshot = snapshot or self.db.snapshot(unidade=order_data.get('unidade'))
+        
+        key = self._cache_key(order_data, snapshot)
+        if key is not None:
+            try:
+                with self._cache_lock:
+                    cached = self._cache.get(key)
+                    if cached is not None:
+                        self._cache.move_to_end(key)
+                        self._cache_hits += 1
+                        return self._thaw_result(cached)
+                    self._cache_misses += 1
+            except TypeError:
+                # Campo com valor não hasheável (ex: lista no lugar do bairro): valida sem cache
+                key = None
+        
+        result = self._validate(order_data, snapshot)
+        
+        if key is not None:
+            frozen = self._freeze_result(result)
+            with self._cache_lock:
+                self._cache[key] = frozen
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        
+        return result
+    
+    def cache_stats(self) -> Dict:
+        """
+        Retorna as estatísticas do cache de resultados.
+        
+        Returns:
+            Dicionário com tamanho, capacidade, acertos e falhas
+        """
+        with self._cache_lock:
+            lookups = self._cache_hits + self._cache_misses
+            return {
+                'entradas': len(self._cache),
+                'capacidade': self.cache_size,
+                'acertos': self._cache_hits,
+                'falhas': self._cache_misses,
+                'taxa_acerto': round(self._cache_hits / lookups, 4) if lookups else 0.0
+            }
+    
+    def _cache_key(self, order_data: Dict, snapshot: Optional[CatalogSnapshot]) -> Optional[Tuple]:
+        """
+        Monta a chave do cache: versão do cardápio + campos do pedido usados na validação.
+        
+        A versão é o checksum do conteúdo do cardápio. Só entram os campos
+        usados na validação, lidos com os mesmos padrões de _validate e
+        _validate_products, então pedidos com o mesmo conteúdo e clientes
+        diferentes compartilham o resultado. Os tipos dos valores também
+        entram: 27 e 27.0 são iguais como chave, mas aparecem de forma
+        diferente nas correções devolvidas.
+        """
+        if not self.cache_size or snapshot is None:
+            return None
+        
+        products = order_data.get('produtos', [])
+        if not isinstance(products, list):
+            return None
+        
+        # Quatro campos por produto, então a lista achatada não é ambígua
+        fields = []
+        for product in products:
+            if not isinstance(product, dict):
+                return None
+            fields += (
+                product.get('nome', ''),
+                product.get('tamanho', ''),
+                product.get('tipo_produto', ''),
+                product.get('preco', 0)
+            )
+        fields += (
+            order_data.get('tipo_entrega'),
+            order_data.get('bairro'),
+            order_data.get('taxa_entrega'),
+            order_data.get('valor_total')
+        )
+        return (snapshot.version, tuple(fields), tuple(map(type, fields)))
+    
+    @staticmethod
+    def _freeze_result(result: Dict) -> Dict:
+        """
+        Cópia imutável do resultado para o cache.
+        
+        Erros viram tupla e cada correção vira uma tupla de pares, então nada
+        do que está no cache é compartilhado com quem recebeu o resultado.
+        """
+        return {
+            **result,
+            'erros': tuple(result['erros']),
+            'correcoes': tuple(tuple(correction.items()) for correction in result['correcoes'])
+        }
+    
+    @staticmethod
+    def _thaw_result(frozen: Dict) -> Dict:
+        """Monta, a partir do cache, um resultado novo com listas e dicionários próprios."""
+        return {
+            **frozen,
+            'erros': list(frozen['erros']),
+            'correcoes': [dict(correction) for correction in frozen['correcoes']]
+        }
+    
+    def _validate(self, order_data: Dict, snapshot: Optional[CatalogSnapshot]) -> Dict:
+        """
+        Executa a validação do pedido contra uma versão do cardápio.
+        
         Args:
             order_data: Dados do pedido extraídos
+            snapshot: Versão do cardápio a usar
             
         Returns:
             Dicionário com resultado da validação
@@ -147,7 +648,7 @@ class OrderValidator:
         calculated_total = 0
         
         # Valida produtos
-        products_validation = self._validate_products(order_data.get('produtos', []))
+        products_validation = self._validate_products(order_data.get('produtos', []), snapshot)
         errors.extend(products_validation['errors'])
         corrections.extend(products_validation['corrections'])
         calculated_total += products_validation['subtotal']
@@ -156,7 +657,8 @@ class OrderValidator:
         if order_data.get('tipo_entrega') == 'entrega':
             tax_validation = self._validate_delivery_tax(
                 order_data.get('bairro'),
-                order_data.get('taxa_entrega')
+                order_data.get('taxa_entrega'),
+                snapshot
             )
             errors.extend(tax_validation['errors'])
             corrections.extend(tax_validation['corrections'])
@@ -179,15 +681,17 @@ class OrderValidator:
             'valor_total_informado': order_data.get('valor_total'),
             'erros': errors,
             'correcoes': corrections,
-            'resumo': self._build_summary(is_valid, errors, corrections)
+            'resumo': self._build_summary(is_valid, errors, corrections),
+            'versao_catalogo': snapshot.version if snapshot else None
         }
     
-    def _validate_products(self, products: List[Dict]) -> Dict:
+    def _validate_products(self, products: List[Dict], snapshot: Optional[CatalogSnapshot] = None) -> Dict:
         """
         Valida produtos do pedido.
         
         Args:
             products: Lista de produtos
+            snapshot: Versão do cardápio a consultar
             
         Returns:
             Dicionário com resultado da validação
@@ -200,12 +704,12 @@ class OrderValidator:
             nome = product.get('nome', '')
             preco_informado = product.get('preco', 0)
             
-	            # Tenta extrair tamanho do nome
-	            tamanho = product.get('tamanho', '') # O LLM já extrai o tamanho
-	            tipo_produto = product.get('tipo_produto', '') # O LLM já extrai o tipo
-	            
-	            # Busca produto no banco
-	            db_product = self.db.get_product_by_name_and_size(nome, tamanho, tipo_produto)
+            # Tenta extrair tamanho do nome
+            tamanho = product.get('tamanho', '') # O LLM já extrai o tamanho
+            tipo_produto = product.get('tipo_produto', '') # O LLM já extrai o tipo
+            
+            # Busca produto no banco
+            db_product = self.db.get_product_by_name_and_size(nome, tamanho, tipo_produto, snapshot)
             
             if db_product is None:
                 errors.append(f"Produto '{nome}' não encontrado no cardápio")
@@ -234,13 +738,15 @@ class OrderValidator:
             'subtotal': subtotal
         }
     
-    def _validate_delivery_tax(self, bairro: str, taxa_informada: float) -> Dict:
+    def _validate_delivery_tax(self, bairro: str, taxa_informada: float,
+                               snapshot: Optional[CatalogSnapshot] = None) -> Dict:
         """
         Valida taxa de entrega.
         
         Args:
             bairro: Nome do bairro
             taxa_informada: Taxa informada no pedido
+            snapshot: Versão do cardápio a consultar
             
         Returns:
             Dicionário com resultado da validação
@@ -253,7 +759,7 @@ class OrderValidator:
             errors.append("Bairro não informado para entrega")
             return {'errors': errors, 'corrections': corrections, 'tax_amount': 0}
         
-        db_neighborhood = self.db.get_neighborhood_tax(bairro)
+        db_neighborhood = self.db.get_neighborhood_tax(bairro, snapshot)
         
         if db_neighborhood is None:
             errors.append(f"Bairro '{bairro}' não encontrado ou indisponível")
@@ -7,7 +7,7 @@
 -- Armazena os bairros de entrega com seus respectivos preços de taxa
 CREATE TABLE IF NOT EXISTS bairros (
   id SERIAL PRIMARY KEY,
-  nome VARCHAR(255) NOT NULL UNIQUE,
+  nome VARCHAR(255) NOT NULL,
   taxa NUMERIC(10, 2) NOT NULL,
   status VARCHAR(20) DEFAULT 'Disponível' CHECK (status IN ('Disponível', 'Indisponível')),
   criado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -58,6 +58,36 @@ CREATE INDEX IF NOT EXISTS idx_produtos_tamanho ON produtos(tamanho);
 CREATE INDEX IF NOT EXISTS idx_produtos_status ON produtos(status);
 CREATE INDEX IF NOT EXISTS idx_produtos_categoria ON produtos(categoria);
 
+-- ============================================================================
+-- CARDÁPIO POR UNIDADE (opcional, usado com CATALOG_PARTITION_BY_UNIT=true)
+-- ============================================================================
+
+-- Tabela: unidades
+-- Lojas com seus horários; as unidades abertas têm o cardápio pré-carregado
+CREATE TABLE IF NOT EXISTS unidades (
+  id SERIAL PRIMARY KEY,
+  nome VARCHAR(255) NOT NULL UNIQUE,
+  horario_abertura TIME,
+  horario_fechamento TIME,
+  status VARCHAR(20) DEFAULT 'Disponível' CHECK (status IN ('Disponível', 'Indisponível')),
+  criado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Itens com unidade NULL valem para todas as unidades
+ALTER TABLE produtos ADD COLUMN IF NOT EXISTS unidade VARCHAR(255);
+ALTER TABLE bairros ADD COLUMN IF NOT EXISTS unidade VARCHAR(255);
+ALTER TABLE adicionais ADD COLUMN IF NOT EXISTS unidade VARCHAR(255);
+
+CREATE INDEX IF NOT EXISTS idx_produtos_unidade ON produtos(unidade);
+CREATE INDEX IF NOT EXISTS idx_bairros_unidade ON bairros(unidade);
+
+-- Cada unidade pode cadastrar o mesmo bairro com a sua taxa; o nome só é único
+-- dentro da unidade (NULLS NOT DISTINCT: um único bairro compartilhado por nome)
+ALTER TABLE bairros DROP CONSTRAINT IF EXISTS bairros_nome_key;
+CREATE UNIQUE INDEX IF NOT EXISTS bairros_nome_unidade_key ON bairros (nome, unidade) NULLS NOT DISTINCT;
+CREATE INDEX IF NOT EXISTS idx_adicionais_unidade ON adicionais(unidade);
+
 -- ============================================================================
 -- DADOS DE EXEMPLO PARA TESTES
 -- ============================================================================
@@ -69,6 +99,11 @@ INSERT INTO bairros (nome, taxa, status) VALUES
   ('Setor Leste', 4.00, 'Disponível'),
   ('Setor Oeste', 3.50, 'Disponível'),
   ('Zona Rural', 5.00, 'Disponível')
+ON CONFLICT (nome, unidade) DO NOTHING;
+
+-- Inserir unidades de exemplo
+INSERT INTO unidades (nome, horario_abertura, horario_fechamento, status) VALUES
+  ('Maria Dilce', '18:00', '23:30', 'Disponível')
 ON CONFLICT (nome) DO NOTHING;
 
 -- Inserir produtos de exemplo (Pizzas)
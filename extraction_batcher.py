@@ -0,0 +1,216 @@
+"""
+Módulo de agrupamento (micro-lotes) das extrações enviadas ao LLM.
+
+Resumos que chegam dentro de uma janela curta são enviados em uma única
+chamada, economizando requisições por minuto no limite do provedor ao custo
+de uma espera pequena e limitada. Um resumo que chega sozinho (fila vazia e
+nenhum lote em andamento) é despachado na hora, sem esperar a janela; só há
+lotes quando o mesmo processo atende requisições concorrentes (workers com
+threads ou gevent).
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Motivos de falha de um lote informados por extract_batch
+BATCH_FAILED = 'falha'
+BATCH_RATE_LIMITED = 'limite'
+
+# Espera após um 429 do provedor: dobra a cada limite seguido, até o máximo
+RATE_LIMIT_BACKOFF_SECONDS = 1.0
+RATE_LIMIT_MAX_BACKOFF_SECONDS = 30.0
+RATE_LIMIT_RETRIES = 2
+
+# (dados de cada resumo, uso atribuído a cada resumo, motivo da falha ou None)
+BatchResult = Tuple[List[Optional[Dict[str, Any]]], List[Optional[Dict[str, Any]]], Optional[str]]
+
+
+class ExtractionBatcher:
+    """Agrupa resumos em lotes e distribui os resultados para quem espera."""
+
+    def __init__(
+        self,
+        extract_batch: Callable[[List[str]], BatchResult],
+        window_ms: float = 100,
+        max_size: int = 8,
+        timeout: float = 60,
+        max_in_flight: int = 4
+    ):
+        """
+        Inicializa o agrupador e a thread que forma os lotes.
+
+        Args:
+            extract_batch: Função que extrai uma lista de resumos em uma chamada
+            window_ms: Tempo máximo de espera pelo lote a partir do primeiro resumo
+            max_size: Quantidade máxima de resumos por lote
+            timeout: Tempo máximo de espera pelo resultado de um resumo (segundos)
+            max_in_flight: Lotes extraídos ao mesmo tempo (os demais aguardam na fila do executor)
+        """
+        self._extract_batch = extract_batch
+        self.window = window_ms / 1000
+        self.max_size = max(1, max_size)
+        self.timeout = timeout
+        self._queue: 'queue.Queue[Tuple[str, Future, float]]' = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._in_flight = 0
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_in_flight), thread_name_prefix='extracao-lote')
+        self._backoff = 0.0
+        self._paused_until = 0.0
+        self._stats = {
+            'lotes': 0,
+            'resumos': 0,
+            'maior_lote': 0,
+            'espera_total_ms': 0.0,
+            'chamada_total_ms': 0.0,
+            'falhas_lote': 0,
+            'limites_taxa': 0
+        }
+        self._thread = threading.Thread(target=self._run, name='extracao-lotes', daemon=True)
+        self._thread.start()
+
+    def submit(self, order_summary: str) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]], bool]:
+        """
+        Enfileira um resumo e aguarda o resultado do lote.
+
+        Args:
+            order_summary: Texto do resumo do pedido
+
+        Returns:
+            Tupla (dados extraídos ou None, parcela de uso do lote atribuída ao
+            resumo, se vale extrair o resumo individualmente quando os dados faltam)
+        """
+        future: Future = Future()
+        self._queue.put((order_summary, future, time.perf_counter()))
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            logger.warning(f"Lote não respondeu em {self.timeout}s, extraindo o resumo individualmente")
+            return None, None, True
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna as métricas dos lotes formados.
+
+        Returns:
+            Dicionário com contagens, tamanho médio e tempos médios
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        batches = stats['lotes'] or 1
+        summaries = stats['resumos'] or 1
+        return {
+            'janela_ms': round(self.window * 1000, 1),
+            'tamanho_maximo': self.max_size,
+            'lotes': stats['lotes'],
+            'resumos': stats['resumos'],
+            'maior_lote': stats['maior_lote'],
+            'falhas_lote': stats['falhas_lote'],
+            'limites_taxa': stats['limites_taxa'],
+            'tamanho_medio': round(stats['resumos'] / batches, 2),
+            'espera_media_ms': round(stats['espera_total_ms'] / summaries, 1),
+            'chamada_media_ms': round(stats['chamada_total_ms'] / batches, 1),
+            'requisicoes_economizadas': stats['resumos'] - stats['lotes']
+        }
+
+    def _run(self):
+        """
+        Laço da thread: forma um lote por janela e o despacha.
+
+        Se não há outro resumo na fila nem lote em andamento, o resumo segue
+        sozinho na hora: esperar a janela só acrescentaria latência.
+        """
+        while True:
+            batch = [self._queue.get()]
+
+            # Após um 429 o próximo lote espera; os resumos se acumulam na fila
+            pause = self._paused_until - time.perf_counter()
+            if pause > 0:
+                time.sleep(pause)
+
+            with self._stats_lock:
+                alone = self._in_flight == 0 and self._queue.empty()
+            deadline = time.perf_counter() + (0 if alone else self.window)
+
+            while len(batch) < self.max_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    if remaining <= 0:
+                        batch.append(self._queue.get_nowait())
+                    else:
+                        batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            # O despacho roda no executor para o próximo lote começar a se formar
+            with self._stats_lock:
+                self._in_flight += 1
+            self._executor.submit(self._dispatch, batch)
+
+    def _dispatch(self, batch: List[Tuple[str, Future, float]]):
+        """
+        Extrai um lote e entrega cada resultado ao seu solicitante.
+
+        Se o provedor recusar por limite de taxa, o lote é repetido após uma
+        espera crescente (dentro do timeout dos solicitantes) em vez de virar
+        uma chamada por resumo, o que só pioraria o limite.
+        """
+        summaries = [summary for summary, _, _ in batch]
+        start = time.perf_counter()
+        wait_ms = sum((start - queued_at) * 1000 for _, _, queued_at in batch)
+        expires_at = min(queued_at for _, _, queued_at in batch) + self.timeout
+        rate_limited = 0
+
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            try:
+                results, usages, error = self._extract_batch(summaries)
+            except Exception as e:
+                logger.error(f"Erro ao extrair lote de {len(batch)} resumos: {e}")
+                results, usages, error = [None] * len(batch), [None] * len(batch), BATCH_FAILED
+
+            if error != BATCH_RATE_LIMITED:
+                with self._stats_lock:
+                    self._backoff = 0.0
+                break
+
+            rate_limited += 1
+            delay = self._register_rate_limit()
+            if attempt == RATE_LIMIT_RETRIES or time.perf_counter() + delay >= expires_at:
+                break
+            logger.warning(f"Limite de taxa do provedor, repetindo o lote de {len(batch)} resumos em {delay:.1f}s")
+            time.sleep(delay)
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._stats_lock:
+            self._stats['lotes'] += 1
+            self._stats['resumos'] += len(batch)
+            self._stats['maior_lote'] = max(self._stats['maior_lote'], len(batch))
+            self._stats['espera_total_ms'] += wait_ms
+            self._stats['chamada_total_ms'] += elapsed_ms
+            self._stats['limites_taxa'] += rate_limited
+            if all(result is None for result in results):
+                self._stats['falhas_lote'] += 1
+
+            self._in_flight -= 1
+
+        # Lote de um resumo já foi a chamada individual; após 429 não se multiplica chamadas
+        fallback = len(batch) > 1 and error != BATCH_RATE_LIMITED
+        for (_, future, _), result, usage in zip(batch, results, usages):
+            future.set_result((result, usage, fallback))
+
+    def _register_rate_limit(self) -> float:
+        """
+        Dobra a espera após um limite de taxa e pausa a formação de lotes.
+
+        Returns:
+            Espera em segundos até a próxima tentativa
+        """
+        with self._stats_lock:
+            self._backoff = min(max(self._backoff * 2, RATE_LIMIT_BACKOFF_SECONDS), RATE_LIMIT_MAX_BACKOFF_SECONDS)
+            self._paused_until = time.perf_counter() + self._backoff
+            return self._backoff
@@ -0,0 +1,268 @@
+"""
+Módulo de re-extração incremental de resumos revisados.
+
+Guarda a última extração de cada conversa (telefone + unidade) por uma
+janela curta. Quando o bot reenvia o resumo com poucas alterações, compara
+as linhas com a versão anterior e aplica apenas as mudanças, lendo as
+linhas alteradas localmente em vez de chamar o LLM novamente.
+"""
+
+import copy
+import difflib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from catalog import CatalogSnapshot, normalize_text
+from summary_parser import PRICE_FIELDS, classify_line, parse_field, parse_product_line, split_lines
+
+logger = logging.getLogger(__name__)
+
+# Campos que podem ser atualizados sem o LLM; endereço, unidade e mudança de
+# entrega para retirada dependem de interpretação e forçam a extração completa
+LOCAL_FIELDS = ('nome', 'taxa_entrega', 'valor_total', 'forma_pagamento', 'troco', 'observacoes')
+
+
+class _Conversation:
+    """Última extração conhecida de uma conversa."""
+
+    __slots__ = ('lines', 'data', 'products', 'updated_at')
+
+    def __init__(self, lines: List[str], data: Dict[str, Any], products: Optional[List[Optional[int]]]):
+        self.lines = lines
+        self.data = data
+        # products[i] = índice em data['produtos'] da linha i (None se não for produto);
+        # None quando as linhas não puderam ser alinhadas com a extração
+        self.products = products
+        self.updated_at = time.time()
+
+
+class ConversationCache:
+    """Cache LRU com expiração das últimas extrações por conversa."""
+
+    def __init__(self, ttl_seconds: float = 900, max_entries: int = 10000):
+        """
+        Inicializa o cache.
+
+        Args:
+            ttl_seconds: Tempo de vida de cada conversa desde a última atualização
+            max_entries: Quantidade máxima de conversas mantidas
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, _Conversation]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[_Conversation]:
+        """Retorna a conversa se ainda estiver dentro da janela."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry.updated_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: _Conversation):
+        """Grava a conversa, descartando as menos recentes acima do limite."""
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def conversation_key(lines: List[str]) -> Optional[str]:
+    """
+    Monta a chave da conversa a partir das linhas TELEFONE e UNIDADE do resumo.
+
+    Args:
+        lines: Linhas do resumo
+
+    Returns:
+        Chave 'telefone|unidade' ou None se o telefone não estiver presente
+    """
+    telefone = unidade = None
+    for line in lines:
+        kind, field, value = classify_line(line)
+        if kind != 'campo':
+            continue
+        if field == 'telefone':
+            telefone = parse_field(field, value)
+        elif field == 'unidade':
+            unidade = normalize_text(value)
+    if not telefone:
+        return None
+    return f"{telefone}|{unidade or ''}"
+
+
+class IncrementalExtractor:
+    """Extrai resumos reaproveitando a extração anterior da mesma conversa."""
+
+    def __init__(
+        self,
+        extract: Callable[[str], Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]],
+        snapshot_for: Callable[[Optional[str]], Optional[CatalogSnapshot]],
+        cache: Optional[ConversationCache] = None
+    ):
+        """
+        Inicializa o extrator incremental.
+
+        Args:
+            extract: Extração completa (ex: LLMExtractor.extract_order_data_with_usage)
+            snapshot_for: Retorna o cardápio vigente de uma unidade
+            cache: Cache de conversas (padrão: 15 minutos, 10 mil conversas)
+        """
+        self._extract = extract
+        self._snapshot_for = snapshot_for
+        self.cache = cache or ConversationCache()
+
+    def extract(self, resumo: str, key: Optional[str] = None
+                ) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Extrai os dados do resumo, de forma incremental quando possível.
+
+        Args:
+            resumo: Texto do resumo
+            key: Chave da conversa (padrão: telefone + unidade lidos do resumo)
+
+        Returns:
+            Tupla (dados extraídos, registro de uso do LLM, informações da extração)
+        """
+        start = time.perf_counter()
+        lines = split_lines(resumo)
+        key = key or conversation_key(lines)
+
+        previous = self.cache.get(key) if key else None
+        if previous is not None:
+            merged = self._apply_changes(previous, lines)
+            if merged is not None:
+                data, products, changed = merged
+                self.cache.put(key, _Conversation(lines, data, products))
+                logger.info(f"Extração incremental: {changed} linha(s) alterada(s)")
+                return copy.deepcopy(data), None, {
+                    'modo': 'incremental',
+                    'linhas_alteradas': changed,
+                    'duracao_ms': round((time.perf_counter() - start) * 1000, 1)
+                }
+
+        data, usage = self._extract(resumo)
+        if data is not None and key:
+            self.cache.put(key, _Conversation(lines, copy.deepcopy(data), self._align(lines, data)))
+
+        return data, usage, {
+            'modo': 'completo',
+            'linhas_alteradas': None,
+            'duracao_ms': round((time.perf_counter() - start) * 1000, 1)
+        }
+
+    def _align(self, lines: List[str], data: Dict[str, Any]) -> Optional[List[Optional[int]]]:
+        """
+        Associa cada linha de produto ao item correspondente da extração.
+
+        O alinhamento só é aceito quando cada linha é lida localmente com o
+        mesmo produto e preço que o LLM extraiu, na mesma ordem.
+        """
+        products = data.get('produtos') or []
+        snapshot = self._snapshot_for(data.get('unidade'))
+        mapping: List[Optional[int]] = []
+        index = 0
+
+        for line in lines:
+            kind, _, value = classify_line(line)
+            if kind != 'produto':
+                mapping.append(None)
+                continue
+            parsed = parse_product_line(value, snapshot)
+            if parsed is None or index >= len(products) or not _same_product(parsed, products[index]):
+                return None
+            mapping.append(index)
+            index += 1
+
+        return mapping if index == len(products) else None
+
+    def _apply_changes(self, previous: _Conversation, lines: List[str]
+                       ) -> Optional[Tuple[Dict[str, Any], List[Optional[int]], int]]:
+        """
+        Aplica as linhas alteradas sobre a extração anterior.
+
+        Returns:
+            Tupla (dados, alinhamento, linhas alteradas) ou None se alguma
+            alteração exigir a extração completa
+        """
+        if previous.products is None:
+            return None
+
+        data = copy.deepcopy(previous.data)
+        old_products = data.get('produtos') or []
+        snapshot = None
+        products: List[Dict[str, Any]] = []
+        mapping: List[Optional[int]] = []
+        changed = 0
+
+        matcher = difflib.SequenceMatcher(a=previous.lines, b=lines, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == 'equal':
+                for offset in range(i2 - i1):
+                    old_index = previous.products[i1 + offset]
+                    if old_index is None:
+                        mapping.append(None)
+                    else:
+                        mapping.append(len(products))
+                        products.append(old_products[old_index])
+                continue
+
+            # Linhas removidas: só produtos e campos simples podem sair sem o LLM
+            for line in previous.lines[i1:i2]:
+                kind, field, _ = classify_line(line)
+                if kind == 'campo' and field in LOCAL_FIELDS:
+                    data[field] = None
+                elif kind != 'produto':
+                    return None
+
+            changed += max(i2 - i1, j2 - j1)
+            for line in lines[j1:j2]:
+                kind, field, value = classify_line(line)
+                if kind == 'produto':
+                    if snapshot is None:
+                        snapshot = self._snapshot_for(data.get('unidade'))
+                    parsed = parse_product_line(value, snapshot)
+                    if parsed is None:
+                        return None
+                    mapping.append(len(products))
+                    products.append(parsed)
+                elif kind == 'campo' and field in LOCAL_FIELDS:
+                    data[field] = parse_field(field, value)
+                    # Valor ilegível: o validador precisa de números, então o LLM decide
+                    if field in PRICE_FIELDS and data[field] is None:
+                        return None
+                    mapping.append(None)
+                else:
+                    return None
+
+        # Um valor numérico cuja linha sumiu não pode virar None (o validador faz contas com ele)
+        for field in PRICE_FIELDS:
+            if previous.data.get(field) is not None and data.get(field) is None:
+                return None
+
+        data['produtos'] = products
+        if data.get('tipo_entrega') == 'retirada':
+            data['taxa_entrega'] = 0
+        return data, mapping, changed
+
+
+def _same_product(parsed: Dict[str, Any], extracted: Dict[str, Any]) -> bool:
+    """Compara o produto lido localmente com o extraído pelo LLM."""
+    try:
+        same_price = abs(float(parsed['preco']) - float(extracted.get('preco') or 0)) <= 0.01
+    except (TypeError, ValueError):
+        return False
+    parsed_name = normalize_text(parsed.get('nome') or '')
+    extracted_name = normalize_text(extracted.get('nome') or '')
+    return same_price and bool(extracted_name) and parsed_name.endswith(extracted_name)
@@ -4,20 +4,255 @@ Módulo para extração de dados estruturados de resumos de pedidos usando LLM.
 
 import json
 import logging
-from typing import Dict, Any, Optional
-from openai import OpenAI
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Tuple
 from config import Config
+from cassette import Cassette, get_cassette, replay_error
+from usage_tracker import UsageTracker, get_usage_tracker
+from summary_parser import classify_line, ends_product_list, split_lines
+from extraction_batcher import BATCH_FAILED, BATCH_RATE_LIMITED, BatchResult, ExtractionBatcher
+
+if TYPE_CHECKING:
+    # O SDK do OpenAI é importado só no primeiro uso (leva centenas de ms)
+    from openai import OpenAI
+    from openai.types.chat import ChatCompletion
 
 logger = logging.getLogger(__name__)
 
+# Versão do prefixo estático; altere sempre que EXTRACTION_INSTRUCTIONS mudar
+PROMPT_VERSION = 'extracao-v2'
+
+# Prefixo fixo, idêntico em todas as requisições, para aproveitar o cache de
+# prompt do provedor (que só vale a partir de ~1024 tokens de prefixo comum).
+# Nada variável (resumo, data, ids) pode entrar aqui.
+EXTRACTION_INSTRUCTIONS = """Você é um assistente especializado em extração de dados de resumos de pedidos de uma pizzaria. Retorne APENAS um JSON válido, sem explicações adicionais.
+
+Analise o resumo de pedido enviado pelo usuário e extraia os dados em formato JSON estruturado.
+
+Extraia os seguintes dados:
+- nome: Nome do cliente
+- telefone: Telefone sem formatação (apenas números)
+- unidade: Nome da unidade/loja
+- produtos: Lista de produtos com nome (apenas o nome base, ex: 'Nordestina'), tipo (ex: 'Pizza', 'Refrigerante'), tamanho (em minúsculas, ex: 'grande') e preço
+- endereco: Endereço completo (se for entrega)
+- bairro: Nome do bairro (se for entrega)
+- taxa_entrega: Valor da taxa (0 se for retirada)
+- valor_total: Valor total do pedido
+- forma_pagamento: Forma de pagamento
+- troco: Valor do troco (se houver)
+- observacoes: Observações do pedido
+- tipo_entrega: "entrega" ou "retirada"
+
+Regras:
+- Valores monetários são números com ponto decimal (R$ 1.234,50 vira 1234.5).
+- O bairro normalmente é a última parte do endereço.
+- Se o resumo indicar retirada na loja, use tipo_entrega "retirada", taxa_entrega 0, endereco null e bairro null.
+- Campos ausentes no resumo devem ser null.
+- Copie os preços, a taxa e o total exatamente como informados, mesmo que a soma não confira; não corrija valores.
+- Cada linha de produto vira um item em "produtos", na mesma ordem do resumo.
+
+Retorne APENAS um JSON válido com a seguinte estrutura:
+{
+  "nome": "string",
+  "telefone": "string",
+  "unidade": "string",
+  "produtos": [
+    {
+      "nome": "string",
+      "tipo_produto": "string",
+      "tamanho": "string",
+      "preco": number
+    }
+  ],
+  "endereco": "string ou null",
+  "bairro": "string ou null",
+  "taxa_entrega": number,
+  "valor_total": number,
+  "forma_pagamento": "string",
+  "troco": number ou null,
+  "observacoes": "string ou null",
+  "tipo_entrega": "entrega" ou "retirada"
+}
+
+EXEMPLO 1 (entrega)
+Resumo:
+Perfeito! Aqui está o RESUMO
+NOME: João Silva
+TELEFONE: (62) 99999-8888
+UNIDADE: Maria Dilce
+PRODUTOS SOLICITADOS: 1 Pizza grande Calabresa Acebolada - R$ 50,00
+1 Pizza pequena Mussarela - R$ 27,00
+ENDEREÇO: Rua das Flores, Qd 12 Lt 5, Vila Cristina
+TAXA DE ENTREGA: R$ 3,00
+VALOR TOTAL: R$ 80,00
+FORMA DE PAGAMENTO: Dinheiro
+TROCO: Para R$ 100,00
+OBSERVAÇÕES: Sem cebola na pizza pequena
+JSON:
+{"nome": "João Silva", "telefone": "62999998888", "unidade": "Maria Dilce", "produtos": [{"nome": "Calabresa Acebolada", "tipo_produto": "Pizza", "tamanho": "grande", "preco": 50.0}, {"nome": "Mussarela", "tipo_produto": "Pizza", "tamanho": "pequena", "preco": 27.0}], "endereco": "Rua das Flores, Qd 12 Lt 5, Vila Cristina", "bairro": "Vila Cristina", "taxa_entrega": 3.0, "valor_total": 80.0, "forma_pagamento": "Dinheiro", "troco": 100.0, "observacoes": "Sem cebola na pizza pequena", "tipo_entrega": "entrega"}
+
+EXEMPLO 2 (retirada)
+Resumo:
+Perfeito! Aqui está o RESUMO
+NOME: Carlos Oliveira
+TELEFONE: (62) 97777-6666
+UNIDADE: Maria Dilce
+PRODUTOS SOLICITADOS: 1 Pizza grande Frango com Catupiry - R$ 52,00
+1 Refrigerante 2L - R$ 8,00
+RETIRADA NA LOJA
+VALOR TOTAL: R$ 60,00
+FORMA DE PAGAMENTO: Cartão
+OBSERVAÇÕES: Sem observação
+JSON:
+{"nome": "Carlos Oliveira", "telefone": "62977776666", "unidade": "Maria Dilce", "produtos": [{"nome": "Frango com Catupiry", "tipo_produto": "Pizza", "tamanho": "grande", "preco": 52.0}, {"nome": "Refrigerante 2L", "tipo_produto": "Refrigerante", "tamanho": "", "preco": 8.0}], "endereco": null, "bairro": null, "taxa_entrega": 0, "valor_total": 60.0, "forma_pagamento": "Cartão", "troco": null, "observacoes": "Sem observação", "tipo_entrega": "retirada"}
+
+EXEMPLO 3 (formatação irregular)
+Resumo:
+RESUMO DO PEDIDO
+Nome: ana souza
+Telefone: 62 98123-4567
+Unidade: Maria Dilce
+Produtos: 1x PIZZA PEQUENA BRIGADEIRO ... R$28
+1x pizza grande vegetariana – 42,00 reais
+Endereco: Av. Brasil 120, Setor Leste
+Taxa de entrega: RS 4,00
+Total: R$ 75,00
+Pagamento: Pix
+JSON:
+{"nome": "ana souza", "telefone": "62981234567", "unidade": "Maria Dilce", "produtos": [{"nome": "Brigadeiro", "tipo_produto": "Pizza", "tamanho": "pequena", "preco": 28.0}, {"nome": "Vegetariana", "tipo_produto": "Pizza", "tamanho": "grande", "preco": 42.0}], "endereco": "Av. Brasil 120, Setor Leste", "bairro": "Setor Leste", "taxa_entrega": 4.0, "valor_total": 75.0, "forma_pagamento": "Pix", "troco": null, "observacoes": null, "tipo_entrega": "entrega"}"""
+
+
+
+def _is_rate_limit(error: Exception) -> bool:
+    """Indica se o erro do SDK é uma recusa por limite de taxa (HTTP 429)."""
+    return getattr(error, 'status_code', None) == 429
+
+
+def _replay_openai_error(error: Dict[str, Any]) -> Exception:
+    """
+    Reconstrói, na reprodução do cassete, o erro do SDK do OpenAI gravado.
+
+    Erros HTTP (RateLimitError, InternalServerError, ...) voltam com a mesma
+    classe e o mesmo status_code; os demais, como CassetteReplayError.
+
+    Args:
+        error: Interação gravada com 'erro', 'erro_tipo' e 'erro_status'
+
+    Returns:
+        Exceção a ser lançada
+    """
+    import httpx
+    import openai
+
+    cls = getattr(openai, error.get('erro_tipo') or '', None)
+    status = error.get('erro_status')
+    if not isinstance(cls, type) or not issubclass(cls, openai.APIError):
+        return replay_error(error)
+
+    request = httpx.Request('POST', 'https://api.openai.com/v1/chat/completions')
+    if issubclass(cls, openai.APIStatusError) and status is not None:
+        return cls(error['erro'], response=httpx.Response(status, request=request), body=None)
+    if issubclass(cls, openai.APITimeoutError):
+        return cls(request=request)
+    if issubclass(cls, openai.APIConnectionError):
+        return cls(message=error['erro'], request=request)
+    return replay_error(error)
+
+
+def _usage_counts(response: 'ChatCompletion') -> Tuple[int, int, int]:
+    """Extrai (tokens de entrada, tokens de saída, tokens servidos pelo cache de prompt) da resposta."""
+    details = getattr(response.usage, 'prompt_tokens_details', None)
+    return (response.usage.prompt_tokens or 0, response.usage.completion_tokens or 0,
+            getattr(details, 'cached_tokens', None) or 0)
+
+
+def _split_proportionally(total: int, weights: List[int]) -> List[int]:
+    """Divide um total inteiro na proporção dos pesos; o resto do arredondamento fica com a última parcela."""
+    weight_sum = sum(weights)
+    shares = [total * weight // weight_sum for weight in weights[:-1]]
+    return shares + [total - sum(shares)]
+
 
 class LLMExtractor:
     """Extrai dados estruturados de resumos de pedidos usando OpenAI."""
     
-    def __init__(self):
-        """Inicializa o cliente OpenAI."""
-        self.client = OpenAI(api_key=Config.OPENAI_API_KEY)
+    def __init__(self, cassette: Optional[Cassette] = None, usage_tracker: Optional[UsageTracker] = None):
+        """
+        Inicializa o cliente OpenAI.
+        
+        Args:
+            cassette: Cassete de gravação/reprodução (padrão: configurado via ambiente)
+            usage_tracker: Rastreador de uso de tokens (padrão: configurado via ambiente)
+        """
+        self.cassette = cassette or get_cassette()
+        self.usage_tracker = usage_tracker or get_usage_tracker()
+        self._client: Optional['OpenAI'] = None
+        self._client_lock = threading.Lock()
+        self._warm_thread: Optional[threading.Thread] = None
         self.model = Config.OPENAI_MODEL
+        self.chunk_threshold = Config.EXTRACTION_CHUNK_THRESHOLD
+        self.chunk_size = max(1, Config.EXTRACTION_CHUNK_SIZE)
+        self._chunk_pool: Optional[ThreadPoolExecutor] = None
+        self._chunk_pool_lock = threading.Lock()
+        self.batcher = ExtractionBatcher(
+            self.extract_batch,
+            window_ms=Config.EXTRACTION_BATCH_WINDOW_MS,
+            max_size=Config.EXTRACTION_BATCH_MAX_SIZE,
+            max_in_flight=Config.EXTRACTION_BATCH_CONCURRENCY
+        ) if Config.EXTRACTION_BATCH_ENABLED else None
+    
+    @property
+    def client(self) -> Optional['OpenAI']:
+        """
+        Cliente OpenAI, criado no primeiro uso.
+        
+        Em modo reprodução não há chamadas reais, então o cliente (e a chave) não é necessário.
+        """
+        if self._client is None and not self.cassette.replaying:
+            with self._client_lock:
+                if self._client is None:
+                    from openai import OpenAI
+                    self._client = OpenAI(api_key=Config.OPENAI_API_KEY)
+                    logger.info("Cliente OpenAI criado")
+        return self._client
+    
+    def connect(self) -> bool:
+        """
+        Cria o cliente OpenAI, se ainda não existir.
+        
+        Returns:
+            True se o cliente está pronto para uso (ou em modo reprodução)
+        """
+        try:
+            return self.cassette.replaying or self.client is not None
+        except Exception as e:
+            logger.error(f"Erro ao criar o cliente OpenAI: {e}")
+            return False
+    
+    def warm_start(self):
+        """Importa o SDK e cria o cliente OpenAI em segundo plano (uma tentativa por vez)."""
+        if self.cassette.replaying or self._client is not None:
+            return
+        if self._warm_thread is not None and self._warm_thread.is_alive():
+            return
+        self._warm_thread = threading.Thread(target=self.connect, name='openai-connect', daemon=True)
+        self._warm_thread.start()
+    
+    def client_ready(self) -> bool:
+        """
+        Indica se o cliente OpenAI já foi criado, sem bloquear.
+        
+        Se ainda não foi (ex: o aquecimento falhou), dispara nova tentativa em segundo plano.
+        
+        Returns:
+            True se o cliente está pronto para uso (ou em modo reprodução)
+        """
+        if self.cassette.replaying or self._client is not None:
+            return True
+        self.warm_start()
+        return False
     
     def extract_order_data(self, order_summary: str) -> Optional[Dict[str, Any]]:
         """
@@ -29,15 +264,132 @@ class LLMExtractor:
         Returns:
             Dicionário com dados estruturados ou None em caso de erro
         """
+        data, _ = self.extract_order_data_with_usage(order_summary)
+        return data
+    
+    def extract_order_data_with_usage(self, order_summary: str) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """
+        Extrai dados estruturados e contabiliza tokens, latência e custo da chamada.
+        
+        Resumos com mais de EXTRACTION_CHUNK_THRESHOLD linhas de produto são
+        divididos em partes extraídas em paralelo (ver _extract_chunked). Com
+        EXTRACTION_BATCH_ENABLED, os demais passam pelo agrupador de micro-lotes.
+        
+        Args:
+            order_summary: Texto do resumo do pedido
+            
+        Returns:
+            Tupla (dados estruturados ou None, registro de uso ou None se não houve resposta)
+        """
+        if self.chunk_threshold > 0:
+            header, groups, contiguous = self._split_summary(order_summary)
+            if len(groups) > self.chunk_threshold:
+                if contiguous:
+                    return self._extract_chunked(order_summary, header, groups)
+                logger.warning(f"Resumo com {len(groups)} produtos fora de uma lista contínua; extraindo sem dividir")
+        
+        if self.batcher is not None:
+            data, usage, fallback = self.batcher.submit(order_summary)
+            if data is not None or not fallback:
+                return data, usage
+            # O lote não trouxe este pedido: extrai individualmente
+            logger.warning("Pedido ausente na resposta do lote, extraindo individualmente")
+        
+        return self._extract_single(order_summary)
+    
+    def extract_batch(self, order_summaries: List[str]) -> BatchResult:
+        """
+        Extrai vários resumos em uma única chamada ao LLM.
+        
+        Os resumos vão numerados na mensagem do usuário (o prefixo estático
+        continua o mesmo) e a resposta é um array de pedidos identificados pelo id.
+        O uso da chamada é dividido entre os pedidos na proporção do tamanho
+        de cada resumo, e cada parcela é registrada na unidade do seu pedido.
+        
+        Args:
+            order_summaries: Resumos dos pedidos
+            
+        Returns:
+            Tupla (dados de cada resumo na mesma ordem, None para os ausentes;
+            parcela de uso de cada resumo; motivo da falha do lote ou None)
+        """
+        if len(order_summaries) == 1:
+            try:
+                data, usage = self._extract_single(order_summaries[0], raise_rate_limit=True)
+            except Exception:
+                return [None], [None], BATCH_RATE_LIMITED
+            return [data], [usage], None
+        
+        response = None
+        latency = 0.0
+        error = None
+        results: List[Optional[Dict[str, Any]]] = [None] * len(order_summaries)
+        prompt = self._build_batch_prompt(order_summaries)
+        
+        try:
+            start = time.perf_counter()
+            response = self._create_completion(
+                model=self.model,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": EXTRACTION_INSTRUCTIONS
+                    },
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ],
+                temperature=0.2,
+                max_tokens=min(1500 * len(order_summaries), 16000)
+            )
+            latency = time.perf_counter() - start
+            
+            payload = self._parse_json_content(response.choices[0].message.content)
+            for item in payload.get('pedidos') or []:
+                index = int(item.get('id', 0)) - 1
+                if 0 <= index < len(results) and isinstance(item.get('dados'), dict):
+                    results[index] = item['dados']
+            
+            logger.info(f"Lote extraído: {sum(r is not None for r in results)}/{len(results)} pedidos")
+            
+        except json.JSONDecodeError as e:
+            logger.error(f"Erro ao decodificar JSON do lote: {e}")
+            error = BATCH_FAILED
+        except Exception as e:
+            logger.error(f"Erro ao extrair lote com LLM: {e}")
+            error = BATCH_RATE_LIMITED if _is_rate_limit(e) else BATCH_FAILED
+        
+        usages = self._record_batch_usage(response, latency, results, order_summaries, prompt)
+        return results, usages, error
+    
+    def _extract_single(self, order_summary: str,
+                        raise_rate_limit: bool = False) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """
+        Extrai os dados de um resumo (ou parte dele) em uma única chamada.
+        
+        Args:
+            order_summary: Texto do resumo do pedido
+            raise_rate_limit: Propaga o erro de limite de taxa em vez de devolver None
+            
+        Returns:
+            Tupla (dados estruturados ou None, registro de uso ou None se não houve resposta)
+        """
+        response = None
+        latency = 0.0
+        data = None
+        prompt = ''
+        
         try:
             prompt = self._build_extraction_prompt(order_summary)
             
-            response = self.client.chat.completions.create(
+            start = time.perf_counter()
+            response = self._create_completion(
                 model=self.model,
                 messages=[
                     {
                         "role": "system",
-                        "content": "Você é um assistente especializado em extração de dados de resumos de pedidos. Retorne APENAS um JSON válido, sem explicações adicionais."
+                        "content": EXTRACTION_INSTRUCTIONS
                     },
                     {
                         "role": "user",
@@ -47,81 +399,311 @@ class LLMExtractor:
                 temperature=0.2,
                 max_tokens=1500
             )
+            latency = time.perf_counter() - start
             
-            # Extrai o conteúdo da resposta
-            content = response.choices[0].message.content.strip()
-            
-            # Remove marcadores de código se presentes
-            if content.startswith('```json'):
-                content = content[7:]
-            if content.startswith('```'):
-                content = content[3:]
-            if content.endswith('```'):
-                content = content[:-3]
-            
-            # Converte para dicionário
-            data = json.loads(content.strip())
+            # Converte o conteúdo da resposta para dicionário
+            data = self._parse_json_content(response.choices[0].message.content)
             
             logger.info(f"Dados extraídos com sucesso: {data.get('nome', 'desconhecido')}")
-            return data
             
         except json.JSONDecodeError as e:
             logger.error(f"Erro ao decodificar JSON: {e}")
-            return None
+            data = None
         except Exception as e:
+            if raise_rate_limit and _is_rate_limit(e):
+                raise
             logger.error(f"Erro ao extrair dados com LLM: {e}")
+            data = None
+        
+        return data, self._record_usage(response, latency, data, order_summary, prompt)
+    
+    def _split_summary(self, order_summary: str) -> Tuple[List[str], List[List[str]], bool]:
+        """
+        Separa o resumo em linhas de cabeçalho e grupos de linhas de produto.
+        
+        Linhas não reconhecidas logo após um produto (ex: adicionais) ficam
+        no grupo do produto. A lista de produtos termina no primeiro campo
+        conhecido, linha de retirada ou rótulo que não detalha produto
+        (ver summary_parser.ends_product_list); dali em diante, tudo é cabeçalho.
+        
+        Args:
+            order_summary: Texto do resumo do pedido
+            
+        Returns:
+            Tupla (linhas de cabeçalho, grupos de linhas de cada produto,
+            False se houver produtos depois do fim da lista)
+        """
+        header: List[str] = []
+        groups: List[List[str]] = []
+        in_products = False
+        contiguous = True
+        
+        for line in split_lines(order_summary):
+            kind, _, value = classify_line(line)
+            if kind == 'produto':
+                if groups and not in_products:
+                    contiguous = False
+                in_products = True
+                if value:
+                    groups.append([value])
+            elif kind == 'outro' and in_products and groups and not ends_product_list(line):
+                groups[-1].append(line)
+            else:
+                header.append(line)
+                in_products = False
+        
+        return header, groups, contiguous
+    
+    def _extract_chunked(self, order_summary: str, header: List[str], groups: List[List[str]]
+                         ) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """
+        Extrai o cabeçalho e as partes de produtos em paralelo e junta o resultado.
+        
+        Cada parte é uma chamada menor (menos tokens de saída, sem risco de
+        truncar o JSON) com o mesmo prefixo estático, aproveitando o cache de prompt.
+        Se o cabeçalho trouxer produtos (linhas que não foram reconhecidas como
+        produto), o resumo inteiro é extraído de uma vez para não perdê-los.
+        
+        Args:
+            order_summary: Texto do resumo do pedido
+            header: Linhas de cabeçalho (cliente, endereço, pagamento, totais)
+            groups: Grupos de linhas de produto, na ordem do resumo
+            
+        Returns:
+            Tupla (dados estruturados ou None, uso somado das chamadas)
+        """
+        unit_lines = [line for line in header if classify_line(line)[1] == 'unidade']
+        chunks = []
+        for start in range(0, len(groups), self.chunk_size):
+            lines = [line for group in groups[start:start + self.chunk_size] for line in group]
+            lines[0] = f"PRODUTOS SOLICITADOS: {lines[0]}"
+            chunks.append('\n'.join(unit_lines + lines))
+        
+        logger.info(f"Resumo com {len(groups)} produtos dividido em {len(chunks)} partes + cabeçalho")
+        
+        start = time.perf_counter()
+        pool = self._get_chunk_pool()
+        futures = [pool.submit(self._extract_single, text) for text in ['\n'.join(header)] + chunks]
+        results = [future.result() for future in futures]
+        latency = time.perf_counter() - start
+        
+        usage = self._merge_usage([record for _, record in results], latency)
+        if any(data is None for data, _ in results):
+            logger.error("Falha ao extrair uma das partes do resumo")
+            return None, usage
+        
+        data = results[0][0]
+        if data.get('produtos'):
+            logger.warning("Cabeçalho do resumo trouxe produtos; extraindo o resumo inteiro sem dividir")
+            data, record = self._extract_single(order_summary)
+            usage = self._merge_usage([record for _, record in results] + [record], time.perf_counter() - start)
+            return data, usage
+        
+        data['produtos'] = [
+            product
+            for chunk_data, _ in results[1:]
+            for product in (chunk_data.get('produtos') or [])
+        ]
+        return data, usage
+    
+    def _get_chunk_pool(self) -> ThreadPoolExecutor:
+        """Cria sob demanda o pool de threads das extrações em partes."""
+        with self._chunk_pool_lock:
+            if self._chunk_pool is None:
+                self._chunk_pool = ThreadPoolExecutor(
+                    max_workers=Config.EXTRACTION_CHUNK_WORKERS,
+                    thread_name_prefix='extracao-partes'
+                )
+            return self._chunk_pool
+    
+    @staticmethod
+    def _merge_usage(records: List[Optional[Dict[str, Any]]], latency: float) -> Optional[Dict[str, Any]]:
+        """
+        Soma o uso das chamadas de uma extração em partes.
+        
+        Cada chamada já foi registrada no rastreador; este resumo é apenas
+        para a resposta da requisição.
+        
+        Args:
+            records: Registros de uso de cada parte
+            latency: Tempo total da extração em segundos
+            
+        Returns:
+            Registro combinado ou None se nenhuma chamada respondeu
+        """
+        records = [record for record in records if record]
+        if not records:
+            return None
+        
+        merged = dict(records[0])
+        for field in ('tokens_prompt', 'tokens_cache', 'tokens_resposta', 'tokens_total'):
+            merged[field] = sum(record.get(field) or 0 for record in records)
+        costs = [record.get('custo_estimado_usd') for record in records]
+        merged['custo_estimado_usd'] = None if None in costs else round(sum(costs), 8)
+        merged['latencia_ms'] = round(latency * 1000, 1)
+        merged['partes'] = len(records)
+        merged.pop('alerta', None)
+        return merged
+    
+    def _record_usage(self, response: Optional['ChatCompletion'], latency: float, data: Optional[Dict[str, Any]],
+                      order_summary: str, prompt: str) -> Optional[Dict[str, Any]]:
+        """
+        Registra o uso de tokens de uma resposta do LLM.
+        
+        Args:
+            response: Resposta da API (None se a chamada falhou)
+            latency: Latência da chamada em segundos
+            data: Dados extraídos (para identificar a unidade)
+            order_summary: Resumo original
+            prompt: Parte variável do prompt enviada
+            
+        Returns:
+            Registro de uso ou None
+        """
+        if response is None or response.usage is None:
+            return None
+        
+        prompt_tokens, completion_tokens, cached_tokens = _usage_counts(response)
+        return self._track_usage(response.model or self.model, prompt_tokens, completion_tokens, cached_tokens,
+                                 latency, data, order_summary, len(EXTRACTION_INSTRUCTIONS) + len(prompt))
+    
+    def _record_batch_usage(self, response: Optional['ChatCompletion'], latency: float,
+                            results: List[Optional[Dict[str, Any]]], order_summaries: List[str],
+                            prompt: str) -> List[Optional[Dict[str, Any]]]:
+        """
+        Divide o uso de uma chamada em lote entre os pedidos e registra cada parcela.
+        
+        A divisão é proporcional ao tamanho de cada resumo e soma exatamente
+        os tokens da chamada, de modo que os totais por unidade não dupliquem
+        o lote nem o atribuam todo a uma só unidade.
+        
+        Args:
+            response: Resposta da API (None se a chamada falhou)
+            latency: Latência da chamada em segundos
+            results: Dados extraídos de cada resumo (para identificar a unidade)
+            order_summaries: Resumos do lote
+            prompt: Parte variável do prompt enviada
+            
+        Returns:
+            Registro de uso de cada resumo, na mesma ordem (None se não houve resposta)
+        """
+        if response is None or response.usage is None:
+            return [None] * len(order_summaries)
+        
+        weights = [len(summary) or 1 for summary in order_summaries]
+        prompt_tokens, completion_tokens, cached_tokens = _usage_counts(response)
+        shares = zip(
+            _split_proportionally(prompt_tokens, weights),
+            _split_proportionally(completion_tokens, weights),
+            _split_proportionally(cached_tokens, weights)
+        )
+        model = response.model or self.model
+        prompt_chars = len(EXTRACTION_INSTRUCTIONS) + len(prompt)
+        
+        return [
+            self._track_usage(model, prompt_share, completion_share, min(cached_share, prompt_share),
+                              latency, data, summary, prompt_chars, tamanho_lote=len(order_summaries))
+            for data, summary, (prompt_share, completion_share, cached_share)
+            in zip(results, order_summaries, shares)
+        ]
+    
+    def _track_usage(self, model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int,
+                     latency: float, data: Optional[Dict[str, Any]], order_summary: str, prompt_chars: int,
+                     **extra: Any) -> Optional[Dict[str, Any]]:
+        """Envia um registro de uso ao rastreador, sem deixar falhas dele chegarem à extração."""
+        try:
+            return self.usage_tracker.record(
+                model=model,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                latency=latency,
+                unidade=data.get('unidade') if isinstance(data, dict) else None,
+                cached_tokens=cached_tokens,
+                prompt_version=PROMPT_VERSION,
+                caracteres_resumo=len(order_summary),
+                caracteres_prompt=prompt_chars,
+                extracao_ok=data is not None,
+                **extra
+            )
+        except Exception as e:
+            logger.error(f"Erro ao registrar uso do LLM: {e}")
             return None
     
+    def _create_completion(self, **params) -> 'ChatCompletion':
+        """
+        Chama a API de chat do OpenAI passando pelo cassete de gravação/reprodução.
+        
+        Args:
+            **params: Parâmetros de chat.completions.create
+            
+        Returns:
+            Resposta da API (real ou reproduzida)
+        """
+        from openai.types.chat import ChatCompletion
+        
+        return self.cassette.call(
+            'openai',
+            params,
+            lambda: self.client.chat.completions.create(**params),
+            serialize=lambda response: response.model_dump(mode='json'),
+            deserialize=ChatCompletion.model_validate,
+            deserialize_error=_replay_openai_error
+        )
+    
+    @staticmethod
+    def _parse_json_content(content: str) -> Any:
+        """
+        Converte o texto da resposta em JSON, removendo marcadores de código.
+        
+        Args:
+            content: Conteúdo da mensagem do LLM
+            
+        Returns:
+            Objeto JSON decodificado
+        """
+        content = content.strip()
+        
+        # Remove marcadores de código se presentes
+        if content.startswith('```json'):
+            content = content[7:]
+        if content.startswith('```'):
+            content = content[3:]
+        if content.endswith('```'):
+            content = content[:-3]
+        
+        return json.loads(content.strip())
+    
+    def _build_batch_prompt(self, order_summaries: List[str]) -> str:
+        """
+        Constrói a mensagem do usuário de um lote de resumos.
+        
+        Args:
+            order_summaries: Resumos dos pedidos
+            
+        Returns:
+            Mensagem com os resumos numerados e o formato de resposta do lote
+        """
+        parts = [
+            f"Extraia cada um dos {len(order_summaries)} resumos abaixo de forma independente. "
+            'Retorne APENAS um JSON no formato {"pedidos": [{"id": "1", "dados": {...}}, ...]}, '
+            "com um item por resumo, usando o id informado e a estrutura acima em \"dados\"."
+        ]
+        for number, summary in enumerate(order_summaries, 1):
+            parts.append(f"=== PEDIDO id={number} ===\n{self._build_extraction_prompt(summary)}")
+        return '\n\n'.join(parts)
+    
     def _build_extraction_prompt(self, order_summary: str) -> str:
         """
-        Constrói o prompt para extração de dados.
+        Constrói a parte variável do prompt de extração.
+        
+        As instruções, o schema e os exemplos ficam no prefixo estático
+        EXTRACTION_INSTRUCTIONS (mensagem de sistema); aqui entra apenas o resumo,
+        sempre no final, para que o prefixo seja compartilhado entre requisições.
         
         Args:
             order_summary: Texto do resumo do pedido
             
         Returns:
-            Prompt formatado para o LLM
+            Mensagem do usuário com o resumo
         """
-        return f"""
-Analise o seguinte resumo de pedido e extraia os dados em formato JSON estruturado.
-
-RESUMO DO PEDIDO:
-{order_summary}
-
-Extraia os seguintes dados:
-- nome: Nome do cliente
-- telefone: Telefone sem formatação (apenas números)
-- unidade: Nome da unidade/loja
-- produtos: Lista de produtos com nome (apenas o nome base, ex: 'Nordestina'), tipo (ex: 'Pizza', 'Refrigerante'), tamanho (em minúsculas, ex: 'grande') e preço
-- endereco: Endereço completo (se for entrega)
-- bairro: Nome do bairro (se for entrega)
-- taxa_entrega: Valor da taxa (0 se for retirada)
-- valor_total: Valor total do pedido
-- forma_pagamento: Forma de pagamento
-- troco: Valor do troco (se houver)
-- observacoes: Observações do pedido
-- tipo_entrega: "entrega" ou "retirada"
-
-Retorne APENAS um JSON válido com a seguinte estrutura:
-{{
-  "nome": "string",
-  "telefone": "string",
-  "unidade": "string",
-  "produtos": [
-    {{
-      "nome": "string",
-      "tipo_produto": "string",
-      "tamanho": "string",
-      "preco": number
-    }}
-  ],
-  "endereco": "string ou null",
-  "bairro": "string ou null",
-  "taxa_entrega": number,
-  "valor_total": number,
-  "forma_pagamento": "string",
-  "troco": number ou null,
-  "observacoes": "string ou null",
-  "tipo_entrega": "entrega" ou "retirada"
-}}
-"""
+        return f"RESUMO DO PEDIDO:\n{order_summary}"
@@ -0,0 +1,640 @@
+"""
+Micro-benchmarks das funções mais chamadas em cada validação.
+
+Mede o tempo por chamada e a memória alocada (tracemalloc) da normalização
+de texto, das buscas e da montagem do cardápio, da validação de pedidos,
+do resumo da validação e da leitura do JSON devolvido pelo LLM, com
+cardápios sintéticos de 10 a 100 mil linhas e pedidos de 1 a 50 itens.
+Roda sem rede, e os resultados podem ser comparados com uma baseline
+gravada para apontar regressões.
+
+Para a comparação não depender da velocidade da máquina naquele momento,
+cada caso é medido junto de um laço de calibração em Python puro e
+comparado pela razão entre os dois ('relativo'). Um caso só é apontado como
+regressão se continuar acima da tolerância ao ser medido de novo, e os
+expoentes de escala são comparados à parte (mudança de complexidade).
+
+Uso:
+    python microbench.py
+    python microbench.py --rapido --filtro validate_order
+    python microbench.py --salvar-baseline
+    python microbench.py --baseline microbench_baseline.json --tolerancia 0.5 --confirmacoes 2
+"""
+
+import argparse
+import gc
+import itertools
+import json
+import math
+import platform
+import random
+import sys
+import time
+import timeit
+import tracemalloc
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+DEFAULT_BASELINE_PATH = 'microbench_baseline.json'
+
+CATALOG_SIZES = (10, 100, 1000, 10000, 100000)
+ORDER_SIZES = (1, 5, 20, 50)
+QUICK_CATALOG_SIZES = (10, 1000, 10000)
+QUICK_ORDER_SIZES = (1, 20)
+
+SABORES = [
+    'Calabresa', 'Frango com Catupiry', 'Portuguesa', 'Quatro Queijos', 'Marguerita',
+    'Nordestina', 'Brigadeiro', 'Romeu e Julieta', 'Atum', 'Palmito', 'Bacon', 'Lombo Canadense'
+]
+TAMANHOS = ['pequena', 'média', 'grande']
+BAIRROS = ['Setor Leste', 'Vila Cristina', 'Jardim América', 'Centro', 'Setor Sul', 'Vila Nova']
+
+# Regressão: tempo relativo à calibração acima da baseline além da tolerância
+# (e confirmado em CONFIRMATIONS novas medições), pico de memória acima da
+# tolerância e de MIN_MEMORY_DELTA bytes, ou expoente de escala maior que o da
+# baseline em mais de MAX_EXPONENT_DELTA
+DEFAULT_TOLERANCE = 0.5
+DEFAULT_CONFIRMATIONS = 2
+MIN_MEMORY_DELTA = 1024
+MAX_EXPONENT_DELTA = 0.3
+
+# Iterações do laço de calibração (cerca de 1 ms por chamada) e chamadas
+# do laço medidas junto de cada rodada de um caso
+CALIBRATION_ITERATIONS = 2000
+CALIBRATION_CALLS = 20
+
+Case = Tuple[str, Dict[str, int], Callable[[], Callable[[], Any]]]
+
+
+def synthetic_catalog(rows: int, seed: int = 7) -> Dict[str, List[Dict]]:
+    """
+    Gera um cardápio sintético.
+
+    Args:
+        rows: Número de linhas em 'produtos' (bairros e adicionais crescem junto)
+        seed: Semente para gerar sempre o mesmo cardápio
+
+    Returns:
+        Dicionário {tabela: linhas}
+    """
+    rnd = random.Random(seed)
+    products = []
+    for index in range(rows):
+        sabor = SABORES[index % len(SABORES)]
+        tamanho = TAMANHOS[(index // len(SABORES)) % len(TAMANHOS)]
+        lote = index // (len(SABORES) * len(TAMANHOS))
+        products.append({
+            'nome': f"{sabor} {lote}" if lote else sabor,
+            'tipo_produto': 'Pizza',
+            'tamanho': tamanho,
+            'preco': rnd.randint(2000, 9000) / 100,
+            'status': 'Disponível',
+            'unidade': None
+        })
+
+    neighborhoods = [
+        {'nome': f"{BAIRROS[index % len(BAIRROS)]} {index // len(BAIRROS)}", 'taxa': rnd.randint(0, 12),
+         'status': 'Disponível', 'unidade': None}
+        for index in range(max(5, rows // 50))
+    ]
+    additionals = [
+        {'nome': f"Borda {sabor}", 'tamanho': tamanho, 'preco': rnd.randint(500, 1500) / 100,
+         'status': 'Disponível', 'unidade': None}
+        for sabor in SABORES[:5] for tamanho in TAMANHOS
+    ]
+    return {'produtos': products, 'bairros': neighborhoods, 'adicionais': additionals}
+
+
+def synthetic_order(catalog: Dict[str, List[Dict]], items: int, rnd: random.Random,
+                    error_rate: float = 0.2) -> Dict[str, Any]:
+    """
+    Gera os dados extraídos de um pedido de entrega, com preços errados em parte dos itens.
+
+    Args:
+        catalog: Cardápio gerado por synthetic_catalog
+        items: Número de itens
+        rnd: Gerador aleatório
+        error_rate: Probabilidade de cada item vir com preço errado
+
+    Returns:
+        Dicionário no formato devolvido pelo LLMExtractor
+    """
+    rows = [rnd.choice(catalog['produtos']) for _ in range(items)]
+    products = []
+    for row in rows:
+        preco = row['preco'] + (5 if rnd.random() < error_rate else 0)
+        # Variações de caixa como chegam do LLM
+        products.append({
+            'nome': row['nome'].upper() if rnd.random() < 0.3 else row['nome'],
+            'tipo_produto': row['tipo_produto'],
+            'tamanho': row['tamanho'],
+            'preco': preco
+        })
+
+    bairro = rnd.choice(catalog['bairros'])
+    total = sum(product['preco'] for product in products) + bairro['taxa']
+    return {
+        'nome': 'Cliente Teste',
+        'telefone': '62999998888',
+        'unidade': 'Maria Dilce',
+        'produtos': products,
+        'endereco': f"Rua 10, {bairro['nome']}",
+        'bairro': bairro['nome'],
+        'taxa_entrega': bairro['taxa'],
+        'valor_total': total,
+        'forma_pagamento': 'Pix',
+        'troco': None,
+        'observacoes': None,
+        'tipo_entrega': 'entrega'
+    }
+
+
+def _cycle(values: List[Any]) -> Callable[[], Any]:
+    """Retorna uma função que devolve os valores em rodízio."""
+    return itertools.cycle(values).__next__
+
+
+def _static_client(rows: int):
+    from database import StaticCatalogClient
+
+    client = StaticCatalogClient(synthetic_catalog(rows))
+    client.snapshot()
+    return client
+
+
+# Cada caso é (nome, parâmetros, preparo); o preparo fica fora da medição e
+# devolve a função medida.
+
+def _normalize_cases(quick: bool) -> List[Case]:
+    import text_normalization
+
+    def warm():
+        texts = _cycle([f"{sabor} {tamanho}" for sabor in SABORES for tamanho in TAMANHOS])
+        return lambda: text_normalization.normalize_text(texts())
+
+    def cold(words: int):
+        # Sem o cache LRU: custo da tradução e dos sinônimos para textos nunca vistos
+        rnd = random.Random(words)
+        texts = _cycle([
+            ' '.join(rnd.choice(SABORES + TAMANHOS + ['GDE', 'Refri', 'Média']) for _ in range(words))
+            for _ in range(256)
+        ])
+        normalize = text_normalization._normalize.__wrapped__
+        return lambda: normalize(texts())
+
+    cases: List[Case] = [('normalize_text', {'cache': 1}, warm)]
+    for words in ((2, 20) if quick else (2, 8, 20)):
+        cases.append(('normalize_text', {'cache': 0, 'palavras': words}, lambda words=words: cold(words)))
+    return cases
+
+
+def _catalog_cases(quick: bool) -> List[Case]:
+    from catalog import CatalogSnapshot
+
+    def lookup(rows: int):
+        client = _static_client(rows)
+        rnd = random.Random(rows)
+        sample = rnd.sample(client.catalog['produtos'], min(rows, 500))
+        keys = _cycle([(row['nome'], row['tamanho'], row['tipo_produto']) for row in sample])
+
+        def run():
+            nome, tamanho, tipo = keys()
+            return client.get_product_by_name_and_size(nome, tamanho, tipo)
+        return run
+
+    def build(rows: int):
+        tables = synthetic_catalog(rows)
+        return lambda: CatalogSnapshot(tables)
+
+    cases: List[Case] = []
+    for rows in (QUICK_CATALOG_SIZES if quick else CATALOG_SIZES):
+        cases.append(('get_product_by_name_and_size', {'linhas': rows}, lambda rows=rows: lookup(rows)))
+    for rows in (QUICK_CATALOG_SIZES if quick else CATALOG_SIZES):
+        cases.append(('CatalogSnapshot', {'linhas': rows}, lambda rows=rows: build(rows)))
+    return cases
+
+
+def _validate_cases(quick: bool) -> List[Case]:
+    from database import OrderValidator
+
+    def validate(rows: int, items: int):
+        client = _static_client(rows)
+        # Sem o cache de resultados, para medir a validação em si
+        validator = OrderValidator(client, cache_size=0)
+        rnd = random.Random(rows * 100 + items)
+        orders = _cycle([synthetic_order(client.catalog, items, rnd) for _ in range(64)])
+        return lambda: validator.validate_order(orders())
+
+    cases: List[Case] = []
+    for items in (QUICK_ORDER_SIZES if quick else ORDER_SIZES):
+        cases.append(('validate_order', {'linhas': 1000, 'itens': items},
+                      lambda items=items: validate(1000, items)))
+    for rows in (QUICK_CATALOG_SIZES if quick else CATALOG_SIZES):
+        if rows != 1000:
+            cases.append(('validate_order', {'linhas': rows, 'itens': 5},
+                          lambda rows=rows: validate(rows, 5)))
+    return cases
+
+
+def _summary_cases(quick: bool) -> List[Case]:
+    from database import OrderValidator
+
+    def build(items: int):
+        errors = [f"Preço incorreto para 'Sabor {i}': informado R$ 10.00, correto R$ 12.00"
+                  for i in range(items)] + ['Valor total incorreto']
+        corrections = [{'produto': f"Sabor {i}", 'preco_informado': 10.0, 'preco_correto': 12.0}
+                       for i in range(items)] + [{'valor_calculado': 12.0 * items}]
+        return lambda: OrderValidator._build_summary(False, errors, corrections)
+
+    return [('_build_summary', {'itens': items}, lambda items=items: build(items))
+            for items in (QUICK_ORDER_SIZES if quick else ORDER_SIZES)]
+
+
+def _parse_cases(quick: bool) -> List[Case]:
+    from llm_extractor import LLMExtractor
+
+    def parse(items: int):
+        order = synthetic_order(synthetic_catalog(max(items, 10)), items, random.Random(items))
+        content = '```json\n' + json.dumps(order, ensure_ascii=False, indent=2) + '\n```'
+        return lambda: LLMExtractor._parse_json_content(content)
+
+    return [('_parse_json_content', {'itens': items}, lambda items=items: parse(items))
+            for items in (QUICK_ORDER_SIZES if quick else ORDER_SIZES)]
+
+
+SUITES = (_normalize_cases, _catalog_cases, _validate_cases, _summary_cases, _parse_cases)
+
+
+def case_key(name: str, params: Dict[str, int]) -> str:
+    """Identificador estável de um caso (ex: 'validate_order[itens=5,linhas=1000]')."""
+    return f"{name}[{','.join(f'{key}={value}' for key, value in sorted(params.items()))}]"
+
+
+def _calibration_loop():
+    """Trabalho fixo em Python puro com as mesmas operações dos casos (dict, texto, tupla, float)."""
+    table = {f"sabor {index}": index / 4 for index in range(64)}
+    total = 0.0
+    for index in range(CALIBRATION_ITERATIONS):
+        name = f"SABOR {index % 64}".lower()
+        key = (name, index & 3)
+        total += table.get(key[0], 0.0) * 1.5
+    return total
+
+
+def calibrate(calls: int = CALIBRATION_CALLS) -> float:
+    """
+    Mede o laço de calibração, para normalizar os tempos pela velocidade atual da máquina.
+
+    Args:
+        calls: Chamadas do laço na medição
+
+    Returns:
+        Tempo médio de uma chamada do laço, em segundos
+    """
+    return timeit.timeit(_calibration_loop, number=calls) / calls
+
+
+def measure(fn: Callable[[], Any], repeat: int = 5, min_time: float = 0.2,
+            alloc_calls: int = 50) -> Dict[str, Any]:
+    """
+    Mede o tempo por chamada e a memória alocada de uma função.
+
+    Cada rodada de tempo é seguida de uma medição do laço de calibração, e
+    'relativo' é a mediana das razões entre as duas: a calibração vê a
+    máquina no mesmo estado (frequência da CPU, carga de vizinhos) que a rodada.
+
+    Args:
+        fn: Função sem argumentos
+        repeat: Número de rodadas de tempo
+        min_time: Duração mínima (segundos) de cada rodada
+        alloc_calls: Chamadas máximas medidas com tracemalloc
+
+    Returns:
+        Dicionário com 'melhor_us', 'mediana_us', 'relativo', 'calibracao_us',
+        'chamadas', 'pico_bytes' e 'retido_bytes'
+    """
+    fn()
+    timer = timeit.Timer(fn)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9) * 1.1))
+
+    rounds = []
+    calibrations = []
+    for _ in range(repeat):
+        rounds.append(timer.timeit(number) / number)
+        calibrations.append(calibrate())
+    ratios = sorted(case / calibration for case, calibration in zip(rounds, calibrations))
+    rounds.sort()
+    calibrations.sort()
+
+    # Memória: pico durante as chamadas e o que continua alocado depois delas
+    calls = max(1, min(alloc_calls, number))
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for _ in range(calls):
+            fn()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'melhor_us': round(rounds[0] * 1e6, 3),
+        'mediana_us': round(rounds[len(rounds) // 2] * 1e6, 3),
+        'relativo': round(ratios[len(ratios) // 2], 6),
+        'calibracao_us': round(calibrations[len(calibrations) // 2] * 1e6, 3),
+        'chamadas': number,
+        'pico_bytes': max(0, peak - before),
+        'retido_bytes': max(0, round((current - before) / calls))
+    }
+
+
+def run_suite(quick: bool = False, pattern: Optional[str] = None, repeat: int = 5,
+              progress=None, keys: Optional[Set[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Executa os micro-benchmarks.
+
+    Além do tempo, cada caso traz 'relativo': o tempo dividido pelo do laço
+    de calibração medido nas mesmas rodadas (ver measure).
+
+    Args:
+        quick: Usa menos tamanhos de cardápio e de pedido
+        pattern: Só executa os casos cujo identificador contém este texto
+        repeat: Rodadas de tempo por caso
+        progress: Arquivo onde escrever o andamento (opcional)
+        keys: Só executa os casos com estes identificadores (opcional)
+
+    Returns:
+        Dicionário {identificador do caso: medidas}
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    for suite in SUITES:
+        for name, params, setup in suite(quick):
+            key = case_key(name, params)
+            if pattern and pattern not in key:
+                continue
+            if keys is not None and key not in keys:
+                continue
+            fn = setup()
+            results[key] = {'funcao': name, 'parametros': params, **measure(fn, repeat=repeat)}
+            del fn
+            if progress:
+                progress.write(f"{key:<55} {results[key]['melhor_us']:>12.2f} us\n")
+                progress.flush()
+    return results
+
+
+def scaling(results: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Estima como o tempo cresce com cada parâmetro (expoente da curva log-log).
+
+    Um expoente perto de 0 indica custo constante; perto de 1, linear.
+
+    Args:
+        results: Resultados de run_suite
+
+    Returns:
+        Lista com função, parâmetro variado, pontos (valor, us) e expoente
+    """
+    curves: Dict[Tuple[str, str, Tuple], List[Tuple[int, float]]] = {}
+    for result in results.values():
+        params = result['parametros']
+        for varied in params:
+            fixed = tuple(sorted((key, value) for key, value in params.items() if key != varied))
+            curves.setdefault((result['funcao'], varied, fixed), []).append(
+                (params[varied], result['melhor_us'])
+            )
+
+    report = []
+    for (name, varied, fixed), points in curves.items():
+        points.sort()
+        if len(points) < 3 or points[0][0] <= 0:
+            continue
+        (x0, y0), (x1, y1) = points[0], points[-1]
+        exponent = math.log(y1 / y0) / math.log(x1 / x0) if y0 > 0 and y1 > 0 else None
+        report.append({
+            'funcao': name,
+            'parametro': varied,
+            'fixos': dict(fixed),
+            'pontos': points,
+            'expoente': round(exponent, 2) if exponent is not None else None
+        })
+    return report
+
+
+def _slower(result: Dict[str, Any], reference: Dict[str, Any], tolerance: float) -> bool:
+    """Indica se o caso ficou mais lento que a baseline além da tolerância (pelo tempo relativo, se houver)."""
+    measure_key = 'relativo' if 'relativo' in result and 'relativo' in reference else 'melhor_us'
+    return result[measure_key] > reference[measure_key] * (1 + tolerance)
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+            tolerance: float = DEFAULT_TOLERANCE) -> List[Dict[str, Any]]:
+    """
+    Compara os resultados com a baseline.
+
+    O tempo é comparado pela razão com o laço de calibração ('relativo'),
+    que desconta a velocidade da máquina no momento de cada medição.
+    Baselines antigas, sem essa razão, são comparadas pelo tempo absoluto.
+
+    Args:
+        results: Resultados de run_suite
+        baseline: Resultados gravados anteriormente
+        tolerance: Aumento relativo aceito (0.5 = 50%)
+
+    Returns:
+        Lista de regressões (caso, medida, valor da baseline, valor atual)
+    """
+    regressions = []
+    for key, result in results.items():
+        reference = baseline.get(key)
+        if not reference:
+            continue
+        if _slower(result, reference, tolerance):
+            measure_key = 'relativo' if 'relativo' in result and 'relativo' in reference else 'melhor_us'
+            regressions.append({'caso': key, 'medida': measure_key,
+                                'baseline': reference[measure_key], 'atual': result[measure_key]})
+        peak = result['pico_bytes']
+        if peak > reference['pico_bytes'] * (1 + tolerance) and peak - reference['pico_bytes'] > MIN_MEMORY_DELTA:
+            regressions.append({'caso': key, 'medida': 'pico_bytes',
+                                'baseline': reference['pico_bytes'], 'atual': peak})
+    return regressions
+
+
+def confirm(regressions: List[Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], quick: bool,
+            repeat: int, tolerance: float = DEFAULT_TOLERANCE,
+            confirmations: int = DEFAULT_CONFIRMATIONS, progress=None) -> List[Dict[str, Any]]:
+    """
+    Mede de novo os casos mais lentos e mantém só as regressões que se repetem.
+
+    Uma medição isolada pode sair lenta por ruído da máquina; a regressão de
+    tempo só é mantida se todas as novas medições também passarem da tolerância.
+    As de memória não dependem da carga da máquina e são mantidas.
+
+    Args:
+        regressions: Resultado de compare
+        baseline: Resultados gravados anteriormente
+        quick: Mesmo modo usado em run_suite
+        repeat: Rodadas de tempo por caso
+        tolerance: Aumento relativo aceito
+        confirmations: Novas medições exigidas de cada caso
+        progress: Arquivo onde escrever o andamento (opcional)
+
+    Returns:
+        Regressões confirmadas
+    """
+    pending = {regression['caso'] for regression in regressions if regression['medida'] != 'pico_bytes'}
+    for _ in range(confirmations):
+        if not pending:
+            break
+        if progress:
+            progress.write(f"Confirmando {len(pending)} caso(s) mais lento(s)...\n")
+        rerun = run_suite(quick=quick, repeat=repeat, keys=pending, progress=progress)
+        pending = {key for key in pending if key in rerun and _slower(rerun[key], baseline[key], tolerance)}
+
+    return [
+        regression for regression in regressions
+        if regression['medida'] == 'pico_bytes' or regression['caso'] in pending
+    ]
+
+
+def compare_scaling(curves: List[Dict[str, Any]], baseline_curves: List[Dict[str, Any]],
+                    max_delta: float = MAX_EXPONENT_DELTA) -> List[Dict[str, Any]]:
+    """
+    Compara os expoentes de escala com os da baseline.
+
+    O expoente vem da razão entre tempos de uma mesma execução, então não
+    depende da velocidade da máquina; só curvas com os mesmos extremos são comparadas.
+
+    Args:
+        curves: Resultado de scaling para a execução atual
+        baseline_curves: Resultado de scaling para a baseline
+        max_delta: Aumento máximo aceito do expoente
+
+    Returns:
+        Lista de regressões de escala
+    """
+    def curve_key(curve):
+        points = curve['pontos']
+        return curve['funcao'], curve['parametro'], tuple(sorted(curve['fixos'].items())), \
+            points[0][0], points[-1][0]
+
+    reference = {curve_key(curve): curve['expoente'] for curve in baseline_curves}
+    regressions = []
+    for curve in curves:
+        expected = reference.get(curve_key(curve))
+        if expected is None or curve['expoente'] is None:
+            continue
+        if curve['expoente'] > expected + max_delta:
+            fixed = ','.join(f'{key}={value}' for key, value in curve['fixos'].items())
+            regressions.append({
+                'caso': f"{curve['funcao']} por {curve['parametro']}" + (f" ({fixed})" if fixed else ''),
+                'medida': 'expoente',
+                'baseline': expected,
+                'atual': curve['expoente']
+            })
+    return regressions
+
+
+def load_baseline(path: str) -> Optional[Dict[str, Dict[str, Any]]]:
+    """Lê a baseline gravada (None se o arquivo não existir)."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)['resultados']
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(path: str, results: Dict[str, Dict[str, Any]]):
+    """Grava os resultados como baseline, com a identificação do ambiente."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'gerado_em': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'resultados': results
+        }, f, ensure_ascii=False, indent=2)
+        f.write('\n')
+
+
+def _format_report(results: Dict[str, Dict[str, Any]], baseline: Optional[Dict[str, Dict[str, Any]]],
+                   curves: List[Dict[str, Any]]) -> Iterator[str]:
+    yield f"{'caso':<55} {'us/chamada':>12} {'relativo':>10} {'baseline':>10} {'pico':>10} {'retido':>8}"
+    for key, result in results.items():
+        reference = (baseline or {}).get(key)
+        base = f"{reference['relativo']:>10.4f}" if reference and 'relativo' in reference else f"{'-':>10}"
+        yield (f"{key:<55} {result['melhor_us']:>12.2f} {result['relativo']:>10.4f} {base} "
+               f"{result['pico_bytes']:>10} {result['retido_bytes']:>8}")
+
+    yield ''
+    yield 'Escala (expoente log-log: ~0 constante, ~1 linear):'
+    for curve in curves:
+        fixed = ','.join(f'{key}={value}' for key, value in curve['fixos'].items())
+        points = '  '.join(f"{x}:{y:.1f}us" for x, y in curve['pontos'])
+        yield f"  {curve['funcao']} por {curve['parametro']}" + (f" ({fixed})" if fixed else '') + \
+            f": expoente {curve['expoente']}  [{points}]"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Ponto de entrada da linha de comando."""
+    parser = argparse.ArgumentParser(description='Micro-benchmarks das funções críticas da validação.')
+    parser.add_argument('--rapido', action='store_true', help='Menos tamanhos de cardápio e de pedido')
+    parser.add_argument('--filtro', default=None, help="Só os casos que contêm este texto (ex: 'validate_order')")
+    parser.add_argument('--repeticoes', type=int, default=5, help='Rodadas de tempo por caso')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE_PATH, help='Arquivo JSON da baseline')
+    parser.add_argument('--salvar-baseline', action='store_true', help='Grava os resultados como nova baseline')
+    parser.add_argument('--tolerancia', type=float, default=DEFAULT_TOLERANCE,
+                        help='Aumento relativo aceito antes de apontar regressão (0.5 = 50%%)')
+    parser.add_argument('--confirmacoes', type=int, default=DEFAULT_CONFIRMATIONS,
+                        help='Novas medições que um caso mais lento precisa repetir para ser apontado')
+    parser.add_argument('--saida', default=None, help='Grava os resultados completos em JSON')
+    args = parser.parse_args(argv)
+
+    results = run_suite(quick=args.rapido, pattern=args.filtro, repeat=max(1, args.repeticoes),
+                        progress=sys.stderr)
+    baseline = None if args.salvar_baseline else load_baseline(args.baseline)
+    curves = scaling(results)
+
+    for line in _format_report(results, baseline, curves):
+        print(line)
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump({'resultados': results, 'escala': curves}, f, ensure_ascii=False, indent=2)
+
+    if args.salvar_baseline:
+        if args.filtro or args.rapido:
+            # Uma baseline parcial deixaria casos sem referência
+            merged = load_baseline(args.baseline) or {}
+            merged.update(results)
+            results = merged
+        save_baseline(args.baseline, results)
+        print(f"\nBaseline gravada em {args.baseline} ({len(results)} casos)")
+        return 0
+
+    if baseline is None:
+        print(f"\nSem baseline em {args.baseline}; use --salvar-baseline para criar")
+        return 0
+
+    regressions = confirm(compare(results, baseline, args.tolerancia), baseline, quick=args.rapido,
+                          repeat=max(1, args.repeticoes), tolerance=args.tolerancia,
+                          confirmations=max(0, args.confirmacoes), progress=sys.stderr)
+    regressions += compare_scaling(curves, scaling({key: baseline[key] for key in results if key in baseline}))
+    if not regressions:
+        print(f"\nNenhuma regressão acima de {args.tolerancia:.0%} em relação à baseline")
+        return 0
+
+    print(f"\n{len(regressions)} regressão(ões) acima de {args.tolerancia:.0%}:")
+    for regression in regressions:
+        print(f"  {regression['caso']} {regression['medida']}: "
+              f"{regression['baseline']} -> {regression['atual']}")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
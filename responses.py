@@ -0,0 +1,150 @@
+"""
+Módulo de serialização e compressão das respostas da API.
+
+Usa orjson quando instalado (com json da biblioteca padrão como fallback),
+permite escolher os campos da resposta e comprime com br/gzip conforme o
+cabeçalho Accept-Encoding do cliente.
+"""
+
+import gzip
+import json
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from flask import Response, request
+from config import Config
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Campos devolvidos no modo compacto de /api/validate-order
+SLIM_FIELDS = ('status', 'pedido_valido', 'validacao.erros', 'validacao.correcoes')
+
+
+def dumps(payload: Any) -> bytes:
+    """
+    Serializa o payload em JSON (UTF-8).
+
+    Args:
+        payload: Objeto serializável
+
+    Returns:
+        JSON em bytes
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # Tipos que o orjson não serializa (ex: inteiros acima de 64 bits)
+            pass
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def requested_fields(data: Optional[Dict[str, Any]]) -> Tuple[Optional[List[str]], Optional[str]]:
+    """
+    Lê os campos pedidos pelo cliente.
+
+    Aceita 'campos' no JSON (lista de textos ou texto separado por vírgulas),
+    o parâmetro de URL ?fields= ou 'resposta': 'compacta' (atalho para SLIM_FIELDS).
+
+    Args:
+        data: JSON da requisição
+
+    Returns:
+        Tupla (lista de caminhos, ex: 'validacao.erros', ou None para a
+        resposta completa; mensagem de erro)
+    """
+    data = data or {}
+    fields = data.get('campos') or request.args.get('fields')
+    if fields:
+        if isinstance(fields, str):
+            fields = fields.split(',')
+        elif not isinstance(fields, list) or not all(isinstance(field, str) for field in fields):
+            return None, 'Campo "campos" deve ser uma lista de textos ou um texto separado por vírgulas'
+        return [field.strip() for field in fields if field.strip()], None
+    if data.get('resposta') == 'compacta' or request.args.get('resposta') == 'compacta':
+        return list(SLIM_FIELDS), None
+    return None, None
+
+
+def select_fields(payload: Dict[str, Any], fields: Iterable[str]) -> Dict[str, Any]:
+    """
+    Mantém apenas os caminhos pedidos, preservando o aninhamento.
+
+    Args:
+        payload: Resposta completa
+        fields: Caminhos separados por ponto (ex: 'validacao.erros')
+
+    Returns:
+        Resposta reduzida ('status' é sempre mantido)
+    """
+    selected: Dict[str, Any] = {'status': payload.get('status')}
+    for path in fields:
+        parts = path.split('.')
+        source: Any = payload
+        for part in parts:
+            if not isinstance(source, dict) or part not in source:
+                break
+            source = source[part]
+        else:
+            target = selected
+            for part in parts[:-1]:
+                target = target.setdefault(part, {})
+            target[parts[-1]] = source
+    return selected
+
+
+def json_response(payload: Any, status: int = 200) -> Response:
+    """
+    Monta a resposta JSON, comprimida se o cliente aceitar.
+
+    Args:
+        payload: Objeto serializável
+        status: Código HTTP
+
+    Returns:
+        Resposta Flask
+    """
+    body = dumps(payload)
+    response = Response(body, status=status, mimetype='application/json')
+
+    if not Config.RESPONSE_COMPRESSION or len(body) < Config.RESPONSE_COMPRESSION_MIN_BYTES:
+        return response
+
+    encoding = _negotiate_encoding(request.headers.get('Accept-Encoding', ''))
+    if encoding == 'br':
+        response.set_data(brotli.compress(body, quality=5))
+    elif encoding == 'gzip':
+        response.set_data(gzip.compress(body, compresslevel=6))
+    else:
+        return response
+
+    response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
+def _negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Escolhe br ou gzip conforme o Accept-Encoding (respeitando q=0)."""
+    accepted = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+
+    if brotli is not None and accepted.get('br', 0) > 0:
+        return 'br'
+    if accepted.get('gzip', 0) > 0 or (accepted.get('*', 0) > 0 and 'gzip' not in accepted):
+        return 'gzip'
+    return None
@@ -0,0 +1,235 @@
+"""
+Módulo de leitura local (sem LLM) das linhas de um resumo do FiqOn.
+
+Reconhece as linhas de campo ("TAXA DE ENTREGA: R$ 3,00") e as linhas de
+produto ("1 Pizza grande Mussarela - R$ 45,00"), casando os produtos com
+o cardápio. Usado quando apenas algumas linhas do resumo mudaram.
+"""
+
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from catalog import CatalogSnapshot, normalize_text
+
+FIELD_LABELS = {
+    'nome': 'nome',
+    'telefone': 'telefone',
+    'unidade': 'unidade',
+    'produtos solicitados': 'produtos',
+    'produtos': 'produtos',
+    'endereco': 'endereco',
+    'taxa de entrega': 'taxa_entrega',
+    'valor total': 'valor_total',
+    'total': 'valor_total',
+    'forma de pagamento': 'forma_pagamento',
+    'pagamento': 'forma_pagamento',
+    'troco': 'troco',
+    'observacoes': 'observacoes',
+    'observacao': 'observacoes'
+}
+PRICE_FIELDS = ('taxa_entrega', 'valor_total', 'troco')
+# Rótulos que detalham o produto da linha anterior (ex: 'Borda: catupiry')
+PRODUCT_DETAIL_LABELS = ('adicional', 'adicionais', 'borda', 'sabor', 'sabores', 'complemento', 'obs')
+PICKUP_MARKERS = ('retirada na loja', 'retirar na loja', 'retirada no balcao')
+
+_FIELD_RE = re.compile(r"^[^\w]*([A-Za-zÀ-ÿ ]{3,30}?)\s*:\s*(.*)$")
+_PRODUCT_RE = re.compile(
+    r"^(\d+)\s*(?:x|un\.?|unid\.?)?\s+(.+?)\s*(?:-|–|:|\.\.\.)\s*"
+    r"((?:R\$|RS)?\s*\d[\d.]*(?:,\d{1,2})?(?:\s*reais)?)\s*$",
+    re.IGNORECASE
+)
+_PRICE_RE = re.compile(r"\d[\d.]*(?:,\d{1,2})?")
+_SPACES_RE = re.compile(r"\s+")
+
+_matcher_cache: Dict[str, List[Tuple]] = {}
+_matcher_lock = threading.Lock()
+
+
+def split_lines(resumo: str) -> List[str]:
+    """
+    Divide o resumo em linhas sem espaços nas pontas, descartando as vazias.
+
+    Args:
+        resumo: Texto do resumo
+
+    Returns:
+        Lista de linhas
+    """
+    return [line.strip() for line in resumo.splitlines() if line.strip()]
+
+
+def parse_price(text: str) -> Optional[float]:
+    """
+    Converte valores como 'R$ 1.234,50', 'R$50', '42,00 reais' em float.
+
+    Args:
+        text: Texto com o valor
+
+    Returns:
+        Valor numérico ou None
+    """
+    match = _PRICE_RE.search(text or '')
+    if not match:
+        return None
+    value = match.group(0)
+    if ',' in value:
+        value = value.replace('.', '').replace(',', '.')
+    elif re.search(r"\.\d{3}$", value):
+        value = value.replace('.', '')
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def classify_line(line: str) -> Tuple[str, Optional[str], str]:
+    """
+    Classifica uma linha do resumo.
+
+    Args:
+        line: Linha do resumo
+
+    Returns:
+        Tupla (tipo, campo, valor): tipo 'campo', 'produto', 'retirada' ou 'outro'
+    """
+    match = _FIELD_RE.match(line)
+    if match:
+        field = FIELD_LABELS.get(normalize_text(match.group(1)))
+        if field == 'produtos':
+            return 'produto', None, match.group(2).strip()
+        if field:
+            return 'campo', field, match.group(2).strip()
+
+    if any(marker in normalize_text(line) for marker in PICKUP_MARKERS):
+        return 'retirada', None, line
+
+    if _PRODUCT_RE.match(_strip_bullet(line)):
+        return 'produto', None, _strip_bullet(line)
+
+    return 'outro', None, line
+
+
+def ends_product_list(line: str) -> bool:
+    """
+    Indica se uma linha 'outro' encerra a lista de produtos.
+
+    Linhas no formato 'RÓTULO: valor' com rótulo desconhecido (ex: 'PONTO DE
+    REFERÊNCIA: ...') encerram a lista; as que detalham o produto anterior
+    (PRODUCT_DETAIL_LABELS) e as linhas sem rótulo, não.
+
+    Args:
+        line: Linha do resumo classificada como 'outro'
+
+    Returns:
+        True se a linha já não faz parte da lista de produtos
+    """
+    match = _FIELD_RE.match(line)
+    return bool(match) and normalize_text(match.group(1)) not in PRODUCT_DETAIL_LABELS
+
+
+def parse_field(field: str, value: str) -> Any:
+    """
+    Converte o valor de uma linha de campo para o formato da extração.
+
+    Args:
+        field: Nome do campo (ex: 'taxa_entrega')
+        value: Texto após os dois-pontos
+
+    Returns:
+        Valor convertido (None se vazio ou ilegível)
+    """
+    if field in PRICE_FIELDS:
+        return parse_price(value)
+    if field == 'telefone':
+        digits = re.sub(r"\D", "", value)
+        return digits or None
+    return value or None
+
+
+def parse_product_line(line: str, snapshot: Optional[CatalogSnapshot]) -> Optional[Dict[str, Any]]:
+    """
+    Interpreta uma linha de produto e a casa com o cardápio.
+
+    Só aceita linhas de quantidade 1 casadas sem ambiguidade; qualquer dúvida
+    retorna None para que o resumo seja extraído pelo LLM.
+
+    Args:
+        line: Linha de produto (sem o rótulo 'PRODUTOS SOLICITADOS:')
+        snapshot: Versão do cardápio usada para casar o produto
+
+    Returns:
+        Produto no formato da extração ou None
+    """
+    if snapshot is None:
+        return None
+
+    match = _PRODUCT_RE.match(_strip_bullet(line))
+    if not match or int(match.group(1)) != 1:
+        return None
+
+    price = parse_price(match.group(3))
+    if price is None:
+        return None
+
+    tokens = _tokens(match.group(2))
+    token_set = set(tokens)
+    text = ' ' + ' '.join(tokens) + ' '
+
+    best = None
+    best_score = -1
+    ambiguous = False
+
+    for tipo_tokens, size, base, row in _product_matchers(snapshot):
+        if not tipo_tokens.issubset(token_set):
+            continue
+        if size and size not in token_set:
+            continue
+        if base and f" {base} " not in text:
+            continue
+        score = len(base)
+        if score > best_score:
+            best, best_score, ambiguous = row, score, False
+        elif score == best_score:
+            ambiguous = True
+
+    if best is None or ambiguous:
+        return None
+
+    return {
+        'nome': best.get('nome'),
+        'tipo_produto': best.get('tipo_produto'),
+        'tamanho': best.get('tamanho'),
+        'preco': price
+    }
+
+
+def _strip_bullet(line: str) -> str:
+    return re.sub(r"^[^\w]+", "", line)
+
+
+def _tokens(text: str) -> List[str]:
+    return _SPACES_RE.sub(' ', re.sub(r"[^\w]+", " ", normalize_text(text))).split()
+
+
+def _product_matchers(snapshot: CatalogSnapshot) -> List[Tuple]:
+    """Pré-processa os produtos do snapshot para o casamento (em cache por versão)."""
+    matchers = _matcher_cache.get(snapshot.checksum)
+    if matchers is not None:
+        return matchers
+
+    matchers = []
+    for row in snapshot.tables.get('produtos', ()):
+        tipo_tokens = _tokens(row.get('tipo_produto') or '')
+        name_tokens = _tokens(row.get('nome') or '')
+        # Remove o tipo do início do nome ('Pizza Mussarela' -> 'mussarela')
+        if tipo_tokens and name_tokens[:len(tipo_tokens)] == tipo_tokens:
+            name_tokens = name_tokens[len(tipo_tokens):]
+        size_tokens = _tokens(row.get('tamanho') or '')
+        size = size_tokens[0] if size_tokens else ''
+        matchers.append((set(tipo_tokens), size, ' '.join(name_tokens), row))
+
+    with _matcher_lock:
+        if len(_matcher_cache) >= 8:
+            _matcher_cache.clear()
+        _matcher_cache[snapshot.checksum] = matchers
+    return matchers
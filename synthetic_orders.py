@@ -0,0 +1,459 @@
+"""
+Gerador de resumos de pedidos sintéticos para testes de carga e de acurácia.
+
+A partir do cardápio (dados de exemplo do database_schema.sql ou uma cópia
+do Supabase) gera resumos no formato do FiqOn com o resultado esperado
+da extração e da validação.
+
+Uso:
+    python synthetic_orders.py -n 1000 --seed 42 --saida pedidos.jsonl
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import unicodedata
+from typing import Any, Dict, Iterator, List, Optional
+from text_normalization import normalize_text
+
+DEFAULT_SCHEMA_PATH = 'database_schema.sql'
+CATALOG_TABLES = ('produtos', 'bairros', 'adicionais')
+
+NOMES = [
+    'João Silva', 'Maria Santos', 'Carlos Oliveira', 'Ana Souza', 'Pedro Costa',
+    'Juliana Lima', 'Rafael Pereira', 'Fernanda Almeida', 'Lucas Rodrigues', 'Camila Gomes'
+]
+RUAS = [
+    'Rua das Flores', 'Avenida Goiás', 'Rua 10', 'Rua São José', 'Avenida Brasil',
+    'Rua das Palmeiras', 'Alameda dos Ipês', 'Rua 7 de Setembro'
+]
+FORMAS_PAGAMENTO = ['Dinheiro', 'Cartão', 'Pix', 'Cartão de crédito', 'Cartão de débito']
+OBSERVACOES = [
+    'Nenhuma', 'Sem cebola', 'Bem assada', 'Cortar em 8 pedaços',
+    'Sem observação', 'Interfone com defeito, ligar ao chegar', None
+]
+UNIDADES = ['Maria Dilce']
+
+ERROR_KINDS = ('preco', 'taxa', 'total')
+
+_INSERT_RE = re.compile(
+    r"INSERT\s+INTO\s+(\w+)\s*\(([^)]*)\)\s*VALUES\s*(.*?)\s*(?:ON\s+CONFLICT[^;]*)?;",
+    re.IGNORECASE | re.DOTALL
+)
+_TUPLE_RE = re.compile(r"\(((?:'(?:[^']|'')*'|[^()'])*)\)")
+_VALUE_RE = re.compile(r"'((?:[^']|'')*)'|(NULL)|(-?\d+(?:\.\d+)?)", re.IGNORECASE)
+
+
+def load_seed_catalog(path: str = DEFAULT_SCHEMA_PATH) -> Dict[str, List[Dict]]:
+    """
+    Carrega o cardápio a partir dos INSERTs de exemplo do script SQL.
+
+    Args:
+        path: Caminho do database_schema.sql
+
+    Returns:
+        Dicionário {tabela: linhas} apenas com itens 'Disponível'
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        sql = f.read()
+
+    catalog: Dict[str, List[Dict]] = {table: [] for table in CATALOG_TABLES}
+
+    for match in _INSERT_RE.finditer(sql):
+        table = match.group(1).lower()
+        columns = [column.strip() for column in match.group(2).split(',')]
+
+        for row_match in _TUPLE_RE.finditer(match.group(3)):
+            values = []
+            for string, null, number in _VALUE_RE.findall(row_match.group(1)):
+                if null:
+                    values.append(None)
+                elif number:
+                    values.append(float(number) if '.' in number else int(number))
+                else:
+                    values.append(string.replace("''", "'"))
+            row = dict(zip(columns, values))
+
+            # O validador usa 'tipo_produto'; o script de exemplo chama a coluna de 'tipo'
+            if table == 'produtos' and 'tipo_produto' not in row:
+                row['tipo_produto'] = row.get('tipo')
+
+            if row.get('status', 'Disponível') == 'Disponível':
+                catalog.setdefault(table, []).append(row)
+
+    return catalog
+
+
+def load_live_catalog(db_client) -> Dict[str, List[Dict]]:
+    """
+    Carrega uma cópia do cardápio disponível no Supabase.
+
+    Args:
+        db_client: Instância de SupabaseClient
+
+    Returns:
+        Dicionário {tabela: linhas}
+    """
+    return db_client.fetch_catalog()
+
+
+def _to_cents(value: Any) -> int:
+    return int(round(float(value) * 100))
+
+
+def _format_brl(cents: int) -> str:
+    """Formata centavos como 'R$ 1.234,56'."""
+    integer, fraction = divmod(abs(cents), 100)
+    text = f"{integer:,}".replace(',', '.')
+    return f"{'-' if cents < 0 else ''}R$ {text},{fraction:02d}"
+
+
+def _strip_accents(text: str) -> str:
+    text = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in text if not unicodedata.combining(c))
+
+
+def _base_name(nome: str, tipo: str) -> str:
+    """Remove o tipo do início do nome: ('Pizza Mussarela', 'pizza') -> 'Mussarela'."""
+    if tipo and nome.lower().startswith(tipo.lower() + ' '):
+        return nome[len(tipo) + 1:]
+    return nome
+
+
+class SummaryGenerator:
+    """Gera resumos de pedidos sintéticos com o resultado esperado."""
+
+    def __init__(self, catalog: Dict[str, List[Dict]], seed: Optional[int] = None,
+                 unidades: Optional[List[str]] = None):
+        """
+        Inicializa o gerador.
+
+        Args:
+            catalog: Dicionário {tabela: linhas} do cardápio
+            seed: Semente para gerar sempre os mesmos pedidos
+            unidades: Nomes de unidades a sortear
+        """
+        self.products = [p for p in catalog.get('produtos', []) if p.get('preco') is not None]
+        self.neighborhoods = [b for b in catalog.get('bairros', []) if b.get('taxa') is not None]
+        self.unidades = unidades or UNIDADES
+        self.random = random.Random(seed)
+        self._counter = 0
+
+        if not self.products:
+            raise ValueError("Cardápio sem produtos para gerar pedidos")
+
+    def generate(
+        self,
+        min_items: int = 1,
+        max_items: int = 5,
+        delivery_ratio: float = 0.7,
+        error_rate: float = 0.2,
+        noise: float = 0.3
+    ) -> Dict[str, Any]:
+        """
+        Gera um pedido sintético.
+
+        Args:
+            min_items: Número mínimo de itens
+            max_items: Número máximo de itens
+            delivery_ratio: Proporção de pedidos para entrega (o resto é retirada)
+            error_rate: Probabilidade de injetar erros de preço, taxa ou total
+            noise: Probabilidade de aplicar cada tipo de ruído de formatação
+
+        Returns:
+            Dicionário com id, resumo e resultado esperado
+        """
+        rnd = self.random
+        self._counter += 1
+
+        delivery = bool(self.neighborhoods) and rnd.random() < delivery_ratio
+        errors = set()
+        if rnd.random() < error_rate:
+            kinds = [k for k in ERROR_KINDS if delivery or k != 'taxa']
+            errors.update(rnd.sample(kinds, rnd.randint(1, len(kinds))))
+
+        items = [rnd.choice(self.products) for _ in range(rnd.randint(min_items, max_items))]
+        correct_prices = [_to_cents(item['preco']) for item in items]
+        informed_prices = list(correct_prices)
+
+        if 'preco' in errors:
+            for index in rnd.sample(range(len(items)), rnd.randint(1, min(3, len(items)))):
+                informed_prices[index] = max(100, correct_prices[index] + self._price_delta())
+
+        neighborhood = rnd.choice(self.neighborhoods) if delivery else None
+        correct_tax = _to_cents(neighborhood['taxa']) if delivery else 0
+        informed_tax = correct_tax
+        if 'taxa' in errors:
+            informed_tax = max(0, correct_tax + self._price_delta())
+
+        # O bot soma os valores que ele mesmo informou; o erro de total é independente
+        informed_total = sum(informed_prices) + informed_tax
+        if 'total' in errors:
+            informed_total = max(0, informed_total + self._price_delta())
+
+        calculated_total = sum(correct_prices) + correct_tax
+
+        nome = rnd.choice(NOMES)
+        telefone = f"62{rnd.randint(90000, 99999)}{rnd.randint(0, 9999):04d}"
+        unidade = rnd.choice(self.unidades)
+        forma_pagamento = rnd.choice(FORMAS_PAGAMENTO)
+        observacoes = rnd.choice(OBSERVACOES)
+        troco = None
+        if forma_pagamento == 'Dinheiro':
+            troco = ((informed_total // 5000) + 1) * 5000
+        endereco = None
+        if delivery:
+            endereco = (f"{rnd.choice(RUAS)}, Qd {rnd.randint(1, 99)} "
+                        f"Lt {rnd.randint(1, 40)}, {neighborhood['nome']}")
+
+        lines = ["Perfeito! Aqui está o RESUMO"]
+        lines.append(f"NOME: {nome}")
+        lines.append(f"TELEFONE: ({telefone[:2]}) {telefone[2:7]}-{telefone[7:]}")
+        lines.append(f"UNIDADE: {unidade}")
+        for index, (item, price) in enumerate(zip(items, informed_prices)):
+            line = self._product_line(item, price, noise)
+            lines.append(f"PRODUTOS SOLICITADOS: {line}" if index == 0 else line)
+        if delivery:
+            lines.append(f"ENDEREÇO: {endereco}")
+            lines.append(f"TAXA DE ENTREGA: {self._price_text(informed_tax, noise)}")
+        else:
+            lines.append("RETIRADA NA LOJA")
+        lines.append(f"VALOR TOTAL: {self._price_text(informed_total, noise)}")
+        lines.append(f"FORMA DE PAGAMENTO: {forma_pagamento}")
+        if troco is not None:
+            lines.append(f"TROCO: Para {self._price_text(troco, noise)}")
+        lines.append(f"OBSERVAÇÕES: {observacoes or 'Sem observação'}")
+
+        resumo = self._apply_noise(lines, noise)
+
+        dados = {
+            'nome': nome,
+            'telefone': telefone,
+            'unidade': unidade,
+            'produtos': [
+                {
+                    'nome': item['nome'],
+                    'tipo_produto': item.get('tipo_produto') or item.get('tipo'),
+                    'tamanho': item['tamanho'],
+                    'preco': price / 100
+                }
+                for item, price in zip(items, informed_prices)
+            ],
+            'endereco': endereco,
+            'bairro': neighborhood['nome'] if delivery else None,
+            'taxa_entrega': informed_tax / 100,
+            'valor_total': informed_total / 100,
+            'forma_pagamento': forma_pagamento,
+            'troco': troco / 100 if troco is not None else None,
+            'observacoes': observacoes,
+            'tipo_entrega': 'entrega' if delivery else 'retirada'
+        }
+
+        expected_errors = []
+        for item, informed, correct in zip(items, informed_prices, correct_prices):
+            if informed != correct:
+                expected_errors.append({
+                    'tipo': 'preco',
+                    'produto': item['nome'],
+                    'preco_informado': informed / 100,
+                    'preco_correto': correct / 100
+                })
+        if informed_tax != correct_tax:
+            expected_errors.append({
+                'tipo': 'taxa',
+                'bairro': neighborhood['nome'],
+                'taxa_informada': informed_tax / 100,
+                'taxa_correta': correct_tax / 100
+            })
+        if informed_total != calculated_total:
+            expected_errors.append({
+                'tipo': 'total',
+                'valor_informado': informed_total / 100,
+                'valor_calculado': calculated_total / 100
+            })
+
+        return {
+            'id': f"sintetico-{self._counter:06d}",
+            'resumo': resumo,
+            'esperado': {
+                'dados_extraidos': dados,
+                'pedido_valido': not expected_errors,
+                'valor_total_informado': informed_total / 100,
+                'valor_total_calculado': calculated_total / 100,
+                'erros': expected_errors
+            },
+            'erros_injetados': sorted(errors)
+        }
+
+    def generate_many(self, count: int, **kwargs) -> Iterator[Dict[str, Any]]:
+        """
+        Gera vários pedidos sintéticos sob demanda.
+
+        Args:
+            count: Quantidade de pedidos
+            **kwargs: Parâmetros repassados para generate()
+
+        Returns:
+            Iterador de pedidos
+        """
+        for _ in range(count):
+            yield self.generate(**kwargs)
+
+    def _price_delta(self) -> int:
+        """Sorteia uma diferença de preço plausível (em centavos, nunca zero)."""
+        delta = self.random.choice([50, 100, 200, 300, 500, 1000])
+        return delta if self.random.random() < 0.5 else -delta
+
+    def _product_line(self, item: Dict, price_cents: int, noise: float) -> str:
+        """Monta a linha de produto no formato '1 Pizza grande Mussarela - R$ 27,00'."""
+        rnd = self.random
+        tipo = (item.get('tipo_produto') or item.get('tipo') or '').strip()
+        nome = item['nome'].strip()
+        tamanho = (item.get('tamanho') or '').strip()
+
+        base = _base_name(nome, tipo)
+        description = ' '.join(part for part in (tipo.capitalize(), tamanho, base) if part)
+
+        if rnd.random() < noise:
+            description = rnd.choice([description.lower(), description.upper(), _strip_accents(description)])
+        quantity = rnd.choice(['1x', '01', '1 un']) if rnd.random() < noise else '1'
+        separator = rnd.choice([' - ', ' – ', ': ', ' ... ']) if rnd.random() < noise else ' - '
+
+        return f"{quantity} {description}{separator}{self._price_text(price_cents, noise)}"
+
+    def _price_text(self, cents: int, noise: float) -> str:
+        """Formata um valor com variações comuns de escrita."""
+        text = _format_brl(cents)
+        if self.random.random() < noise:
+            variant = self.random.randint(0, 3)
+            if variant == 0:
+                text = text.replace('R$ ', 'R$')
+            elif variant == 1 and cents % 100 == 0:
+                text = text[:-3]
+            elif variant == 2:
+                text = text.replace('R$ ', '') + ' reais'
+            else:
+                text = text.replace('R$', 'RS')
+        return text
+
+    def _apply_noise(self, lines: List[str], noise: float) -> str:
+        """Aplica ruído de formatação ao resumo inteiro."""
+        rnd = self.random
+        result = []
+
+        for line in lines:
+            if rnd.random() < noise / 4:
+                line = _strip_accents(line)
+            if rnd.random() < noise / 4:
+                line = line + rnd.choice(['  ', ' ', '\t'])
+            if rnd.random() < noise / 8:
+                line = rnd.choice(['• ', '- ', '👉 ', '*']) + line
+            result.append(line)
+            if rnd.random() < noise / 8:
+                result.append('')
+
+        return '\n'.join(result)
+
+
+def score_extraction(expected: Dict[str, Any], extracted: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Compara dados extraídos pelo LLM com o esperado.
+
+    Args:
+        expected: Dados esperados (esperado['dados_extraidos'])
+        extracted: Dados retornados pela extração
+
+    Returns:
+        Dicionário com acertos por campo e acurácia geral
+    """
+    if extracted is None:
+        return {'campos': {}, 'produtos_corretos': 0, 'produtos_esperados': len(expected.get('produtos', [])),
+                'acuracia': 0.0}
+
+    def normalize(value):
+        if isinstance(value, str):
+            return _strip_accents(value).lower().strip()
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return round(float(value), 2)
+        return value
+
+    fields = ['telefone', 'unidade', 'bairro', 'taxa_entrega', 'valor_total', 'tipo_entrega']
+    field_hits = {field: normalize(expected.get(field)) == normalize(extracted.get(field)) for field in fields}
+
+    def product_key(product):
+        # O esperado traz o nome do cardápio ('Pizza Mussarela') e o prompt pede
+        # só o nome base ('Mussarela'): compara sem o tipo no início, como
+        # incremental_extraction._same_product
+        tipo = normalize_text(product.get('tipo_produto'))
+        nome = _base_name(normalize_text(product.get('nome')), tipo)
+        return (nome, normalize_text(product.get('tamanho')), tipo, normalize(product.get('preco')))
+
+    remaining = [product_key(p) for p in extracted.get('produtos') or []]
+    hits = 0
+    for product in expected.get('produtos', []):
+        key = product_key(product)
+        if key in remaining:
+            remaining.remove(key)
+            hits += 1
+
+    expected_count = len(expected.get('produtos', []))
+    total = len(fields) + max(expected_count, len(extracted.get('produtos') or []))
+    correct = sum(field_hits.values()) + hits
+
+    return {
+        'campos': field_hits,
+        'produtos_corretos': hits,
+        'produtos_esperados': expected_count,
+        'acuracia': round(correct / total, 4) if total else 1.0
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Ponto de entrada da linha de comando."""
+    parser = argparse.ArgumentParser(description='Gera resumos de pedidos sintéticos em JSONL.')
+    parser.add_argument('-n', '--quantidade', type=int, default=100, help='Número de pedidos')
+    parser.add_argument('--seed', type=int, default=None, help='Semente aleatória')
+    parser.add_argument('--min-itens', type=int, default=1)
+    parser.add_argument('--max-itens', type=int, default=5)
+    parser.add_argument('--entrega', type=float, default=0.7, help='Proporção de pedidos para entrega')
+    parser.add_argument('--erros', type=float, default=0.2, help='Probabilidade de injetar erros')
+    parser.add_argument('--ruido', type=float, default=0.3, help='Intensidade do ruído de formatação')
+    parser.add_argument('--catalogo', default=DEFAULT_SCHEMA_PATH,
+                        help="Caminho do script SQL com dados de exemplo ou 'supabase'")
+    parser.add_argument('--unidade', action='append', help='Unidade a sortear (pode repetir)')
+    parser.add_argument('--saida', default='-', help="Arquivo JSONL de saída ('-' para stdout)")
+    args = parser.parse_args(argv)
+
+    if not 1 <= args.min_itens <= args.max_itens:
+        parser.error('--min-itens deve ser >= 1 e <= --max-itens')
+
+    if args.catalogo == 'supabase':
+        from database import SupabaseClient
+        catalog = load_live_catalog(SupabaseClient())
+    else:
+        catalog = load_seed_catalog(args.catalogo)
+
+    generator = SummaryGenerator(catalog, seed=args.seed, unidades=args.unidade)
+    output = sys.stdout if args.saida == '-' else open(args.saida, 'w', encoding='utf-8')
+
+    try:
+        for order in generator.generate_many(
+            args.quantidade,
+            min_items=args.min_itens,
+            max_items=args.max_itens,
+            delivery_ratio=args.entrega,
+            error_rate=args.erros,
+            noise=args.ruido
+        ):
+            output.write(json.dumps(order, ensure_ascii=False) + '\n')
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
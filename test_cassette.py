@@ -0,0 +1,82 @@
+"""
+Testes da gravação e reprodução de chamadas externas.
+Rodam sem rede: as chamadas gravadas são simuladas.
+"""
+
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+from cassette import MODE_RECORD, MODE_REPLAY, LATENCY_ZERO, Cassette, CassetteReplayError
+from llm_extractor import LLMExtractor, _replay_openai_error
+
+REQUEST = httpx.Request('POST', 'https://api.openai.com/v1/chat/completions')
+
+
+def status_error(cls, status):
+    return cls(f'Error code: {status}', response=httpx.Response(status, request=REQUEST), body=None)
+
+
+def record_and_replay(path, error, **kwargs):
+    def perform():
+        raise error
+
+    with pytest.raises(type(error)):
+        Cassette(MODE_RECORD, path).call('openai', {'model': 'x'}, perform, **kwargs)
+
+    replay = Cassette(MODE_REPLAY, path, replay_latency=LATENCY_ZERO)
+    with pytest.raises(Exception) as replayed:
+        replay.call('openai', {'model': 'x'}, perform, **kwargs)
+    return replayed.value
+
+
+@pytest.mark.parametrize('cls, status', [
+    (openai.RateLimitError, 429),
+    (openai.InternalServerError, 503),
+    (openai.BadRequestError, 400),
+])
+def test_openai_status_errors_replay_with_same_type(tmp_path, cls, status):
+    replayed = record_and_replay(str(tmp_path / 'cassete.jsonl'), status_error(cls, status),
+                                 deserialize_error=_replay_openai_error)
+
+    assert type(replayed) is cls
+    assert replayed.status_code == status
+
+
+def test_connection_error_replays_with_same_type(tmp_path):
+    replayed = record_and_replay(str(tmp_path / 'cassete.jsonl'), openai.APITimeoutError(request=REQUEST),
+                                 deserialize_error=_replay_openai_error)
+
+    assert type(replayed) is openai.APITimeoutError
+
+
+def test_other_errors_keep_status_code(tmp_path):
+    replayed = record_and_replay(str(tmp_path / 'cassete.jsonl'), status_error(openai.RateLimitError, 429))
+
+    assert type(replayed) is CassetteReplayError
+    assert replayed.status_code == 429
+
+    replayed = record_and_replay(str(tmp_path / 'outro.jsonl'), ValueError('falhou'))
+    assert type(replayed) is CassetteReplayError
+    assert replayed.status_code is None
+    assert str(replayed) == 'falhou'
+
+
+def test_rate_limit_branch_matches_live_call(tmp_path, monkeypatch):
+    def create(**params):
+        raise status_error(openai.RateLimitError, 429)
+
+    path = str(tmp_path / 'cassete.jsonl')
+    extractor = LLMExtractor(cassette=Cassette(MODE_RECORD, path))
+    extractor._client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(extractor, '_record_usage', lambda *args: None)
+
+    # Na gravação e na reprodução, o limite de taxa chega ao agrupador de lotes
+    with pytest.raises(openai.RateLimitError):
+        extractor._extract_single('resumo', raise_rate_limit=True)
+
+    extractor.cassette = Cassette(MODE_REPLAY, path, replay_latency=LATENCY_ZERO)
+    with pytest.raises(openai.RateLimitError):
+        extractor._extract_single('resumo', raise_rate_limit=True)
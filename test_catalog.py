@@ -0,0 +1,187 @@
+"""
+Testes do cardápio em memória: snapshots, repositórios e partição por unidade.
+Rodam sem rede, contra o cardápio de exemplo do database_schema.sql.
+"""
+
+import pytest
+
+from catalog import CatalogSnapshot, CatalogStore, UnitCatalogRegistry
+from database import SHARED_PARTITION, OrderValidator, StaticCatalogClient
+from synthetic_orders import load_seed_catalog
+
+UNIDADES = [
+    {'nome': 'Maria Dilce', 'horario_abertura': '18:00', 'horario_fechamento': '23:00', 'status': 'Disponível'},
+    {'nome': 'Setor Leste', 'horario_abertura': '18:00', 'horario_fechamento': '23:00', 'status': 'Disponível'}
+]
+
+
+@pytest.fixture
+def partitioned():
+    catalog = load_seed_catalog()
+    catalog['unidades'] = UNIDADES
+    # A outra loja cobra mais pela mesma pizza e pelo mesmo bairro
+    catalog['produtos'] = catalog['produtos'] + [
+        {**row, 'preco': row['preco'] + 10, 'unidade': 'Setor Leste'}
+        for row in catalog['produtos'] if row['nome'] == 'Pizza Mussarela'
+    ]
+    catalog['bairros'] = [{**row, 'taxa': 9.0, 'unidade': 'Setor Leste'}
+                          for row in catalog['bairros'] if row['nome'] == 'Vila Cristina'] + catalog['bairros']
+    db = StaticCatalogClient(catalog)
+    db.partition_by_unit = True
+    return db
+
+
+def order(unidade):
+    return {
+        'unidade': unidade,
+        'produtos': [{'nome': 'Pizza Mussarela', 'tamanho': 'pequeno', 'tipo_produto': 'pizza', 'preco': 27.0}],
+        'tipo_entrega': 'entrega',
+        'bairro': 'Vila Cristina',
+        'taxa_entrega': 3.0,
+        'valor_total': 30.0
+    }
+
+
+@pytest.mark.parametrize('unidade', [None, '', 'Loja Desconhecida'])
+def test_unknown_unit_uses_only_shared_rows(partitioned, unidade):
+    assert partitioned.resolve_unit(unidade) == SHARED_PARTITION
+
+    snapshot = partitioned.snapshot(unidade=unidade)
+    assert all(row.get('unidade') is None for rows in snapshot.tables.values() for row in rows)
+    assert OrderValidator(partitioned, cache_size=0).validate_order(order(unidade))['valido']
+
+
+def test_unit_uses_its_own_rows(partitioned):
+    assert partitioned.resolve_unit('setor leste') == 'Setor Leste'
+
+    result = OrderValidator(partitioned, cache_size=0).validate_order(order('Setor Leste'))
+
+    # A linha da unidade prevalece sobre a compartilhada, antes ou depois dela na tabela
+    assert not result['valido']
+    assert result['correcoes'][0]['preco_correto'] == 37.0
+    assert result['correcoes'][1]['taxa_correta'] == 9.0
+
+
+def test_without_partition_uses_full_catalog():
+    db = StaticCatalogClient(load_seed_catalog())
+    assert db.resolve_unit('Loja Desconhecida') is None
+    assert db.snapshot(unidade='Loja Desconhecida') is db.snapshot()
+
+
+def price_table(price):
+    return {'produtos': [{'nome': 'Pizza Mussarela', 'tamanho': 'pequeno', 'tipo_produto': 'pizza', 'preco': price}]}
+
+
+class Loader:
+    """Devolve as tabelas da vez ou falha, como o Supabase fora do ar."""
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if isinstance(self.tables, Exception):
+            raise self.tables
+        return self.tables
+
+
+def test_snapshot_copies_rows_and_versions_by_content():
+    tables = price_table(27.0)
+    snapshot = CatalogSnapshot(tables)
+    tables['produtos'][0]['preco'] = 30.0
+
+    assert snapshot.find_product('pizza mussarela', 'Pequeno', 'PIZZA')['preco'] == 27.0
+    assert snapshot.version == CatalogSnapshot(price_table(27.0), loaded_at=0).version
+    assert snapshot.version != CatalogSnapshot(price_table(30.0)).version
+
+
+def test_store_publishes_only_changed_content():
+    loader = Loader(price_table(27.0))
+    store = CatalogStore(loader, refresh_interval=0)
+
+    first = store.current()
+    assert store.refresh() is first
+    loader.tables = price_table(30.0)
+    second = store.refresh()
+
+    assert loader.calls == 3
+    assert second is store.current() and second is not first
+    assert [v['versao'] for v in store.versions()] == [first.version, second.version]
+    assert store.get(first.version) is first
+    assert store.get('desconhecida') is None
+
+
+def test_store_answers_point_in_time_and_bounds_history():
+    store = CatalogStore(Loader(price_table(0)), history_size=2, refresh_interval=0)
+    for when, price in ((100.0, 27.0), (200.0, 28.0), (300.0, 29.0)):
+        store.publish(price_table(price), loaded_at=when)
+
+    def price_at(when):
+        snapshot = store.at(when)
+        return snapshot and snapshot.find_product('Pizza Mussarela', 'pequeno', 'pizza')['preco']
+
+    # Só as duas últimas versões ficam no histórico
+    assert len(store.versions()) == 2
+    assert price_at(150.0) is None
+    assert price_at(250.0) == 28.0
+    assert price_at(1000.0) == 29.0
+
+
+def test_failed_refresh_keeps_current_version_and_marks_stale():
+    loader = Loader(price_table(27.0))
+    store = CatalogStore(loader, refresh_interval=0)
+    current = store.current()
+
+    loader.tables = ConnectionError('Supabase fora do ar')
+    assert store.refresh() is current
+    assert store.status()['desatualizado']
+
+    loader.tables = price_table(27.0)
+    store.refresh()
+    assert not store.status()['desatualizado']
+    assert store.status()['ultima_atualizacao'] is not None
+
+
+def unit_tables(unidade):
+    return {'produtos': [{'nome': f'Pizza {unidade} {i}', 'tamanho': 'grande', 'tipo_produto': 'pizza',
+                          'preco': 40.0, 'unidade': unidade} for i in range(20)]}
+
+
+@pytest.fixture
+def registry():
+    size = CatalogSnapshot(unit_tables('A')).size_bytes
+    # Cabem duas unidades, não três
+    return UnitCatalogRegistry(unit_tables, max_bytes=int(size * 2.5), refresh_interval=0)
+
+
+def test_registry_loads_each_unit_once(registry):
+    store = registry.store('A')
+
+    assert registry.store('A') is store
+    assert registry.store(None) is not store
+    assert store.current().find_product('Pizza A 3', 'grande', 'pizza')['unidade'] == 'A'
+
+
+def test_registry_evicts_least_recently_used_unit(registry):
+    a = registry.store('A')
+    a.current()
+    registry.store('B').current()
+    registry.store('A')  # A passa a ser a mais recente
+    registry.store('C').current()
+
+    assert set(registry.describe()['unidades']) == {'A', 'C'}
+    assert registry.evictions == 1
+    assert registry.memory_usage() <= registry.max_bytes
+    # Quem já tinha a referência continua validando com o snapshot dela
+    assert registry.store('A') is a
+
+
+def test_registry_keeps_unit_that_just_published(registry):
+    prefetched = registry.store('C')
+    registry.store('A').current()
+    registry.store('B').current()
+    # C é a menos usada, mas acabou de publicar (pré-carga): quem sai é A
+    prefetched.current()
+
+    assert set(registry.describe()['unidades']) == {'B', 'C'}
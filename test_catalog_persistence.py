@@ -0,0 +1,65 @@
+"""
+Testes do arquivo local de snapshots do cardápio.
+Rodam sem rede, contra o cardápio de exemplo do database_schema.sql.
+"""
+
+import os
+import sqlite3
+from contextlib import closing
+
+import pytest
+
+from catalog import CatalogSnapshot, CatalogStore
+from catalog_persistence import SnapshotFile
+from synthetic_orders import load_seed_catalog
+
+
+@pytest.fixture(scope='module')
+def catalog():
+    return load_seed_catalog()
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'cache' / 'cardapio.sqlite3')
+
+
+def test_save_and_load_by_partition(path, catalog):
+    snapshot_file = SnapshotFile(path)
+    snapshot_file.save('*', catalog, 'abc', 100.0)
+    snapshot_file.save('Maria Dilce', {'produtos': []}, 'def', 200.0)
+    snapshot_file.save('*', {'produtos': catalog['produtos']}, 'ghi', 300.0)
+
+    assert SnapshotFile(path).load('*') == ({'produtos': catalog['produtos']}, 300.0)
+    assert snapshot_file.load('Maria Dilce') == ({'produtos': []}, 200.0)
+    assert snapshot_file.load('Setor Leste') is None
+
+
+def test_connections_are_closed(path, catalog):
+    snapshot_file = SnapshotFile(path)
+    snapshot_file.save('*', catalog, 'abc', 100.0)
+    snapshot_file.load('*')
+
+    # Com todas as conexões fechadas, o SQLite incorpora o WAL e apaga o arquivo
+    assert not os.path.exists(path + '-wal')
+
+
+def test_corrupted_snapshot_is_ignored(path):
+    snapshot_file = SnapshotFile(path)
+    with closing(sqlite3.connect(path)) as conn, conn:
+        conn.execute("INSERT INTO cardapio_snapshots VALUES ('*', 'x', 1, 1, '{corrompido')")
+
+    assert snapshot_file.load('*') is None
+
+
+def test_store_starts_from_file_and_keeps_version(path, catalog):
+    saved = CatalogStore(lambda: catalog, refresh_interval=0, snapshot_file=SnapshotFile(path))
+    version = saved.current().version
+
+    def unavailable():
+        raise ConnectionError('Supabase fora do ar')
+
+    store = CatalogStore(unavailable, refresh_interval=0, snapshot_file=SnapshotFile(path))
+    assert store.load_local()
+    assert store.current().version == version == CatalogSnapshot(catalog).version
+    assert store.status()['desatualizado']
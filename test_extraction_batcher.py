@@ -0,0 +1,100 @@
+"""
+Testes do agrupador de micro-lotes de extração.
+Rodam sem rede, com uma função de extração falsa.
+"""
+
+import threading
+import time
+
+import pytest
+
+from extraction_batcher import BATCH_RATE_LIMITED, ExtractionBatcher
+
+
+class FakeExtractor:
+    def __init__(self, delay=0.0, error=None):
+        self.delay = delay
+        self.error = error
+        self.batches = []
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, summaries):
+        with self._lock:
+            self.batches.append(list(summaries))
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(self.delay)
+        with self._lock:
+            self.running -= 1
+        if self.error:
+            return [None] * len(summaries), [None] * len(summaries), self.error
+        return [{'resumo': s} for s in summaries], [{'tokens_total': 10} for _ in summaries], None
+
+
+def test_lone_summary_is_not_delayed_by_window():
+    extractor = FakeExtractor()
+    batcher = ExtractionBatcher(extractor, window_ms=500)
+
+    start = time.perf_counter()
+    for number in range(3):
+        data, usage, _ = batcher.submit(f'pedido {number}')
+        assert data == {'resumo': f'pedido {number}'}
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.5
+    assert extractor.batches == [['pedido 0'], ['pedido 1'], ['pedido 2']]
+
+
+def test_concurrent_summaries_share_a_batch():
+    extractor = FakeExtractor(delay=0.2)
+    batcher = ExtractionBatcher(extractor, window_ms=100, max_size=8)
+    results = {}
+
+    def submit(number):
+        results[number] = batcher.submit(f'pedido {number}')
+
+    # O primeiro segue sozinho; os que chegam enquanto ele está em andamento formam um lote
+    first = threading.Thread(target=submit, args=(0,))
+    first.start()
+    time.sleep(0.05)
+    others = [threading.Thread(target=submit, args=(number,)) for number in range(1, 5)]
+    for thread in others:
+        thread.start()
+    for thread in [first] + others:
+        thread.join()
+
+    assert sorted(len(batch) for batch in extractor.batches) == [1, 4]
+    assert all(results[number][0] == {'resumo': f'pedido {number}'} for number in range(5))
+    assert batcher.stats()['requisicoes_economizadas'] == 3
+
+
+def test_rate_limited_batch_is_not_fanned_out(monkeypatch):
+    monkeypatch.setattr('extraction_batcher.RATE_LIMIT_BACKOFF_SECONDS', 0.01)
+    extractor = FakeExtractor(error=BATCH_RATE_LIMITED)
+    batcher = ExtractionBatcher(extractor, window_ms=10)
+
+    data, usage, fallback = batcher.submit('pedido')
+    assert data is None and usage is None
+    assert fallback is False
+    assert batcher.stats()['limites_taxa'] == 3
+
+
+def test_timeout_asks_for_individual_extraction():
+    batcher = ExtractionBatcher(FakeExtractor(delay=0.3), window_ms=0, timeout=0.05)
+    assert batcher.submit('pedido') == (None, None, True)
+
+
+@pytest.mark.parametrize('max_in_flight', [1, 2])
+def test_dispatch_threads_are_bounded(max_in_flight):
+    extractor = FakeExtractor(delay=0.05)
+    batcher = ExtractionBatcher(extractor, window_ms=0, max_size=1, max_in_flight=max_in_flight)
+    threads = [threading.Thread(target=batcher.submit, args=(f'pedido {n}',)) for n in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(extractor.batches) == 6
+    assert extractor.max_running <= max_in_flight
@@ -0,0 +1,134 @@
+"""
+Testes da leitura local de resumos e da re-extração incremental.
+Rodam sem rede, contra o cardápio de exemplo do database_schema.sql.
+"""
+
+import pytest
+
+from database import OrderValidator, StaticCatalogClient
+from incremental_extraction import IncrementalExtractor
+from summary_parser import parse_product_line
+from synthetic_orders import load_seed_catalog
+
+RESUMO = """Perfeito! Aqui está o RESUMO
+NOME: João Silva
+TELEFONE: (62) 99999-8888
+UNIDADE: Maria Dilce
+PRODUTOS SOLICITADOS: 1 Pizza grande Calabresa Acebolada - R$ 50,00
+1 Pizza pequena Mussarela - R$ 27,00
+ENDEREÇO: Rua das Flores, Qd 12 Lt 5, Vila Cristina
+TAXA DE ENTREGA: R$ 3,00
+VALOR TOTAL: R$ 80,00
+FORMA DE PAGAMENTO: Dinheiro"""
+
+EXTRAIDO = {
+    'nome': 'João Silva',
+    'telefone': '62999998888',
+    'unidade': 'Maria Dilce',
+    'produtos': [
+        {'nome': 'Calabresa Acebolada', 'tipo_produto': 'Pizza', 'tamanho': 'grande', 'preco': 50.0},
+        {'nome': 'Mussarela', 'tipo_produto': 'Pizza', 'tamanho': 'pequena', 'preco': 27.0}
+    ],
+    'endereco': 'Rua das Flores, Qd 12 Lt 5, Vila Cristina',
+    'bairro': 'Vila Cristina',
+    'taxa_entrega': 3.0,
+    'valor_total': 80.0,
+    'forma_pagamento': 'Dinheiro',
+    'troco': None,
+    'observacoes': None,
+    'tipo_entrega': 'entrega'
+}
+
+
+@pytest.fixture(scope='module')
+def db():
+    return StaticCatalogClient(load_seed_catalog())
+
+
+@pytest.fixture
+def extractor(db):
+    calls = []
+
+    def extract(resumo):
+        calls.append(resumo)
+        return {**EXTRAIDO, 'produtos': [dict(p) for p in EXTRAIDO['produtos']]}, {'tokens_total': 100}
+
+    extractor = IncrementalExtractor(extract, lambda unidade: db.snapshot(unidade=unidade))
+    extractor.calls = calls
+    extractor.extract(RESUMO)
+    return extractor
+
+
+class TestParseProductLine:
+    def test_matches_catalog_row(self, db):
+        product = parse_product_line('1 Pizza grande Calabresa Acebolada - R$ 50,00', db.snapshot())
+        # Nome, tipo e tamanho vêm da linha do cardápio; o preço, do resumo
+        assert product == {'nome': 'Pizza Calabresa Acebolada', 'tipo_produto': 'pizza',
+                           'tamanho': 'grande', 'preco': 50.0}
+
+    def test_keeps_informed_price(self, db):
+        product = parse_product_line('1 Pizza grande Calabresa Acebolada - R$ 45,50', db.snapshot())
+        assert product['preco'] == 45.5
+
+    def test_accepts_accents_and_case(self, db):
+        product = parse_product_line('1 PIZZA PEQUENA MUSSARELA - R$ 27,00', db.snapshot())
+        assert product is not None and product['nome'] == 'Pizza Mussarela'
+
+    @pytest.mark.parametrize('line', [
+        '2 Pizza grande Calabresa Acebolada - R$ 100,00',   # quantidade diferente de 1
+        '1 Pizza grande Inexistente - R$ 50,00',            # fora do cardápio
+        '1 Pizza grande Calabresa Acebolada',               # sem preço
+        'Pizza grande Calabresa Acebolada - R$ 50,00',      # sem quantidade
+    ])
+    def test_rejects_uncertain_lines(self, db, line):
+        assert parse_product_line(line, db.snapshot()) is None
+
+    def test_without_snapshot(self):
+        assert parse_product_line('1 Pizza grande Calabresa Acebolada - R$ 50,00', None) is None
+
+
+class TestApplyChanges:
+    def test_product_swap_is_local(self, extractor):
+        revised = RESUMO.replace('1 Pizza pequena Mussarela - R$ 27,00', '1 Pizza grande Brigadeiro - R$ 48,00')
+        data, usage, info = extractor.extract(revised)
+        assert info['modo'] == 'incremental'
+        assert usage is None
+        assert len(extractor.calls) == 1
+        assert [p['nome'] for p in data['produtos']] == ['Calabresa Acebolada', 'Pizza Brigadeiro']
+
+    def test_changed_total_is_parsed(self, extractor):
+        data, _, info = extractor.extract(RESUMO.replace('R$ 80,00', 'R$ 81,00'))
+        assert info['modo'] == 'incremental'
+        assert data['valor_total'] == 81.0
+
+    def test_removed_product(self, extractor):
+        data, _, info = extractor.extract(RESUMO.replace('1 Pizza pequena Mussarela - R$ 27,00\n', ''))
+        assert info['modo'] == 'incremental'
+        assert [p['nome'] for p in data['produtos']] == ['Calabresa Acebolada']
+
+    @pytest.mark.parametrize('line', ['TAXA DE ENTREGA: R$ 3,00\n', 'VALOR TOTAL: R$ 80,00\n'])
+    def test_removed_numeric_line_falls_back(self, extractor, db, line):
+        data, usage, info = extractor.extract(RESUMO.replace(line, ''))
+        assert info['modo'] == 'completo'
+        assert len(extractor.calls) == 2
+        # O resultado precisa ser validável (antes o total virava None e o validador quebrava)
+        OrderValidator(db, cache_size=0).validate_order(data)
+
+    def test_unreadable_numeric_value_falls_back(self, extractor):
+        _, _, info = extractor.extract(RESUMO.replace('VALOR TOTAL: R$ 80,00', 'VALOR TOTAL: a combinar'))
+        assert info['modo'] == 'completo'
+
+    def test_address_change_falls_back(self, extractor):
+        _, _, info = extractor.extract(RESUMO.replace('Rua das Flores', 'Rua das Palmeiras'))
+        assert info['modo'] == 'completo'
+
+    def test_unknown_product_falls_back(self, extractor):
+        _, _, info = extractor.extract(RESUMO.replace('Mussarela - R$ 27,00', 'Inexistente - R$ 27,00'))
+        assert info['modo'] == 'completo'
+
+    def test_returned_data_is_a_copy(self, extractor):
+        data, _, _ = extractor.extract(RESUMO.replace('R$ 80,00', 'R$ 81,00'))
+        data['produtos'].clear()
+        again, _, info = extractor.extract(RESUMO.replace('R$ 80,00', 'R$ 82,00'))
+        assert info['modo'] == 'incremental'
+        assert len(again['produtos']) == 2
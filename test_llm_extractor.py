@@ -0,0 +1,93 @@
+"""
+Testes do LLMExtractor sem chamar o OpenAI.
+Rodam sem rede: as chamadas ao modelo são substituídas por respostas fixas.
+"""
+
+import pytest
+
+from llm_extractor import LLMExtractor
+from summary_parser import classify_line, ends_product_list
+
+RESUMO = """NOME: João Silva
+UNIDADE: Maria Dilce
+PRODUTOS SOLICITADOS: 1 Pizza grande Calabresa Acebolada - R$ 50,00
+Borda: catupiry
+1 Pizza pequena Mussarela - R$ 27,00
+1 Pizza grande Portuguesa - R$ 52,00
+sem cebola
+PONTO DE REFERÊNCIA: ao lado da padaria
+ENDEREÇO: Rua das Flores, Qd 12 Lt 5, Vila Cristina
+VALOR TOTAL: R$ 129,00"""
+
+
+class FakeExtractor(LLMExtractor):
+    """Devolve como produtos as linhas de produto de cada texto enviado."""
+
+    def __init__(self, header_products=()):
+        super().__init__()
+        self.batcher = None
+        self.chunk_threshold = 2
+        self.chunk_size = 2
+        self.header_products = list(header_products)
+        self.texts = []
+
+    def _extract_single(self, order_summary, raise_rate_limit=False):
+        self.texts.append(order_summary)
+        products = [{'nome': value} for kind, _, value in map(classify_line, order_summary.splitlines())
+                    if kind == 'produto']
+        if 'ENDEREÇO' in order_summary and 'Calabresa' not in order_summary:
+            products = list(self.header_products)
+        return {'nome': 'João Silva', 'produtos': products}, None
+
+
+def test_product_list_ends_at_unknown_label():
+    header, groups, contiguous = FakeExtractor()._split_summary(RESUMO)
+
+    assert contiguous
+    assert [group[0].split(' - ')[0] for group in groups] == [
+        '1 Pizza grande Calabresa Acebolada', '1 Pizza pequena Mussarela', '1 Pizza grande Portuguesa'
+    ]
+    assert groups[0][1:] == ['Borda: catupiry']
+    assert groups[2][1:] == ['sem cebola']
+    assert 'PONTO DE REFERÊNCIA: ao lado da padaria' in header
+
+
+def test_chunks_carry_only_their_products():
+    extractor = FakeExtractor()
+    data, _ = extractor.extract_order_data_with_usage(RESUMO)
+
+    assert len(data['produtos']) == 3
+    header, *chunks = extractor.texts
+    assert 'PONTO DE REFERÊNCIA' in header
+    assert all('PONTO DE REFERÊNCIA' not in chunk for chunk in chunks)
+
+
+def test_products_outside_the_list_are_not_split():
+    resumo = RESUMO + '\n1 Refrigerante 2L - R$ 8,00'
+    extractor = FakeExtractor()
+
+    _, groups, contiguous = extractor._split_summary(resumo)
+    data, _ = extractor.extract_order_data_with_usage(resumo)
+
+    assert len(groups) == 4 and not contiguous
+    assert extractor.texts == [resumo]
+    assert len(data['produtos']) == 4
+
+
+def test_products_in_header_fall_back_to_single_call():
+    extractor = FakeExtractor(header_products=[{'nome': 'Pizza sem preço'}])
+    data, _ = extractor.extract_order_data_with_usage(RESUMO)
+
+    assert extractor.texts[-1] == RESUMO
+    assert len(data['produtos']) == 3
+
+
+@pytest.mark.parametrize('line, ends', [
+    ('Borda: catupiry', False),
+    ('Adicionais: bacon', False),
+    ('sem cebola', False),
+    ('PONTO DE REFERÊNCIA: padaria', True),
+    ('Horário de entrega: 19h', True),
+])
+def test_ends_product_list(line, ends):
+    assert ends_product_list(line) is ends
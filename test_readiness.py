@@ -0,0 +1,165 @@
+"""
+Testes do aquecimento em segundo plano e dos estados do /ready.
+Rodam sem rede: a conexão e as consultas ao Supabase e ao OpenAI são simuladas.
+"""
+
+import threading
+import time
+
+import pytest
+
+from cassette import MODE_REPLAY, Cassette
+from catalog import CatalogSnapshot
+from catalog_persistence import SnapshotFile
+from config import Config
+from database import SupabaseClient
+from llm_extractor import LLMExtractor
+from synthetic_orders import load_seed_catalog
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def idle():
+    """Nenhuma atualização ou conexão em segundo plano ainda rodando."""
+    return not any(t.name in ('catalog-refresh', 'supabase-connect', 'openai-connect')
+                   for t in threading.enumerate())
+
+
+class Supabase:
+    """Supabase simulado: fora do ar até ser ligado."""
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.up = False
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def fetch(self, table, unidade=None):
+        self.gate.wait()
+        if not self.up:
+            raise ConnectionError('Supabase fora do ar')
+        return self.catalog.get(table, [])
+
+
+@pytest.fixture
+def supabase(monkeypatch):
+    fake = Supabase({**load_seed_catalog(), 'unidades': []})
+
+    def connect(self):
+        if fake.up:
+            self._client = object()
+        return fake.up
+
+    monkeypatch.setattr(SupabaseClient, 'connect', connect)
+    monkeypatch.setattr(SupabaseClient, '_fetch_available', lambda self, table, unidade=None: fake.fetch(table, unidade))
+    monkeypatch.setattr(Config, 'CATALOG_REFRESH_SECONDS', 0)
+    yield fake
+    fake.gate.set()
+    wait_for(idle)
+
+
+def make_client(monkeypatch, tmp_path, partitioned=False, snapshot=None):
+    path = str(tmp_path / 'cardapio.sqlite3')
+    if snapshot is not None:
+        partition, tables = snapshot
+        SnapshotFile(path).save(partition, tables, CatalogSnapshot.compute_checksum(tables), 100.0)
+    monkeypatch.setattr(Config, 'CATALOG_SNAPSHOT_PATH', path)
+    monkeypatch.setattr(Config, 'CATALOG_PARTITION_BY_UNIT', partitioned)
+    return SupabaseClient(cassette=Cassette())
+
+
+def test_not_ready_while_supabase_is_down_without_local_file(monkeypatch, tmp_path, supabase):
+    db = make_client(monkeypatch, tmp_path)
+    db.warm_start()
+    wait_for(idle)
+
+    assert not db.client_ready()
+    assert not db.catalog_ready()
+
+    supabase.up = True
+    assert wait_for(lambda: db.catalog_ready() and db.client_ready())
+    assert not db.catalog_status()['desatualizado']
+
+
+def test_local_file_makes_catalog_ready_before_supabase(monkeypatch, tmp_path, supabase):
+    db = make_client(monkeypatch, tmp_path, snapshot=('*', load_seed_catalog()))
+    db.warm_start()
+
+    assert db.catalog_ready()
+    assert db.catalog_status()['desatualizado']
+    assert db.snapshot().find_product('Pizza Mussarela', 'pequeno', 'pizza') is not None
+
+
+def test_readiness_check_does_not_block(monkeypatch, tmp_path, supabase):
+    supabase.up = True
+    supabase.gate.clear()
+    db = make_client(monkeypatch, tmp_path)
+
+    start = time.perf_counter()
+    assert not db.catalog_ready()
+    assert time.perf_counter() - start < 0.5
+
+    supabase.gate.set()
+    assert wait_for(db.catalog_ready)
+
+
+def test_partitioned_readiness_needs_only_units(monkeypatch, tmp_path, supabase):
+    db = make_client(monkeypatch, tmp_path, partitioned=True, snapshot=('#unidades', {'unidades': []}))
+    db.warm_start()
+
+    assert db.catalog_ready()
+    assert not db.catalog_store.loaded
+
+
+def test_openai_client_ready_after_background_connect(monkeypatch):
+    created = threading.Event()
+
+    def connect(self):
+        created.wait(2)
+        self._client = object()
+        return True
+
+    monkeypatch.setattr(LLMExtractor, 'connect', connect)
+    extractor = LLMExtractor(cassette=Cassette())
+
+    assert not extractor.client_ready()
+    created.set()
+    assert wait_for(extractor.client_ready)
+
+
+def test_replay_needs_no_clients(tmp_path):
+    path = tmp_path / 'cassete.jsonl'
+    path.write_text('', encoding='utf-8')
+    cassette = Cassette(MODE_REPLAY, str(path))
+
+    assert LLMExtractor(cassette=cassette).client_ready()
+    assert SupabaseClient(cassette=cassette).client_ready()
+
+
+@pytest.mark.parametrize('checks, status, code', [
+    ((True, True, True), 'pronto', 200),
+    ((True, True, False), 'aguardando', 503),
+    ((False, True, True), 'aguardando', 503),
+])
+def test_ready_endpoint(monkeypatch, checks, status, code):
+    import app as application
+
+    openai_ready, supabase_ready, catalog_ready = checks
+    monkeypatch.setattr(application.llm_extractor, 'client_ready', lambda: openai_ready)
+    monkeypatch.setattr(application.db_client, 'client_ready', lambda: supabase_ready)
+    monkeypatch.setattr(application.db_client, 'catalog_ready', lambda: catalog_ready)
+
+    response = application.app.test_client().get('/ready')
+
+    assert response.status_code == code
+    assert response.get_json()['status'] == status
+    assert response.get_json()['verificacoes'] == {
+        'openai': openai_ready, 'supabase': supabase_ready, 'cardapio': catalog_ready
+    }
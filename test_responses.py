@@ -0,0 +1,43 @@
+"""
+Testes da escolha de campos da resposta.
+Rodam sem rede e sem subir o servidor.
+"""
+
+import pytest
+from flask import Flask
+
+from responses import SLIM_FIELDS, requested_fields, select_fields
+
+
+@pytest.fixture
+def app():
+    return Flask(__name__)
+
+
+@pytest.mark.parametrize('data, query, expected', [
+    ({'campos': ['pedido_valido', ' validacao.erros ', '']}, '', ['pedido_valido', 'validacao.erros']),
+    ({'campos': 'pedido_valido, validacao.erros'}, '', ['pedido_valido', 'validacao.erros']),
+    ({}, '?fields=pedido_valido', ['pedido_valido']),
+    ({'resposta': 'compacta'}, '', list(SLIM_FIELDS)),
+    ({}, '', None),
+    (None, '', None),
+])
+def test_reads_requested_fields(app, data, query, expected):
+    with app.test_request_context('/api/validate-order' + query):
+        assert requested_fields(data) == (expected, None)
+
+
+@pytest.mark.parametrize('campos', [5, True, {'pedido_valido': 1}, ['pedido_valido', 3], [['validacao']]])
+def test_rejects_malformed_fields(app, campos):
+    with app.test_request_context('/api/validate-order'):
+        fields, error = requested_fields({'campos': campos})
+    assert fields is None
+    assert 'campos' in error
+
+
+def test_select_fields_keeps_nesting():
+    payload = {'status': 'sucesso', 'pedido_valido': False, 'validacao': {'erros': ['x'], 'resumo': '...'}}
+    assert select_fields(payload, ['validacao.erros', 'inexistente.campo']) == {
+        'status': 'sucesso',
+        'validacao': {'erros': ['x']}
+    }
@@ -0,0 +1,45 @@
+"""
+Testes da pontuação de extrações contra os pedidos sintéticos.
+Rodam sem rede, contra o cardápio de exemplo do database_schema.sql.
+"""
+
+import copy
+
+import pytest
+
+from synthetic_orders import SummaryGenerator, load_seed_catalog, score_extraction
+
+
+@pytest.fixture(scope='module')
+def expected():
+    generator = SummaryGenerator(load_seed_catalog(), seed=11)
+    return generator.generate(2, 2, delivery_ratio=1.0, error_rate=0.0, noise=0.0)['esperado']['dados_extraidos']
+
+
+def as_llm_output(expected):
+    """Dados no formato que o prompt pede: nome base, tipo capitalizado."""
+    extracted = copy.deepcopy(expected)
+    for product in extracted['produtos']:
+        tipo = product['tipo_produto']
+        if product['nome'].lower().startswith(tipo.lower() + ' '):
+            product['nome'] = product['nome'][len(tipo) + 1:]
+        product['tipo_produto'] = tipo.capitalize()
+    return extracted
+
+
+def test_base_name_matches_catalog_name(expected):
+    extracted = as_llm_output(expected)
+    assert any(p['nome'] != e['nome'] for p, e in zip(extracted['produtos'], expected['produtos']))
+
+    score = score_extraction(expected, extracted)
+
+    assert score['produtos_corretos'] == score['produtos_esperados'] == 2
+    assert score['acuracia'] == 1.0
+
+
+def test_wrong_product_still_counts_as_miss(expected):
+    extracted = as_llm_output(expected)
+    extracted['produtos'][0]['nome'] = 'Inexistente'
+    extracted['produtos'][1]['preco'] += 1
+
+    assert score_extraction(expected, extracted)['produtos_corretos'] == 0
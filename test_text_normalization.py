@@ -0,0 +1,69 @@
+"""
+Testes da normalização de texto usada nas buscas do cardápio.
+Rodam sem rede, contra o cardápio de exemplo do database_schema.sql.
+"""
+
+import json
+import unicodedata
+
+import pytest
+
+from catalog import CatalogSnapshot
+from synthetic_orders import load_seed_catalog
+from text_normalization import DEFAULT_SYNONYMS, load_synonyms, normalize_text
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('Pizza Calabresa Acebolada', 'pizza calabresa acebolada'),
+    ('  FRANGO   com\tCATUPIRY ', 'frango com catupiry'),
+    ('Açaí, Pão-de-Queijo!', 'acai pao de queijo'),
+    ('Coca–Cola 2L', 'coca cola 2l'),
+    ('Pizza gde', 'pizza grande'),
+    ('pizza PEQUENA', 'pizza pequeno'),
+    ('Refri 2L', 'refrigerante 2l'),
+    ('gdes', 'gdes'),  # só palavras inteiras são trocadas
+    ('ḿ', 'm'),  # fora da tabela pré-compilada
+    (42, '42'),
+    ('', ''),
+    (None, ''),
+])
+def test_normalize_text(text, expected):
+    assert normalize_text(text) == expected
+
+
+def test_matches_full_unicode_decomposition_for_latin_letters():
+    for code in range(0x00C0, 0x0250):
+        char = chr(code)
+        if not char.isalpha():
+            continue
+        reference = ''.join(c for c in unicodedata.normalize('NFKD', char) if not unicodedata.combining(c))
+        if reference.isascii():
+            assert normalize_text(char) == normalize_text(reference.lower()), char
+
+
+def test_catalog_lookup_uses_same_normalization():
+    snapshot = CatalogSnapshot(load_seed_catalog())
+
+    assert snapshot.find_product('PIZZA   mussarela', 'Pequena', 'Pizza') is \
+        snapshot.find_product('Pizza Mussarela', 'pequeno', 'pizza')
+    assert snapshot.find_neighborhood('vila cristina!') is snapshot.find_neighborhood('Vila Cristina')
+
+
+def test_custom_synonyms_are_normalized_and_merged(tmp_path):
+    path = tmp_path / 'sinonimos.json'
+    path.write_text(json.dumps({'Calab.': 'Calabresa', 'GG': 'Gigante'}), encoding='utf-8')
+
+    synonyms = load_synonyms(str(path))
+
+    assert synonyms['calab'] == 'calabresa'
+    assert synonyms['gg'] == 'gigante'
+    assert synonyms['gde'] == DEFAULT_SYNONYMS['gde']
+
+
+@pytest.mark.parametrize('content', [None, '{invalido', '["lista"]'])
+def test_bad_synonyms_file_keeps_defaults(tmp_path, content):
+    path = tmp_path / 'sinonimos.json'
+    if content is not None:
+        path.write_text(content, encoding='utf-8')
+
+    assert load_synonyms(str(path)) == DEFAULT_SYNONYMS
@@ -0,0 +1,95 @@
+"""
+Testes da contabilização de tokens, custo e alertas de uso do LLM.
+Rodam sem rede, com os preços de Config.OPENAI_PRICING.
+"""
+
+import json
+
+import pytest
+
+from config import Config
+from usage_tracker import UNKNOWN_UNIT, UsageTracker, estimate_cost, find_pricing
+
+
+@pytest.mark.parametrize('model, expected', [
+    ('gpt-4.1-mini', 'gpt-4.1-mini'),
+    ('gpt-4.1-mini-2025-04-14', 'gpt-4.1-mini'),
+    ('gpt-4.1-2025-04-14', 'gpt-4.1'),
+    ('gpt-4.1-nano-2025-04-14', 'gpt-4.1-nano'),
+])
+def test_pricing_uses_longest_prefix(model, expected):
+    assert find_pricing(model) is Config.OPENAI_PRICING[expected]
+
+
+@pytest.mark.parametrize('model', [None, '', 'modelo-sem-preco'])
+def test_unknown_model_has_no_cost(model):
+    assert find_pricing(model) is None
+    assert estimate_cost(model, 1000, 100) is None
+
+
+def test_cached_tokens_use_cache_price():
+    # gpt-4.1-mini: 0.40 entrada, 0.10 em cache, 1.60 saída por milhão
+    assert estimate_cost('gpt-4.1-mini', 1_000_000, 0) == pytest.approx(0.40)
+    assert estimate_cost('gpt-4.1-mini', 1_000_000, 0, cached_tokens=1_000_000) == pytest.approx(0.10)
+    assert estimate_cost('gpt-4.1-mini', 2000, 500, cached_tokens=1500) == pytest.approx(
+        (500 * 0.40 + 1500 * 0.10 + 500 * 1.60) / 1_000_000
+    )
+
+
+def test_aggregates_by_unit_model_and_prompt_version():
+    tracker = UsageTracker()
+    tracker.record('gpt-4.1-mini', 1000, 100, 0.5, unidade='Maria Dilce', cached_tokens=800, prompt_version='v2')
+    tracker.record('gpt-4.1-mini', 1000, 300, 1.5, unidade='Maria Dilce', prompt_version='v2')
+    tracker.record('gpt-4.1', 500, 50, 0.2)
+
+    usage = tracker.snapshot()
+    unit = usage['por_unidade']['Maria Dilce']
+
+    assert usage['total']['requisicoes'] == 3
+    assert (unit['requisicoes'], unit['tokens_total'], unit['taxa_cache']) == (2, 2400, 0.4)
+    assert unit['latencia_media_ms'] == 1000.0
+    assert usage['por_unidade'][UNKNOWN_UNIT]['requisicoes'] == 1
+    assert set(usage['por_modelo']) == {'gpt-4.1-mini', 'gpt-4.1'}
+    assert usage['por_versao_prompt']['v2']['requisicoes'] == 2
+    assert usage['total']['custo_estimado_usd'] == pytest.approx(
+        sum(agg['custo_estimado_usd'] for agg in usage['por_modelo'].values())
+    )
+
+
+def test_outlier_alert_after_minimum_samples():
+    tracker = UsageTracker(outlier_stddevs=3, outlier_min_samples=10)
+    for tokens in [900, 1000, 1100] * 4:
+        assert 'alerta' not in tracker.record('gpt-4.1-mini', tokens, 0, 0.1)
+
+    record = tracker.record('gpt-4.1-mini', 5000, 0, 0.1, unidade='Maria Dilce')
+
+    assert 'σ' in record['alerta']
+    [alert] = tracker.snapshot()['alertas_recentes']
+    assert (alert['unidade'], alert['tokens_total']) == ('Maria Dilce', 5000)
+
+
+def test_no_outlier_alert_before_minimum_samples():
+    tracker = UsageTracker(outlier_min_samples=10)
+    for tokens in (100, 100, 100):
+        tracker.record('gpt-4.1-mini', tokens, 0, 0.1)
+
+    assert 'alerta' not in tracker.record('gpt-4.1-mini', 100_000, 0, 0.1)
+
+
+def test_absolute_limit_alert():
+    tracker = UsageTracker(max_tokens_alert=2000)
+
+    assert 'alerta' not in tracker.record('gpt-4.1-mini', 1500, 500, 0.1)
+    assert tracker.record('gpt-4.1-mini', 1500, 501, 0.1)['alerta'] == 'acima do limite de 2000 tokens'
+
+
+def test_audit_trail_written_per_request(tmp_path):
+    path = tmp_path / 'uso.jsonl'
+    tracker = UsageTracker(audit_path=str(path))
+    tracker.record('gpt-4.1-mini', 1000, 100, 0.25, unidade='Maria Dilce', caracteres_resumo=420)
+
+    [line] = path.read_text(encoding='utf-8').splitlines()
+    entry = json.loads(line)
+    assert entry['unidade'] == 'Maria Dilce'
+    assert entry['caracteres_resumo'] == 420
+    assert entry['latencia_ms'] == 250.0
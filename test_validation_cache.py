@@ -0,0 +1,112 @@
+"""
+Testes do cache de resultados do OrderValidator.
+Rodam sem rede, contra o cardápio de exemplo do database_schema.sql.
+"""
+
+import copy
+
+import pytest
+
+from database import OrderValidator, StaticCatalogClient
+from synthetic_orders import load_seed_catalog
+
+PEDIDO = {
+    'produtos': [
+        {'nome': 'Pizza Calabresa Acebolada', 'tipo_produto': 'pizza', 'tamanho': 'grande', 'preco': 50.0},
+        {'nome': 'Pizza Mussarela', 'tipo_produto': 'pizza', 'tamanho': 'pequeno', 'preco': 20.0}
+    ],
+    'bairro': 'Vila Cristina',
+    'taxa_entrega': 3.0,
+    'valor_total': 80.0,
+    'tipo_entrega': 'entrega'
+}
+
+
+@pytest.fixture(scope='module')
+def db():
+    return StaticCatalogClient(load_seed_catalog())
+
+
+@pytest.fixture
+def validator(db):
+    return OrderValidator(db, cache_size=2)
+
+
+def with_product(**fields):
+    order = copy.deepcopy(PEDIDO)
+    order['produtos'][1].update(fields)
+    return order
+
+
+def test_hit_returns_same_result_as_uncached(db, validator):
+    expected = OrderValidator(db, cache_size=0).validate_order(PEDIDO)
+    first = validator.validate_order(PEDIDO)
+    # Outro cliente, mesmo conteúdo: reaproveita o resultado
+    second = validator.validate_order({**PEDIDO, 'nome': 'Outra Pessoa'})
+
+    assert first == second == expected
+    assert isinstance(second['erros'], list) and isinstance(second['correcoes'], list)
+    stats = validator.cache_stats()
+    assert (stats['acertos'], stats['falhas'], stats['entradas']) == (1, 1, 1)
+
+
+def test_changed_field_is_a_miss(validator):
+    validator.validate_order(PEDIDO)
+    result = validator.validate_order(with_product(preco=27.0))
+
+    assert validator.cache_stats()['acertos'] == 0
+    assert not any('Mussarela' in erro for erro in result['erros'])
+
+
+def test_hit_does_not_share_mutable_state(validator):
+    first = validator.validate_order(PEDIDO)
+    first['erros'].append('alterado')
+    first['correcoes'][0]['preco_correto'] = 0
+
+    second = validator.validate_order(PEDIDO)
+    second['correcoes'][0]['preco_correto'] = 1
+    third = validator.validate_order(PEDIDO)
+
+    assert 'alterado' not in third['erros']
+    assert third['correcoes'][0]['preco_correto'] == 27.0
+    assert second['correcoes'][0] is not third['correcoes'][0]
+
+
+def test_missing_price_is_not_reused_for_null_price(validator):
+    order = with_product()
+    del order['produtos'][1]['preco']
+    validator.validate_order(order)
+
+    # Sem cache, preço None quebra a validação; o cache não pode esconder isso
+    with pytest.raises(TypeError):
+        validator.validate_order(with_product(preco=None))
+
+
+def test_int_and_float_values_get_separate_entries(validator):
+    as_float = validator.validate_order(with_product(preco=27.0))
+    as_int = validator.validate_order(with_product(preco=27))
+
+    assert validator.cache_stats()['acertos'] == 0
+    assert type(as_float['valor_total_calculado']) is float
+    assert as_int == OrderValidator(validator.db, cache_size=0).validate_order(with_product(preco=27))
+
+
+def test_least_recently_used_entry_is_evicted(validator):
+    a, b, c = PEDIDO, with_product(preco=27.0), with_product(preco=30.0)
+    validator.validate_order(a)
+    validator.validate_order(b)
+    validator.validate_order(a)  # a passa a ser o mais recente
+    validator.validate_order(c)  # descarta b
+
+    assert validator.cache_stats()['entradas'] == 2
+    validator.validate_order(a)
+    assert validator.cache_stats()['acertos'] == 2
+    validator.validate_order(b)
+    assert validator.cache_stats()['acertos'] == 2
+
+
+def test_unhashable_field_skips_cache(validator):
+    result = validator.validate_order({**PEDIDO, 'bairro': ['Vila Cristina']})
+
+    assert not result['valido']
+    assert validator.cache_stats()['entradas'] == 0
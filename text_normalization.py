@@ -0,0 +1,115 @@
+"""
+Módulo de normalização de texto para as buscas no cardápio.
+
+A normalização é feita em uma única passada com uma tabela de tradução
+pré-compilada (acentos, maiúsculas e pontuação), seguida da troca de
+abreviações e sinônimos comuns nos resumos ("gde" -> "grande"). O mesmo
+processo é aplicado ao montar os índices do cardápio e ao consultar.
+"""
+
+import json
+import logging
+import string
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Optional
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Abreviações e sinônimos vistos nos resumos, já normalizados (sem acentos, minúsculos)
+DEFAULT_SYNONYMS = {
+    'gde': 'grande',
+    'grd': 'grande',
+    'peq': 'pequeno',
+    'pqn': 'pequeno',
+    'pequena': 'pequeno',
+    'broto': 'pequeno',
+    'med': 'medio',
+    'media': 'medio',
+    'refri': 'refrigerante',
+    'refrig': 'refrigerante',
+}
+
+
+def _build_translation() -> Dict[int, str]:
+    """Monta a tabela de tradução: letras acentuadas -> base minúscula, pontuação -> espaço."""
+    table: Dict[int, str] = {}
+    for code in range(0x00C0, 0x0250):
+        char = chr(code)
+        base = ''.join(c for c in unicodedata.normalize('NFKD', char) if not unicodedata.combining(c))
+        if base != char and base.isascii():
+            table[code] = base.lower()
+    for char in string.ascii_uppercase:
+        table[ord(char)] = char.lower()
+    for char in string.punctuation + '–—‘’“”´·':
+        table[ord(char)] = ' '
+    for char in '\t\n\r\x0b\x0c ':
+        table[ord(char)] = ' '
+    return table
+
+
+_TRANSLATION = str.maketrans(_build_translation())
+
+
+def load_synonyms(path: Optional[str] = None) -> Dict[str, str]:
+    """
+    Carrega o dicionário de sinônimos.
+
+    Args:
+        path: Arquivo JSON {"abreviacao": "termo"} somado aos padrões (opcional)
+
+    Returns:
+        Dicionário de sinônimos com chaves e valores normalizados
+    """
+    synonyms = dict(DEFAULT_SYNONYMS)
+    if path:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                custom = json.load(f)
+            synonyms.update({
+                _fold(str(key)): _fold(str(value)) for key, value in custom.items()
+            })
+            logger.info(f"{len(custom)} sinônimos carregados de {path}")
+        except (OSError, ValueError, AttributeError) as e:
+            logger.error(f"Erro ao carregar sinônimos de {path}: {e}")
+    return synonyms
+
+
+def _fold(text: str) -> str:
+    """Remove acentos, maiúsculas e pontuação e compacta os espaços."""
+    folded = text.translate(_TRANSLATION)
+    if not folded.isascii():
+        # Caracteres fora da tabela (raros): decomposição completa
+        folded = ''.join(
+            c for c in unicodedata.normalize('NFKD', folded) if not unicodedata.combining(c)
+        ).lower()
+    return ' '.join(folded.split())
+
+
+_synonyms = load_synonyms(Config.NORMALIZATION_SYNONYMS_PATH or None)
+
+
+@lru_cache(maxsize=Config.NORMALIZATION_CACHE_SIZE)
+def _normalize(text: str) -> str:
+    words = _fold(text).split(' ')
+    return ' '.join([_synonyms.get(word, word) for word in words])
+
+
+def normalize_text(text) -> str:
+    """
+    Normaliza texto para comparação (minúsculas, sem acentos, sem pontuação,
+    espaços compactados e abreviações expandidas).
+
+    Args:
+        text: Texto a normalizar
+
+    Returns:
+        Texto normalizado
+    """
+    if not text:
+        return ""
+    if not isinstance(text, str):
+        text = str(text)
+    return _normalize(text)
+
@@ -0,0 +1,291 @@
+"""
+Módulo de contabilização de tokens, latência e custo das chamadas ao LLM.
+
+Agrega o uso por unidade e por modelo, grava uma trilha de auditoria
+por requisição e alerta quando o consumo de tokens foge do padrão.
+"""
+
+import json
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+from config import Config
+
+logger = logging.getLogger(__name__)
+audit_logger = logging.getLogger('audit.llm_usage')
+
+UNKNOWN_UNIT = 'desconhecida'
+
+# Modelos sem preço já avisados no log (um aviso por modelo)
+_unpriced_models = set()
+
+
+def find_pricing(model: Optional[str]) -> Optional[Dict[str, float]]:
+    """
+    Busca o preço de um modelo pelo prefixo mais longo cadastrado.
+
+    A API devolve o nome do snapshot com data (ex: 'gpt-4.1-mini-2025-04-14'),
+    que deve usar o preço de 'gpt-4.1-mini'.
+
+    Args:
+        model: Nome do modelo
+
+    Returns:
+        Preços por milhão de tokens ou None se nenhum prefixo casar
+    """
+    if not model:
+        return None
+    pricing = Config.OPENAI_PRICING.get(model)
+    if pricing is not None:
+        return pricing
+
+    matches = [name for name in Config.OPENAI_PRICING if model.startswith(name)]
+    if matches:
+        return Config.OPENAI_PRICING[max(matches, key=len)]
+
+    if model not in _unpriced_models:
+        _unpriced_models.add(model)
+        logger.warning(f"Modelo '{model}' sem preço em Config.OPENAI_PRICING; custo não será estimado")
+    return None
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int,
+                  cached_tokens: int = 0) -> Optional[float]:
+    """
+    Estima o custo de uma chamada em dólares.
+
+    Args:
+        model: Nome do modelo
+        prompt_tokens: Tokens de entrada (incluindo os servidos pelo cache)
+        completion_tokens: Tokens de saída
+        cached_tokens: Tokens de entrada servidos pelo cache de prompt
+
+    Returns:
+        Custo estimado em USD ou None se o modelo não tiver preço configurado
+    """
+    pricing = find_pricing(model)
+    if pricing is None:
+        return None
+    cached_price = pricing.get('entrada_cache', pricing['entrada'])
+    return round(
+        (prompt_tokens - cached_tokens) * pricing['entrada'] / 1_000_000
+        + cached_tokens * cached_price / 1_000_000
+        + completion_tokens * pricing['saida'] / 1_000_000,
+        8
+    )
+
+
+class _Aggregate:
+    """Acumulador de uso para uma chave (unidade ou modelo)."""
+
+    __slots__ = ('requisicoes', 'tokens_prompt', 'tokens_cache', 'tokens_resposta', 'latencia_total_ms', 'custo_usd')
+
+    def __init__(self):
+        self.requisicoes = 0
+        self.tokens_prompt = 0
+        self.tokens_cache = 0
+        self.tokens_resposta = 0
+        self.latencia_total_ms = 0.0
+        self.custo_usd = 0.0
+
+    def add(self, record: Dict[str, Any]):
+        self.requisicoes += 1
+        self.tokens_prompt += record['tokens_prompt']
+        self.tokens_cache += record['tokens_cache']
+        self.tokens_resposta += record['tokens_resposta']
+        self.latencia_total_ms += record['latencia_ms']
+        self.custo_usd += record['custo_estimado_usd'] or 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        count = self.requisicoes or 1
+        return {
+            'requisicoes': self.requisicoes,
+            'tokens_prompt': self.tokens_prompt,
+            'tokens_cache': self.tokens_cache,
+            'tokens_resposta': self.tokens_resposta,
+            'tokens_total': self.tokens_prompt + self.tokens_resposta,
+            'taxa_cache': round(self.tokens_cache / self.tokens_prompt, 4) if self.tokens_prompt else 0.0,
+            'media_tokens_prompt': round(self.tokens_prompt / count, 1),
+            'media_tokens_resposta': round(self.tokens_resposta / count, 1),
+            'latencia_media_ms': round(self.latencia_total_ms / count, 1),
+            'custo_estimado_usd': round(self.custo_usd, 6)
+        }
+
+
+class UsageTracker:
+    """Registra e agrega o uso de tokens das chamadas ao LLM."""
+
+    def __init__(
+        self,
+        audit_path: Optional[str] = None,
+        outlier_stddevs: float = 3.0,
+        outlier_min_samples: int = 30,
+        max_tokens_alert: int = 0,
+        window: int = 500
+    ):
+        """
+        Inicializa o rastreador.
+
+        Args:
+            audit_path: Arquivo JSONL da trilha de auditoria (None desativa)
+            outlier_stddevs: Desvios-padrão acima da média que disparam alerta
+            outlier_min_samples: Amostras mínimas antes de avaliar outliers
+            max_tokens_alert: Limite absoluto de tokens por requisição (0 desativa)
+            window: Quantidade de requisições recentes usadas na estatística
+        """
+        self.audit_path = audit_path
+        self.outlier_stddevs = outlier_stddevs
+        self.outlier_min_samples = outlier_min_samples
+        self.max_tokens_alert = max_tokens_alert
+        self._lock = threading.Lock()
+        self._total = _Aggregate()
+        self._by_unit: Dict[str, _Aggregate] = {}
+        self._by_model: Dict[str, _Aggregate] = {}
+        self._by_prompt_version: Dict[str, _Aggregate] = {}
+        self._recent_tokens: Deque[int] = deque(maxlen=window)
+        self._alerts: Deque[Dict[str, Any]] = deque(maxlen=50)
+
+    def record(
+        self,
+        model: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        latency: float,
+        unidade: Optional[str] = None,
+        cached_tokens: int = 0,
+        prompt_version: Optional[str] = None,
+        **extra: Any
+    ) -> Dict[str, Any]:
+        """
+        Registra o uso de uma chamada ao LLM.
+
+        Args:
+            model: Modelo utilizado
+            prompt_tokens: Tokens de entrada
+            completion_tokens: Tokens de saída
+            latency: Latência da chamada em segundos
+            unidade: Unidade do pedido
+            cached_tokens: Tokens de entrada servidos pelo cache de prompt
+            prompt_version: Versão do prompt utilizado
+            **extra: Campos adicionais para a trilha de auditoria
+
+        Returns:
+            Registro de uso da requisição
+        """
+        record = {
+            'modelo': model,
+            'unidade': unidade or UNKNOWN_UNIT,
+            'versao_prompt': prompt_version,
+            'tokens_prompt': prompt_tokens,
+            'tokens_cache': cached_tokens,
+            'tokens_resposta': completion_tokens,
+            'tokens_total': prompt_tokens + completion_tokens,
+            'latencia_ms': round(latency * 1000, 1),
+            'custo_estimado_usd': estimate_cost(model, prompt_tokens, completion_tokens, cached_tokens),
+            **extra
+        }
+
+        with self._lock:
+            alert = self._check_outlier(record)
+            self._recent_tokens.append(record['tokens_total'])
+            self._total.add(record)
+            self._by_unit.setdefault(record['unidade'], _Aggregate()).add(record)
+            self._by_model.setdefault(model, _Aggregate()).add(record)
+            if prompt_version:
+                self._by_prompt_version.setdefault(prompt_version, _Aggregate()).add(record)
+            if alert:
+                self._alerts.append(alert)
+
+        if alert:
+            record['alerta'] = alert['motivo']
+            logger.warning(
+                f"Consumo de tokens fora do padrão: {record['tokens_total']} tokens "
+                f"(unidade={record['unidade']}, modelo={model}) - {alert['motivo']}"
+            )
+
+        self._audit(record)
+        return record
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Retorna os agregados atuais.
+
+        Returns:
+            Dicionário com totais, agregados por unidade, modelo e versão do prompt e alertas recentes
+        """
+        with self._lock:
+            return {
+                'total': self._total.to_dict(),
+                'por_unidade': {unit: agg.to_dict() for unit, agg in self._by_unit.items()},
+                'por_modelo': {model: agg.to_dict() for model, agg in self._by_model.items()},
+                'por_versao_prompt': {
+                    version: agg.to_dict() for version, agg in self._by_prompt_version.items()
+                },
+                'alertas_recentes': list(self._alerts)
+            }
+
+    def _check_outlier(self, record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Verifica se o consumo da requisição é um outlier (chamado com o lock)."""
+        tokens = record['tokens_total']
+        reason = None
+
+        if self.max_tokens_alert and tokens > self.max_tokens_alert:
+            reason = f"acima do limite de {self.max_tokens_alert} tokens"
+        elif len(self._recent_tokens) >= self.outlier_min_samples:
+            samples: List[int] = list(self._recent_tokens)
+            mean = sum(samples) / len(samples)
+            stddev = math.sqrt(sum((s - mean) ** 2 for s in samples) / len(samples))
+            threshold = mean + self.outlier_stddevs * stddev
+            if stddev > 0 and tokens > threshold:
+                reason = f"acima de {threshold:.0f} tokens (média {mean:.0f} + {self.outlier_stddevs:g}σ)"
+
+        if reason is None:
+            return None
+
+        return {
+            'momento': time.time(),
+            'unidade': record['unidade'],
+            'modelo': record['modelo'],
+            'tokens_total': tokens,
+            'motivo': reason
+        }
+
+    def _audit(self, record: Dict[str, Any]):
+        """Grava o registro na trilha de auditoria."""
+        line = json.dumps({'momento': time.time(), **record}, ensure_ascii=False, default=str)
+        audit_logger.info(line)
+
+        if self.audit_path:
+            try:
+                with self._lock:
+                    with open(self.audit_path, 'a', encoding='utf-8') as f:
+                        f.write(line + '\n')
+            except OSError as e:
+                logger.error(f"Erro ao gravar trilha de auditoria de uso: {e}")
+
+
+_default_tracker: Optional[UsageTracker] = None
+_default_lock = threading.Lock()
+
+
+def get_usage_tracker() -> UsageTracker:
+    """
+    Retorna o rastreador de uso configurado via variáveis de ambiente.
+
+    Returns:
+        Instância compartilhada de UsageTracker
+    """
+    global _default_tracker
+
+    with _default_lock:
+        if _default_tracker is None:
+            _default_tracker = UsageTracker(
+                audit_path=Config.USAGE_AUDIT_PATH or None,
+                outlier_stddevs=Config.USAGE_OUTLIER_STDDEVS,
+                outlier_min_samples=Config.USAGE_OUTLIER_MIN_SAMPLES,
+                max_tokens_alert=Config.USAGE_MAX_TOKENS_ALERT
+            )
+        return _default_tracker